@@ -0,0 +1,254 @@
+"""Shared state broker for the WebSocket backend.
+
+Room state and op logs sit behind the `Broker` interface so the FastAPI
+app can run as several uvicorn workers:
+
+- `LocalBroker` keeps a `RoomStore` in process (single worker, the default);
+- `BrokerServer` is a standalone process that owns the `RoomStore` and is
+  reached over a Unix socket (or TCP where Unix sockets are unavailable);
+- `SocketBroker` is the worker-side client of `BrokerServer`.
+
+Messages published by one worker are fanned out to every other worker,
+which delivers them to its local subscribers. The protocol is one JSON
+object per line: requests carry an `id` and get a reply with the same id,
+fan-out arrives as `{"push": room, "msg": ...}`. A Redis-backed broker
+would implement the same five calls.
+
+Run a broker process with `python -m backend.broker unix:/tmp/omega.sock`
+and point workers at it with `OMEGA_BROKER=unix:/tmp/omega.sock`.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from .rooms import RoomStore
+
+DeliverFn = Callable[[str, str], Awaitable[None]]
+
+# Snapshots travel as single lines
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class Broker:
+    async def start(self, deliver: DeliverFn):
+        """Begin receiving fan-out; `deliver(room, message)` is called for other workers' publishes."""
+
+    async def close(self):
+        pass
+
+    async def join(self, project_id: str) -> Dict[str, Any]:
+        """Register a subscriber; returns the room's {"graph", "seq"}."""
+        raise NotImplementedError
+
+    async def leave(self, project_id: str):
+        raise NotImplementedError
+
+    async def apply(self, project_id: str, evt: Dict[str, Any]) -> Optional[int]:
+        """Apply an event to the shared state; returns its seq, or None if nothing changed."""
+        raise NotImplementedError
+
+    async def publish(self, project_id: str, message: str):
+        """Send a message to the room's subscribers on every other worker."""
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    def __init__(self, store: Optional[RoomStore] = None):
+        self.store = store or RoomStore()
+
+    async def close(self):
+        await self.store.flush()
+
+    async def join(self, project_id: str) -> Dict[str, Any]:
+        room = await self.store.join(project_id)
+        return {"graph": room.graph, "seq": room.seq}
+
+    async def leave(self, project_id: str):
+        await self.store.leave(project_id)
+
+    async def apply(self, project_id: str, evt: Dict[str, Any]) -> Optional[int]:
+        room = await self.store.get(project_id)
+        return room.apply(evt)
+
+    async def publish(self, project_id: str, message: str):
+        # Single worker: local subscribers were already sent the message
+        pass
+
+
+async def _open(address: str):
+    kind, _, rest = address.partition(":")
+    if kind == "unix":
+        return await asyncio.open_unix_connection(rest, limit=STREAM_LIMIT)
+    host, _, port = rest.rpartition(":")
+    return await asyncio.open_connection(host, int(port), limit=STREAM_LIMIT)
+
+
+class SocketBroker(Broker):
+    def __init__(self, address: str):
+        self.address = address
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._deliver: Optional[DeliverFn] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: DeliverFn):
+        self._deliver = deliver
+        self._reader, self._writer = await _open(self.address)
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                if "push" in msg:
+                    if self._deliver is not None:
+                        await self._deliver(msg["push"], msg["msg"])
+                    continue
+                fut = self._pending.pop(msg.get("id"), None)
+                if fut is not None and not fut.done():
+                    if "error" in msg:
+                        fut.set_exception(RuntimeError(msg["error"]))
+                    else:
+                        fut.set_result(msg.get("result"))
+        finally:
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError("broker connection lost"))
+            self._pending.clear()
+
+    async def _call(self, op: str, **fields) -> Any:
+        req_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = fut
+        self._send({"id": req_id, "op": op, **fields})
+        return await fut
+
+    def _send(self, msg: Dict[str, Any]):
+        # Requests are pipelined; the writer buffers and the reply is matched by id
+        self._writer.write(json.dumps(msg).encode("utf-8") + b"\n")
+
+    async def join(self, project_id: str) -> Dict[str, Any]:
+        return await self._call("join", room=project_id)
+
+    async def leave(self, project_id: str):
+        await self._call("leave", room=project_id)
+
+    async def apply(self, project_id: str, evt: Dict[str, Any]) -> Optional[int]:
+        return await self._call("apply", room=project_id, evt=evt)
+
+    async def publish(self, project_id: str, message: str):
+        # Fire-and-forget: ordering per connection is preserved by the stream
+        self._send({"op": "publish", "room": project_id, "msg": message})
+
+
+class BrokerServer:
+    """The broker process: owns the RoomStore and fans publishes out between workers."""
+
+    def __init__(self, address: str, store: Optional[RoomStore] = None):
+        self.address = address
+        self.store = store or RoomStore()
+        self._workers: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        kind, _, rest = self.address.partition(":")
+        if kind == "unix":
+            if os.path.exists(rest):
+                os.unlink(rest)
+            self._server = await asyncio.start_unix_server(self._handle, rest, limit=STREAM_LIMIT)
+        else:
+            host, _, port = rest.rpartition(":")
+            self._server = await asyncio.start_server(self._handle, host, int(port), limit=STREAM_LIMIT)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            await self.store.flush()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._workers.add(writer)
+        joined: Dict[str, int] = {}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                req = json.loads(line)
+                op, room = req.get("op"), req.get("room")
+                if op == "publish":
+                    out = (json.dumps({"push": room, "msg": req["msg"]}) + "\n").encode("utf-8")
+                    for other in list(self._workers):
+                        if other is not writer:
+                            other.write(out)
+                    continue
+                try:
+                    if op == "join":
+                        state = await self.store.join(room)
+                        joined[room] = joined.get(room, 0) + 1
+                        result = {"graph": state.graph, "seq": state.seq}
+                    elif op == "leave":
+                        if joined.get(room):
+                            joined[room] -= 1
+                            await self.store.leave(room)
+                        result = None
+                    elif op == "apply":
+                        result = (await self.store.get(room)).apply(req["evt"])
+                    else:
+                        raise ValueError(f"unknown op {op!r}")
+                    reply = {"id": req.get("id"), "result": result}
+                except Exception as e:
+                    reply = {"id": req.get("id"), "error": str(e)}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                if writer.transport.get_write_buffer_size() > STREAM_LIMIT // 16:
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._workers.discard(writer)
+            # A worker that died still holds joins; release them so its rooms can be evicted
+            for room, count in joined.items():
+                for _ in range(count):
+                    await self.store.leave(room)
+            writer.close()
+
+
+def make_broker(address: Optional[str] = None) -> Broker:
+    """Broker selected by `OMEGA_BROKER` ("unix:/path" or "tcp:host:port"); local by default."""
+    address = address if address is not None else os.environ.get("OMEGA_BROKER", "")
+    if not address or address == "local":
+        return LocalBroker()
+    return SocketBroker(address)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Omega-Visual state broker")
+    parser.add_argument("address", help="unix:/path/to.sock or tcp:host:port")
+    parser.add_argument("--data", default="rooms", help="Directory for evicted rooms")
+    parser.add_argument("--max-loaded", type=int, default=64)
+    args = parser.parse_args()
+    server = BrokerServer(args.address, RoomStore(args.data, args.max_loaded))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
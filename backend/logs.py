@@ -0,0 +1,46 @@
+"""Leveled, sampled structured logging for the backend.
+
+`log_event` writes one `event {json fields}` line through the standard
+`logging` module. Disabled levels cost one `isEnabledFor` check, and
+high-volume events pass `sample=N` so that only every Nth occurrence is
+written (the line records how many it stands for).
+"""
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Dict
+
+LOGGER = logging.getLogger("omega.backend")
+
+if not LOGGER.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    LOGGER.addHandler(_handler)
+    LOGGER.setLevel(os.environ.get("OMEGA_LOG_LEVEL", "INFO").upper())
+    LOGGER.propagate = False
+
+_counters: Dict[str, int] = defaultdict(int)
+
+
+def log_event(level: int, event: str, sample: int = 1, **fields: Any):
+    if not LOGGER.isEnabledFor(level):
+        return
+    if sample > 1:
+        _counters[event] += 1
+        if _counters[event] % sample:
+            return
+        fields["sampled"] = sample
+    LOGGER.log(level, "%s %s", event, _Lazy(fields))
+
+
+class _Lazy:
+    """Serialize fields only if a handler actually formats the record."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return json.dumps(self.fields, default=str)
@@ -0,0 +1,199 @@
+"""Per-client receive pipeline for the WebSocket backend.
+
+A reader task pulls frames off the socket and checks them in constant
+time, before any parsing:
+
+- frames above `max_message_bytes` are dropped;
+- frames beyond the client's token bucket are dropped, and a client that
+  keeps flooding is disconnected.
+
+Accepted frames go into a queue bounded by `queue_size`. When it is full
+the reader stops reading, so TCP pushes back on the client instead of the
+server buffering without limit. The processing side drains whatever is
+queued as one batch, parses it, and coalesces redundant events before
+handling them:
+
+- repeated moves of the same node keep only the last one;
+- repeated snapshots keep only the last one.
+
+Coalescing only sees the frames of one connection, so clients keep a
+single connection per session (the editor does) rather than one per event.
+
+A frame may also carry a JSON array of events; each event in it costs
+a token.
+"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from .logs import log_event
+
+Event = Dict[str, Any]
+BatchHandler = Callable[[List[Event]], Awaitable[None]]
+
+
+@dataclass
+class Limits:
+    max_message_bytes: int = 4 * 1024 * 1024
+    rate: float = 200.0  # sustained events per second
+    burst: float = 400.0
+    queue_size: int = 256
+    max_batch: int = 256
+    # Disconnect once rate-limited frames outpace `rate` by this many
+    max_dropped: int = 2000
+    notice_interval: float = 1.0
+
+
+DEFAULT_LIMITS = Limits()
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def take(self, n: float = 1.0) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+
+def coalesce(events: List[Event]) -> Tuple[List[Event], int]:
+    """Drop events superseded later in the same batch; returns (events, dropped count)."""
+    kept: List[Event] = []
+    moved = set()
+    snapshot_seen = False
+    for evt in reversed(events):
+        evt_type = evt.get("type")
+        if evt_type == "node_moved":
+            node_id = (evt.get("payload") or {}).get("id")
+            if node_id in moved:
+                continue
+            moved.add(node_id)
+        elif evt_type == "graph_snapshot":
+            if snapshot_seen:
+                continue
+            snapshot_seen = True
+        kept.append(evt)
+    kept.reverse()
+    return kept, len(events) - len(kept)
+
+
+_CLOSED = object()
+
+
+class ReceivePipeline:
+    def __init__(self, websocket: WebSocket, client: str = "", limits: Limits = DEFAULT_LIMITS):
+        self.websocket = websocket
+        self.client = client
+        self.limits = limits
+        self.bucket = TokenBucket(limits.rate, limits.burst)
+        # Unbounded queue + slots, so the close marker can always be queued
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(limits.queue_size)
+        self.stats = {"received": 0, "dropped_rate": 0, "dropped_size": 0, "invalid": 0, "coalesced": 0}
+        self.strikes = TokenBucket(limits.rate, limits.max_dropped)
+        self._last_notice = 0.0
+
+    async def run(self, handle: BatchHandler):
+        reader = asyncio.create_task(self._read())
+        try:
+            while True:
+                frames = await self._next_frames()
+                if frames is None:
+                    break
+                invalid = self.stats["invalid"]
+                events = self._parse(frames)
+                if self.stats["invalid"] > invalid:
+                    await self._notice("invalid message")
+                events, dropped = coalesce(events)
+                self.stats["coalesced"] += dropped
+                if events:
+                    await handle(events)
+        finally:
+            reader.cancel()
+            log_event(logging.INFO, "client_closed", client=self.client, **self.stats)
+
+    async def _next_frames(self) -> Optional[List[str]]:
+        first = await self.queue.get()
+        if first is _CLOSED:
+            return None
+        frames = [first]
+        while len(frames) < self.limits.max_batch and not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is _CLOSED:
+                # Handle what was read, then stop on the next call
+                self.queue.put_nowait(_CLOSED)
+                break
+            frames.append(item)
+        for _ in frames:
+            self._slots.release()
+        return frames
+
+    async def _read(self):
+        try:
+            while True:
+                data = await self.websocket.receive_text()
+                self.stats["received"] += 1
+                if len(data) > self.limits.max_message_bytes:
+                    self.stats["dropped_size"] += 1
+                    await self._notice("message too large", limit=self.limits.max_message_bytes)
+                    continue
+                if not self.bucket.take():
+                    self.stats["dropped_rate"] += 1
+                    if not self.strikes.take():
+                        log_event(logging.WARNING, "client_flood_disconnect", client=self.client, **self.stats)
+                        await self.websocket.close(code=1008)
+                        break
+                    await self._notice("rate limited", rate=self.limits.rate)
+                    continue
+                # Blocks while the handler is behind: the socket stops being read
+                await self._slots.acquire()
+                self.queue.put_nowait(data)
+        except Exception as e:
+            log_event(logging.DEBUG, "client_read_end", client=self.client, error=str(e))
+        finally:
+            self.queue.put_nowait(_CLOSED)
+
+    async def _notice(self, msg: str, **fields):
+        """Tell the client once per interval instead of once per dropped frame."""
+        now = time.monotonic()
+        if now - self._last_notice < self.limits.notice_interval:
+            return
+        self._last_notice = now
+        log_event(logging.WARNING, "client_throttled", client=self.client, reason=msg, **self.stats)
+        try:
+            await self.websocket.send_text(json.dumps({"type": "error", "payload": {"msg": msg, **fields}}))
+        except Exception:
+            pass
+
+    def _parse(self, frames: List[str]) -> List[Event]:
+        events: List[Event] = []
+        for data in frames:
+            try:
+                parsed = json.loads(data)
+            except ValueError:
+                self.stats["invalid"] += 1
+                continue
+            if isinstance(parsed, list):
+                # The frame already paid one token
+                if len(parsed) > self.limits.max_batch or not self.bucket.take(max(0, len(parsed) - 1)):
+                    self.stats["dropped_rate"] += len(parsed)
+                    continue
+            for evt in parsed if isinstance(parsed, list) else (parsed,):
+                if isinstance(evt, dict) and isinstance(evt.get("type"), str):
+                    events.append(evt)
+                else:
+                    self.stats["invalid"] += 1
+        return events
@@ -0,0 +1,215 @@
+"""Per-project rooms for the WebSocket backend.
+
+A room's graph state and op log (`RoomState`) live in a `RoomStore`
+owned by the broker (see `backend.broker`), so several worker processes
+can share them. `RoomStore` keeps rooms in an LRU; when more than
+`max_loaded` are in memory, the least recently used rooms nobody has
+joined are written to disk and dropped, then loaded again on the next
+join. Each worker only keeps its own subscribers per room (`RoomManager`).
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+if TYPE_CHECKING:
+    from .broker import Broker
+
+DEFAULT_ROOM = "default"
+ROOM_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+def valid_room_id(project_id: str) -> bool:
+    return bool(ROOM_ID_RE.match(project_id)) and project_id not in (".", "..")
+
+
+class RoomState:
+    # Entries, each a compact op: snapshots are logged without their graph
+    LOG_LIMIT = 1000
+
+    def __init__(self, project_id: str, state: Optional[Dict[str, Any]] = None):
+        self.project_id = project_id
+        self.graph: Dict[str, Any] = {"nodes": [], "links": []}
+        self.seq = 0
+        self.log: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=self.LOG_LIMIT)
+        self.members = 0
+        self.last_active = time.monotonic()
+        self._nodes_by_id: Dict[str, Dict[str, Any]] = {}
+        if state:
+            self.graph = state.get("graph", self.graph)
+            self.seq = state.get("seq", 0)
+            self.log.extend((seq, self._log_entry(evt)) for seq, evt in state.get("log", []))
+        self._reindex()
+
+    def _reindex(self):
+        self.graph.setdefault("nodes", [])
+        self.graph.setdefault("links", [])
+        self._nodes_by_id = {n.get("id"): n for n in self.graph["nodes"] if isinstance(n, dict)}
+
+    @staticmethod
+    def _log_entry(evt: Dict[str, Any]) -> Dict[str, Any]:
+        """The event as kept in the log: a snapshot's graph is already `self.graph`, so only its type is kept."""
+        if evt.get("type") == "graph_snapshot":
+            return {"type": "graph_snapshot"}
+        return evt
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"graph": self.graph, "seq": self.seq, "log": list(self.log)}
+
+    def apply(self, evt: Dict[str, Any]) -> Optional[int]:
+        """Apply a client event to the graph; returns its op-log seq, or None if nothing changed."""
+        evt_type = evt.get("type")
+        payload = evt.get("payload", {})
+        if evt_type == "node_created":
+            self.graph["nodes"].append(payload)
+            self._nodes_by_id[payload.get("id")] = payload
+        elif evt_type == "link_created":
+            self.graph["links"].append(payload)
+        elif evt_type == "node_moved":
+            node = self._nodes_by_id.get(payload.get("id"))
+            if node is None:
+                return None
+            node["pos"] = payload.get("pos")
+        elif evt_type == "graph_snapshot":
+            self.graph = payload if isinstance(payload, dict) else {"nodes": [], "links": []}
+            self._reindex()
+        else:
+            return None
+        self.seq += 1
+        self.log.append((self.seq, self._log_entry(evt)))
+        self.last_active = time.monotonic()
+        return self.seq
+
+
+class RoomStore:
+    def __init__(self, data_dir: str = "rooms", max_loaded: int = 64):
+        self.data_dir = data_dir
+        self.max_loaded = max_loaded
+        self._rooms: "OrderedDict[str, RoomState]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def loaded(self) -> List[str]:
+        return list(self._rooms)
+
+    def _path(self, project_id: str) -> str:
+        return os.path.join(self.data_dir, f"{project_id}.json")
+
+    def _read(self, project_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(project_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, project_id: str, state: Dict[str, Any]):
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = self._path(project_id)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    async def get(self, project_id: str) -> RoomState:
+        """The room for a project, loading it from disk if it was evicted."""
+        room = self._rooms.get(project_id)
+        if room is None:
+            async with self._lock:
+                room = self._rooms.get(project_id)
+                if room is None:
+                    state = await asyncio.to_thread(self._read, project_id)
+                    room = RoomState(project_id, state)
+                    self._rooms[project_id] = room
+                    # The room being loaded has no members yet but is about to be joined
+                    await self._evict(keep=project_id)
+        self._rooms.move_to_end(project_id)
+        return room
+
+    async def join(self, project_id: str) -> RoomState:
+        room = await self.get(project_id)
+        room.members += 1
+        return room
+
+    async def leave(self, project_id: str):
+        room = self._rooms.get(project_id)
+        if room is None:
+            return
+        room.members = max(0, room.members - 1)
+        if not room.members:
+            async with self._lock:
+                await self._evict()
+
+    async def _evict(self, keep: Optional[str] = None):
+        # Only rooms nobody has joined can go; in-use rooms may exceed the bound briefly
+        excess = len(self._rooms) - self.max_loaded
+        for project_id in list(self._rooms):
+            if excess <= 0:
+                break
+            room = self._rooms[project_id]
+            if room.members or project_id == keep:
+                continue
+            del self._rooms[project_id]
+            await asyncio.to_thread(self._write, project_id, room.to_state())
+            excess -= 1
+
+    async def flush(self):
+        """Write every loaded room to disk (shutdown)."""
+        async with self._lock:
+            for project_id, room in list(self._rooms.items()):
+                await asyncio.to_thread(self._write, project_id, room.to_state())
+
+
+class Room:
+    """This worker's subscribers to one project."""
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.clients: Set[WebSocket] = set()
+
+    async def broadcast(self, message: str, exclude: Optional[WebSocket] = None):
+        for ws in list(self.clients):
+            if exclude is not None and ws is exclude:
+                continue
+            try:
+                await ws.send_text(message)
+            except Exception:
+                self.clients.discard(ws)
+
+
+class RoomManager:
+    def __init__(self, broker: "Broker"):
+        self.broker = broker
+        self._rooms: Dict[str, Room] = {}
+
+    def get(self, project_id: str) -> Optional[Room]:
+        return self._rooms.get(project_id)
+
+    async def join(self, project_id: str, ws: WebSocket) -> Tuple[Room, Dict[str, Any]]:
+        """Subscribe a client; returns its room and the room's current {"graph", "seq"}."""
+        snapshot = await self.broker.join(project_id)
+        room = self._rooms.get(project_id)
+        if room is None:
+            room = self._rooms[project_id] = Room(project_id)
+        room.clients.add(ws)
+        return room, snapshot
+
+    async def leave(self, room: Room, ws: WebSocket):
+        room.clients.discard(ws)
+        if not room.clients:
+            self._rooms.pop(room.project_id, None)
+        await self.broker.leave(room.project_id)
+
+    async def deliver(self, project_id: str, message: str):
+        """Fan-out from other workers: send to every local subscriber of the room."""
+        room = self._rooms.get(project_id)
+        if room is not None:
+            await room.broadcast(message)
@@ -1,87 +1,106 @@
 from fastapi import FastAPI, WebSocket
 import json
-from typing import List, Dict, Any
+import logging
+from typing import Any, Dict, List
+
+from .broker import make_broker
+from .logs import log_event
+from .pipeline import ReceivePipeline
+from .rooms import DEFAULT_ROOM, Room, RoomManager, valid_room_id
 
 app = FastAPI()
 
 
-clients: List[WebSocket] = []
-STATE: Dict[str, Any] = {
-    "graph": {"nodes": [], "links": []}
-}
+# Shared state lives behind the broker; ROOMS only tracks this worker's subscribers
+BROKER = make_broker()
+ROOMS = RoomManager(BROKER)
 
 
-async def broadcast(message: str, exclude: WebSocket | None = None):
-    for ws in list(clients):
-        if exclude is not None and ws is exclude:
-            continue
-        try:
-            await ws.send_text(message)
-        except Exception:
-            try:
-                clients.remove(ws)
-            except ValueError:
-                pass
+async def handle_event(room: Room, websocket: WebSocket, evt: Dict[str, Any]):
+    evt_type = evt.get("type")
+    payload = evt.get("payload", {})
+    log_event(logging.DEBUG, "event", sample=100, room=room.project_id, type=evt_type)
 
+    if evt_type == "node_created":
+        await BROKER.apply(room.project_id, evt)
+        # The server relays graph edits; node values are evaluated (and cached) in the editor
+        ack = {"type": "node_create_ack", "payload": {"id": payload.get("id")}}
+        await websocket.send_text(json.dumps(ack))
 
-@app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+    elif evt_type == "link_created":
+        await BROKER.apply(room.project_id, evt)
+        # Broadcast link creation to other clients in the room, on every worker
+        message = json.dumps(evt)
+        await room.broadcast(message, exclude=websocket)
+        await BROKER.publish(room.project_id, message)
+
+    elif evt_type == "node_moved":
+        await BROKER.apply(room.project_id, evt)
+        # Optional: acknowledge
+        ack = {"type": "node_move_ack", "payload": {"id": payload.get("id"), "pos": payload.get("pos")}}
+        await websocket.send_text(json.dumps(ack))
+
+    elif evt_type == "graph_snapshot":
+        await BROKER.apply(room.project_id, evt)
+        # Broadcast snapshot to others in the room, on every worker
+        message = json.dumps(evt)
+        await room.broadcast(message, exclude=websocket)
+        await BROKER.publish(room.project_id, message)
+        await websocket.send_text(json.dumps({"type": "snapshot_ack"}))
+
+    else:
+        # Unknown event, echo back
+        await websocket.send_text(json.dumps({"type": "info", "payload": {"msg": "unknown event", "data": evt}}))
+
+
+def _known_seq(websocket: WebSocket) -> int:
+    """Room seq the client already has the graph of (`?since=<seq>` on reconnect), or -1."""
+    try:
+        return int(websocket.query_params.get("since", -1))
+    except ValueError:
+        return -1
+
+
+async def serve_room(websocket: WebSocket, project_id: str):
+    if not valid_room_id(project_id):
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
-    clients.append(websocket)
-    print("Client connected")
+    room, snapshot = await ROOMS.join(project_id, websocket)
+    client = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else "?"
+    log_event(logging.INFO, "client_connected", room=project_id, client=client)
+
+    async def handle_batch(events: List[Dict[str, Any]]):
+        for evt in events:
+            await handle_event(room, websocket, evt)
+
     try:
-        while True:
-            data = await websocket.receive_text()
-            # Try to parse JSON event
-            try:
-                evt = json.loads(data)
-            except Exception:
-                # Plain text echo fallback
-                print(f"Received (text): {data}")
-                await websocket.send_text(f"Server echo: {data}")
-                continue
-
-            evt_type = evt.get("type")
-            payload = evt.get("payload", {})
-            print(f"Event: {evt_type} -> {payload}")
-
-            if evt_type == "node_created":
-                # Update server-side state (basic append)
-                STATE.setdefault("graph", {}).setdefault("nodes", []).append(payload)
-                # Example processing: reply with a node_update value
-                reply = {"type": "node_update", "payload": {"id": payload.get("id"), "value": 42}}
-                await websocket.send_text(json.dumps(reply))
-
-            elif evt_type == "link_created":
-                STATE.setdefault("graph", {}).setdefault("links", []).append(payload)
-                # Broadcast link creation to other clients
-                await broadcast(json.dumps(evt), exclude=websocket)
-
-            elif evt_type == "node_moved":
-                # Update node position in server-side state if present
-                node_id = payload.get("id")
-                pos = payload.get("pos")
-                for n in STATE.setdefault("graph", {}).setdefault("nodes", []):
-                    if n.get("id") == node_id:
-                        n["pos"] = pos
-                        break
-                # Optional: acknowledge
-                ack = {"type": "node_move_ack", "payload": {"id": node_id, "pos": pos}}
-                await websocket.send_text(json.dumps(ack))
-
-            elif evt_type == "graph_snapshot":
-                STATE["graph"] = payload
-                # Broadcast snapshot to others
-                await broadcast(json.dumps(evt), exclude=websocket)
-                await websocket.send_text(json.dumps({"type": "snapshot_ack"}))
-
-            else:
-                # Unknown event, echo back
-                await websocket.send_text(json.dumps({"type": "info", "payload": {"msg": "unknown event", "data": evt}}))
+        # Late joiners start from the room's current graph, unless they reconnect to one they have
+        if _known_seq(websocket) < snapshot["seq"]:
+            await websocket.send_text(json.dumps({"type": "graph_snapshot", "payload": snapshot["graph"], "seq": snapshot["seq"]}))
+        await ReceivePipeline(websocket, client).run(handle_batch)
     except Exception as e:
-        print("Client disconnected:", e)
+        log_event(logging.INFO, "client_disconnected", room=project_id, client=client, error=str(e))
     finally:
-        try:
-            clients.remove(websocket)
-        except ValueError:
-            pass
\ No newline at end of file
+        await ROOMS.leave(room, websocket)
+
+
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    # Room can also be chosen in the handshake: /ws?project=<id>
+    await serve_room(websocket, websocket.query_params.get("project", DEFAULT_ROOM))
+
+
+@app.websocket("/ws/{project_id}")
+async def project_websocket_endpoint(websocket: WebSocket, project_id: str):
+    await serve_room(websocket, project_id)
+
+
+@app.on_event("startup")
+async def _start_broker():
+    await BROKER.start(ROOMS.deliver)
+
+
+@app.on_event("shutdown")
+async def _close_broker():
+    await BROKER.close()
@@ -28,15 +28,344 @@ def test():
         raise
 
 
+def import_python(root: str, out: str, workers=None, force: bool = False):
+    import os
+    if os.path.exists(out) and not force:
+        print(f"{out} ya existe; elige otro --out o usa --force para reemplazarlo")
+        sys.exit(1)
+    print(f"Importando código Python de {root}...")
+    sys.path.insert(0, _repo_root())
+    from ui.core.autosave import Autosave, write_snapshot_atomic
+    from ui.core.importer import ImportCache, import_tree
+
+    result = import_tree(root, ImportCache(out + ".import-cache.json"), workers=workers)
+    write_snapshot_atomic(out, result.graph.snapshot())
+    # El WAL de un proyecto anterior en esa ruta se reaplicaría sobre el grafo importado
+    Autosave(out).discard()
+    print(f"Archivos: {result.parsed} analizados, {result.cached} desde caché, {len(result.errors)} con errores")
+    for rel, err in sorted(result.errors.items()):
+        print(f"  {rel}: {err}")
+    print(f"Grafo: {len(result.graph.nodes)} nodos, {len(result.graph.links)} enlaces -> {out}")
+
+
+def diff_projects(base: str, other: str):
+    sys.path.insert(0, _repo_root())
+    from ui.core.diff import diff_graphs, load_graph
+
+    d = diff_graphs(load_graph(base), load_graph(other))
+    if d.is_empty():
+        print("Sin cambios")
+        return
+    for key, count in d.summary().items():
+        if count:
+            print(f"{key}: {count}")
+    for old, new in sorted(d.renamed.items()):
+        print(f"  renombrado {old} -> {new}")
+
+
+def merge_projects(base: str, ours: str, theirs: str, out: str, prefer: str):
+    """Fusión a tres bandas; sale con código 1 si hubo conflictos (resueltos a favor de `prefer`)."""
+    sys.path.insert(0, _repo_root())
+    from ui.core.autosave import write_snapshot_atomic
+    from ui.core.diff import load_graph, merge_graphs
+
+    result = merge_graphs(load_graph(base), load_graph(ours), load_graph(theirs), prefer=prefer)
+    write_snapshot_atomic(out, result.graph.snapshot())
+    print(f"Fusionado: {len(result.graph.nodes)} nodos, {len(result.graph.links)} enlaces -> {out}")
+    for c in result.conflicts:
+        print(f"  conflicto {c.node} [{c.field}]: nuestro={c.ours!r} suyo={c.theirs!r}")
+    if result.conflicts:
+        print(f"{len(result.conflicts)} conflictos resueltos con '{prefer}'")
+        sys.exit(1)
+
+
+def theme_stats(rounds: int):
+    """Reconstruye paneles y alterna temas sin viewport; muestra items y memoria antes/después."""
+    sys.path.insert(0, _repo_root())
+    from dearpygui import dearpygui as dpg
+    from ui.widgets.themes import THEMES
+    from ui.windows.toolbar import build_toolbar
+    from ui.windows.terminal_panel import build_terminal_panel
+
+    dpg.create_context()
+    THEMES.define("light", [(dpg.mvAll, [("color", dpg.mvThemeCol_WindowBg, (240, 240, 240, 255))])])
+
+    def cycle(i):
+        ids = [build_toolbar(), build_terminal_panel()]
+        THEMES.set_active("light" if i % 2 else "dark")
+        for wid in ids:
+            dpg.delete_item(wid)
+
+    cycle(0)
+    before = THEMES.stats()
+    for i in range(rounds):
+        cycle(i + 1)
+    after = THEMES.stats()
+    print(f"Tras 1 ciclo:       {before}")
+    print(f"Tras {rounds + 1} ciclos: {after}")
+    dpg.destroy_context()
+
+
+_SHM_SOURCE = """
+from ui.core.shm import new_array
+out = new_array((int(meta["bytes"]),), "uint8")
+out.fill(1)
+"""
+_SHM_STAGE = """
+from ui.core.shm import new_array
+x = inputs["in"]
+out = new_array(x.shape, x.dtype) if meta["mode"] == "transform" else x
+if meta["mode"] == "transform":
+    numpy.add(x, 1, out=out)
+"""
+
+
+def shm_throughput(size_mb: int, stages: int):
+    """Hace pasar `size_mb` MB por una cadena de `stages` nodos Python (en workers), con y sin memoria compartida."""
+    import time
+    sys.path.insert(0, _repo_root())
+    from ui.core.shm import SharedStore
+    from ui.core.workers import TaskLimits, WorkerPool
+
+    entry = "ui.core.builtin_nodes:python"
+    limits = TaskLimits(cpu_seconds=600, memory_mb=None, wall_seconds=600)
+    # Por la tubería cada valor se copia varias veces (pickle, envío, unpickle): con 1 GB no cabe en memoria
+    pipe_mb = min(size_mb, 256)
+    for mode in ("pass", "transform"):
+        for label, store, mb in (("pipe", None, pipe_mb), ("shm", SharedStore(), size_mb)):
+            pool = WorkerPool(preload=("ui.core.builtin_nodes", "numpy"), store=store, limits=limits).start()
+            try:
+                value = pool.run(entry, {}, {"code": _SHM_SOURCE, "bytes": mb * 1024 * 1024})["out"]
+                start = time.perf_counter()
+                # Como en una cadena de nodos: cada salida es la entrada del siguiente y la anterior se libera
+                for _ in range(stages):
+                    value = pool.run(entry, {"in": value}, {"code": "import numpy\n" + _SHM_STAGE, "mode": mode})["out"]
+                elapsed = time.perf_counter() - start
+                ok = int(value[0]) == (1 + stages if mode == "transform" else 1)
+                value = None
+                rate = mb * stages / 1024 / elapsed
+                live = f", segmentos vivos: {store.live()}" if store is not None else ""
+                print(f"{mode:9} {label:4}: {mb} MB x {stages} nodos en {elapsed:.2f} s -> {rate:.2f} GB/s"
+                      f"{'' if ok else '  RESULTADO INCORRECTO'}{live}")
+            finally:
+                pool.close()
+                if store is not None:
+                    store.close()
+
+
+def vector_bench(rows: int):
+    """Cadena de nodos Op sobre `rows` filas: bucle por elemento, lotes sin fusionar y lotes fusionados."""
+    import time
+    sys.path.insert(0, _repo_root())
+    import numpy
+    from ui.core.evaluator import Evaluator
+    from ui.core.graph import Graph
+    from ui.core.links import Link
+    from ui.core.nodes import Node, NodeRegistry
+    from ui.core.vectorize import OPS
+    import os
+
+    registry = NodeRegistry()
+    registry.load_manifest(os.path.join(_repo_root(), "ui", "core", "builtin_nodes.json"))
+    # ((((x * y) + x) - y) / y) max x, con x e y entrando desde fuera como en el interior de un grupo
+    steps = [("mul", "y"), ("add", "x"), ("sub", "y"), ("div", "y"), ("max", "x")]
+    graph = Graph()
+    prev = None
+    for i, (op, other) in enumerate(steps):
+        nid = f"op{i}"
+        graph.add_node(Node(id=nid, type="Op", inputs=["a", "b"], outputs=["result"], meta={"op": op}))
+        if prev is not None:
+            graph.add_link(Link(prev, "result", nid, "a"))
+        prev = nid
+    x = numpy.arange(rows, dtype=numpy.float64)
+    y = numpy.full(rows, 3.0)
+    external = {("op0", "a"): x}
+    external.update({(f"op{i}", "b"): (x if other == "x" else y) for i, (_, other) in enumerate(steps)})
+
+    xs, ys = x.tolist(), y.tolist()
+    start = time.perf_counter()
+    expected = []
+    for xv, yv in zip(xs, ys):
+        value = xv
+        for op, other in steps:
+            value = OPS[op][0](value, xv if other == "x" else yv)
+        expected.append(value)
+    loop = time.perf_counter() - start
+    print(f"bucle por elemento: {rows} filas x {len(steps)} ops en {loop:.2f} s")
+
+    for fuse in (False, True):
+        evaluator = Evaluator(graph, registry, fuse=fuse)
+        evaluator.external = external
+        start = time.perf_counter()
+        evaluator.evaluate()
+        elapsed = time.perf_counter() - start
+        result = evaluator.results[prev]["result"]
+        ok = numpy.array_equal(result, numpy.asarray(expected))
+        label = "lotes fusionados  " if fuse else "lotes sin fusionar"
+        print(f"{label}: {elapsed:.3f} s ({loop / elapsed:.0f}x el bucle){'' if ok else '  RESULTADO DISTINTO'}")
+
+
+def _repo_root() -> str:
+    import os
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _broker_address(port: int) -> str:
+    import os
+    import tempfile
+    if hasattr(__import__("socket"), "AF_UNIX"):
+        return "unix:" + os.path.join(tempfile.gettempdir(), f"omega-broker-{port}.sock")
+    return f"tcp:127.0.0.1:{port + 1000}"
+
+
+def start_backend(workers: int, port: int):
+    """Lanza el broker (si hay más de un worker) y uvicorn; devuelve los procesos."""
+    import os
+    import subprocess
+    import time
+    env = dict(os.environ)
+    procs = []
+    if workers > 1:
+        address = _broker_address(port)
+        env["OMEGA_BROKER"] = address
+        procs.append(subprocess.Popen([sys.executable, "-m", "backend.broker", address], cwd=_repo_root(), env=env))
+        time.sleep(0.5)
+    procs.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=_repo_root(), env=env, stdout=subprocess.DEVNULL,
+    ))
+    return procs
+
+
+def _wait_port(port: int, timeout: float = 30.0):
+    import socket
+    import time
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"El backend no respondió en el puerto {port}")
+
+
+def stop_backend(procs):
+    for p in reversed(procs):
+        p.terminate()
+    for p in procs:
+        p.wait(timeout=10)
+
+
+def serve(workers: int, port: int):
+    print(f"Backend en ws://127.0.0.1:{port}/ws con {workers} worker(s)")
+    procs = start_backend(workers, port)
+    try:
+        procs[-1].wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_backend(procs)
+
+
+def _load_client(args):
+    """Un proceso generador: `connections` sockets enviando node_moved y esperando el ack."""
+    import asyncio
+    import json
+    import time
+    import websockets
+
+    url, connections, rooms, seconds = args
+
+    async def one(i, deadline):
+        count = 0
+        async with websockets.connect(f"{url}/ws/load-{i % rooms}", max_size=None) as ws:
+            await ws.recv()  # snapshot inicial
+            await ws.send(json.dumps({"type": "node_created", "payload": {"id": f"n{i}"}}))
+            await ws.recv()
+            while time.perf_counter() < deadline:
+                await ws.send(json.dumps({"type": "node_moved", "payload": {"id": f"n{i}", "pos": [count, i]}}))
+                while json.loads(await ws.recv()).get("type") != "node_move_ack":
+                    pass
+                count += 1
+        return count
+
+    async def run():
+        deadline = time.perf_counter() + seconds
+        return sum(await asyncio.gather(*(one(i, deadline) for i in range(connections))))
+
+    return asyncio.run(run())
+
+
+def loadtest(worker_counts, connections: int, rooms: int, seconds: float, port: int):
+    import multiprocessing
+    import os
+    import time
+    generators = max(1, min(os.cpu_count() or 1, connections))
+    print(f"Carga: {connections} conexiones en {rooms} salas, {seconds}s por prueba, {generators} procesos generadores")
+    for workers in worker_counts:
+        procs = start_backend(workers, port)
+        try:
+            _wait_port(port)
+            # Con varios workers, dar tiempo a que arranquen todos y no solo el primero
+            time.sleep(0.5 * workers)
+            url = f"ws://127.0.0.1:{port}"
+            per = [connections // generators + (1 if g < connections % generators else 0) for g in range(generators)]
+            with multiprocessing.Pool(generators) as pool:
+                counts = pool.map(_load_client, [(url, n, rooms, seconds) for n in per if n])
+            total = sum(counts)
+            print(f"workers={workers}: {total} eventos, {total / seconds:.0f} eventos/s")
+        finally:
+            stop_backend(procs)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Scripts utilitarios para Codermind Visual")
-    parser.add_argument("command", choices=["check", "test"], help="Comando a ejecutar")
+    parser.add_argument("command", choices=["check", "test", "import", "serve", "loadtest", "themes", "diff", "merge", "shm", "vector"], help="Comando a ejecutar")
+    parser.add_argument("paths", nargs="*", help="Carpeta a importar (import); base otro (diff); base nuestro suyo (merge)")
+    parser.add_argument("--out", default=None, help="Proyecto de salida (import: obligatorio; merge: project.json por defecto)")
+    parser.add_argument("--force", action="store_true", help="Reemplazar --out si ya existe (import)")
+    parser.add_argument("--prefer", choices=["ours", "theirs"], default="ours", help="Lado que gana en conflictos (merge)")
+    parser.add_argument("--workers", default=None, help="Procesos (import, serve) o lista para loadtest, p. ej. 1,2,4")
+    parser.add_argument("--port", type=int, default=8000, help="Puerto del backend (serve, loadtest)")
+    parser.add_argument("--connections", type=int, default=64, help="Conexiones simultáneas (loadtest)")
+    parser.add_argument("--rooms", type=int, default=8, help="Salas entre las que se reparten (loadtest)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duración de cada prueba (loadtest)")
+    parser.add_argument("--rounds", type=int, default=500, help="Reconstrucciones de paneles y cambios de tema (themes)")
+    parser.add_argument("--size-mb", type=int, default=1024, help="Tamaño del valor que recorre la cadena (shm)")
+    parser.add_argument("--stages", type=int, default=10, help="Nodos de la cadena (shm)")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Filas de la cadena de nodos Op (vector)")
     args = parser.parse_args()
 
     if args.command == "check":
         check()
     elif args.command == "test":
         test()
+    elif args.command == "import":
+        if args.out is None:
+            parser.error("import necesita --out (no se sobrescribe project.json por defecto)")
+        import_python(args.paths[0] if args.paths else ".", args.out, int(args.workers) if args.workers else None,
+                      force=args.force)
+    elif args.command == "serve":
+        serve(int(args.workers or 1), args.port)
+    elif args.command == "loadtest":
+        counts = [int(w) for w in (args.workers or "1,2,4").split(",")]
+        loadtest(counts, args.connections, args.rooms, args.seconds, args.port + 1)
+    elif args.command == "themes":
+        theme_stats(args.rounds)
+    elif args.command == "diff":
+        if len(args.paths) != 2:
+            parser.error("diff necesita: base otro")
+        diff_projects(*args.paths)
+    elif args.command == "merge":
+        if len(args.paths) != 3:
+            parser.error("merge necesita: base nuestro suyo")
+        merge_projects(*args.paths, args.out or "project.json", args.prefer)
+    elif args.command == "shm":
+        shm_throughput(args.size_mb, args.stages)
+    elif args.command == "vector":
+        vector_bench(args.rows)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+import json
+import threading
+
+from ui.core.autosave import Autosave, recover
+from ui.core.graph import Graph
+from ui.core.history import AddNode, Journal, set_meta
+from ui.core.nodes import Node
+
+
+def _journal(count: int = 0) -> Journal:
+    journal = Journal(Graph())
+    for i in range(count):
+        journal.record(AddNode(Node(f"n{i}", "Data")))
+    return journal
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_recover_after_crash_leaves_project_untouched(tmp_path):
+    project = tmp_path / "project.json"
+    saved = {"nodes": [{"id": "saved", "type": "Data"}], "links": []}
+    _write(project, saved)
+    journal = Journal(Graph.from_snapshot(saved))
+    autosave = Autosave(str(project), batch_interval=60)
+    autosave.start(journal)
+    for i in range(5):
+        journal.record(AddNode(Node(f"n{i}", "Data")))
+        if i == 2:
+            autosave.compact(wait=True)
+    autosave.flush()
+    # Crash: no stop(), no save; the compaction went to the sidecar, the rest is in the WAL
+    assert json.loads(project.read_text(encoding="utf-8")) == saved
+    assert (tmp_path / "project.json.autosave").exists()
+    graph = recover(str(project))
+    assert set(graph.nodes) == {"saved", "n0", "n1", "n2", "n3", "n4"}
+
+
+def test_explicit_save_leaves_nothing_to_recover(tmp_path):
+    project = tmp_path / "project.json"
+    journal = _journal()
+    autosave = Autosave(str(project), batch_interval=60, compact_every=2)
+    autosave.start(journal)
+    for i in range(3):
+        journal.record(AddNode(Node(f"n{i}", "Data")))
+    autosave.flush()
+    autosave.save(journal.graph.snapshot())
+    assert recover(str(project)) is None
+    journal.record(set_meta(journal.graph, "n0", "value", 1))
+    autosave.stop()
+    assert recover(str(project)).nodes["n0"].meta == {"value": 1}
+    assert json.loads(project.read_text(encoding="utf-8"))["nodes"][0]["meta"] == {}
+
+
+def test_recover_replays_only_records_past_wal_seq(tmp_path):
+    project = tmp_path / "project.json"
+    _write(project, {"nodes": [], "links": [], "wal_seq": 1})
+    _write(tmp_path / "project.json.autosave",
+           {"nodes": [{"id": "a", "type": "Data", "meta": {"v": 2}}], "links": [], "wal_seq": 2})
+    records = [
+        {"seq": 1, "op": {"op": "add_node", "node": {"id": "a", "type": "Data"}, "links": []}},
+        {"seq": 2, "op": {"op": "meta", "id": "a", "key": "v", "old": None, "new": 2}},
+        {"seq": 3, "op": {"op": "meta", "id": "a", "key": "w", "old": None, "new": 3}},
+    ]
+    (tmp_path / "project.json.wal").write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+    assert recover(str(project)).nodes["a"].meta == {"v": 2, "w": 3}
+    # A sidecar older than the project predates an explicit save and is ignored
+    _write(project, {"nodes": [{"id": "a", "type": "Data", "meta": {"v": 9}}], "links": [], "wal_seq": 3})
+    assert recover(str(project)) is None
+
+
+def test_compaction_racing_appends_loses_nothing(tmp_path):
+    project = tmp_path / "project.json"
+    journal = _journal()
+    lock = threading.RLock()
+
+    def snapshot():
+        with lock:
+            return journal.graph.snapshot()
+
+    autosave = Autosave(str(project), batch_interval=0.001, compact_every=7)
+    autosave.start(journal, snapshot)
+    stop = threading.Event()
+
+    def compact():
+        while not stop.is_set():
+            autosave.compact(wait=True)
+
+    racer = threading.Thread(target=compact)
+    racer.start()
+    for i in range(500):
+        with lock:
+            journal.record(AddNode(Node(f"n{i}", "Data")))
+    stop.set()
+    racer.join()
+    autosave.stop()
+    graph = recover(str(project))
+    assert set(graph.nodes) == {f"n{i}" for i in range(500)}
+    assert not project.exists()
@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+from backend.pipeline import ReceivePipeline
+
+
+class _Socket:
+    """Frames of one client connection, all sent before the server reads them."""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.sent = []
+
+    async def receive_text(self):
+        if not self.frames:
+            raise ConnectionError("closed")
+        return self.frames.pop(0)
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        pass
+
+
+def test_moves_on_one_connection_coalesce_while_the_handler_is_busy():
+    moves = [json.dumps({"type": "node_moved", "payload": {"id": "a", "pos": [i, 0]}}) for i in range(100)]
+    created = json.dumps({"type": "node_created", "payload": {"id": "b"}})
+    batches = []
+
+    async def handle(events):
+        batches.append(events)
+        # The first batch holds the handler up; the rest of the frames queue behind it
+        await asyncio.sleep(0.01)
+
+    async def run():
+        pipeline = ReceivePipeline(_Socket([*moves, created]), "test")
+        await pipeline.run(handle)
+        return pipeline
+
+    pipeline = asyncio.run(run())
+    handled = [evt for batch in batches for evt in batch]
+    moved = [evt["payload"]["pos"][0] for evt in handled if evt["type"] == "node_moved"]
+    assert moved[-1] == 99
+    assert len(moved) < len(moves)
+    assert [evt["type"] for evt in handled].count("node_created") == 1
+    assert pipeline.stats["coalesced"] == len(moves) - len(moved)
@@ -0,0 +1,26 @@
+import asyncio
+
+from backend.rooms import RoomState, RoomStore
+
+
+def test_join_new_room_when_all_loaded_rooms_have_members(tmp_path):
+    async def run():
+        store = RoomStore(str(tmp_path), max_loaded=2)
+        await store.join("a")
+        await store.join("b")
+        room = await store.join("c")
+        assert room.members == 1
+        assert set(store.loaded()) == {"a", "b", "c"}
+        await store.leave("a")
+        assert set(store.loaded()) == {"b", "c"}
+
+    asyncio.run(run())
+
+
+def test_log_keeps_snapshots_without_their_graph():
+    room = RoomState("p")
+    graph = {"nodes": [{"id": f"n{i}"} for i in range(100)], "links": []}
+    room.apply({"type": "graph_snapshot", "payload": graph})
+    assert room.graph is graph
+    assert list(room.log) == [(1, {"type": "graph_snapshot"})]
+    assert RoomState("p", room.to_state()).log[0] == (1, {"type": "graph_snapshot"})
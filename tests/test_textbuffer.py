@@ -0,0 +1,49 @@
+import random
+
+from ui.core.textbuffer import PieceTable
+
+_ALPHABET = "ab\n\ré"
+
+
+def _line_starts(text: str):
+    return [0] + [i + 1 for i, c in enumerate(text) if c == "\n"]
+
+
+def _check(table: PieceTable, model: str):
+    assert table.text() == model
+    assert len(table) == len(model)
+    starts = _line_starts(model)
+    assert table.line_count() == len(starts)
+    for line, start in enumerate(starts):
+        assert table.line_start(line) == start
+        assert table.line_of(start) == line
+    assert table.line_start(len(starts)) == len(model)
+    assert table.lines(0, len(starts)) == model.split("\n")
+
+
+def test_random_edits_match_str():
+    rng = random.Random(1234)
+    for _ in range(50):
+        model = "".join(rng.choice(_ALPHABET) for _ in range(rng.randrange(0, 40)))
+        table = PieceTable(model)
+        for _ in range(200):
+            offset = rng.randrange(0, len(model) + 1)
+            action = rng.random()
+            if action < 0.5:
+                # Short runs at the previous end exercise the coalesced typing path
+                text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randrange(1, 6)))
+                table.insert(offset, text)
+                model = model[:offset] + text + model[offset:]
+            elif action < 0.8:
+                length = rng.randrange(0, 8)
+                table.delete(offset, length)
+                model = model[:offset] + model[offset + length:]
+            else:
+                length = rng.randrange(0, 8)
+                text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randrange(0, 4)))
+                table.replace(offset, length, text)
+                model = model[:offset] + text + model[offset + length:]
+            _check(table, model)
+        first = rng.randrange(0, table.line_count())
+        count = rng.randrange(1, 5)
+        assert table.lines(first, count) == model.split("\n")[first:first + count]
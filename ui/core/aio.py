@@ -0,0 +1,105 @@
+"""ui.core.aio
+
+Event loop for I/O-bound work in the editor process.
+
+`EventLoop` runs one asyncio loop in a daemon thread. Other threads hand
+it coroutines with `submit` and get a `concurrent.futures.Future` back,
+which the evaluator and the UI scheduler already know how to wait on.
+
+Node types whose implementation is an `async def` run here rather than on
+the frame thread or in a worker process. A node waiting on I/O then costs
+a suspended coroutine instead of a thread, so thousands of them can be in
+flight at once. `run_node` bounds how many nodes of one type run
+together with a semaphore per type (`NodeType.concurrency`), so a graph
+with a thousand HTTP nodes does not open a thousand connections.
+
+Cancelling a returned Future cancels the coroutine at its next `await`.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+AsyncImpl = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+DEFAULT_CONCURRENCY = 64
+
+
+class EventLoop:
+    def __init__(self, name: str = "omega-aio"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Only touched from the loop thread
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {"submitted": 0, "running": 0, "cancelled": 0}
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, started on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._loop, ready),
+                                                name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """Schedule a coroutine on the loop; its result arrives on the returned Future."""
+        self.stats["submitted"] += 1
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run_node(self, type_name: str, impl: AsyncImpl, inputs: Dict[str, Any], meta: Dict[str, Any],
+                 concurrency: int = DEFAULT_CONCURRENCY) -> Future:
+        """Run an async node implementation, at most `concurrency` nodes of its type at a time."""
+        return self.submit(self._limited(type_name, concurrency, impl, inputs, meta))
+
+    async def _limited(self, type_name: str, concurrency: int, impl: AsyncImpl,
+                       inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        sem = self._semaphores.get(type_name)
+        if sem is None:
+            sem = self._semaphores[type_name] = asyncio.Semaphore(max(1, concurrency))
+        try:
+            async with sem:
+                self.stats["running"] += 1
+                try:
+                    return await impl(inputs, meta) or {}
+                finally:
+                    self.stats["running"] -= 1
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+
+    def close(self, timeout: float = 2.0):
+        """Cancel whatever is still running and stop the loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
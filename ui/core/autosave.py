@@ -0,0 +1,346 @@
+"""ui.core.autosave
+
+Crash-safe incremental autosave for Omega-Visual.
+
+Journal ops are appended to `<project>.wal` as JSON lines and fsynced in
+batches, so autosave cost is proportional to the edit. Every
+`compact_every` records the graph is written to the sidecar
+`<project>.autosave` (temp file + atomic rename, on a background thread)
+and the WAL is truncated to the records it does not cover; the snapshot
+remembers the last WAL sequence number it includes (`wal_seq`) so
+recovery only replays the tail.
+
+The project file itself is only written by an explicit `save`, which
+stamps it with `wal_seq` and drops the sidecar and the WAL: whatever sits
+in them is, by construction, unsaved. Recovery starts from whichever of
+project and sidecar covers more of the WAL.
+
+The snapshot is captured on the thread that owns the graph. `compact_steps`
+is a generator so that thread can spread the capture over several frames
+(see `Autosave.start`).
+"""
+import inspect
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+
+from .graph import Graph
+from .history import Journal, Op, op_from_dict
+
+
+def _fsync_dir(path: str):
+    # Persist the rename itself; not supported on Windows
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_snapshot_atomic(path: str, snapshot: Dict):
+    """Write a project snapshot via temp file + fsync + rename."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def _read_wal(wal_path: str) -> List[Tuple[int, Dict]]:
+    records = []
+    try:
+        with open(wal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash: everything after it is lost anyway
+                    break
+                records.append((int(rec["seq"]), rec["op"]))
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _read_snapshot(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _snapshot_seq(path: str) -> int:
+    data = _read_snapshot(path)
+    try:
+        return int(data.get("wal_seq", 0)) if data is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def recover(project_path: str) -> Optional[Graph]:
+    """Rebuild the unsaved graph from the newest snapshot plus the WAL tail.
+
+    Returns None when nothing is unsaved, i.e. the project on disk is
+    already current.
+    """
+    project = _read_snapshot(project_path) or {"nodes": [], "links": []}
+    sidecar = _read_snapshot(f"{project_path}.autosave")
+    # A sidecar older than the project is left over from before an explicit save
+    if sidecar is not None and int(sidecar.get("wal_seq", 0)) > int(project.get("wal_seq", 0)):
+        snapshot = sidecar
+    else:
+        snapshot, sidecar = project, None
+    base_seq = int(snapshot.get("wal_seq", 0))
+    tail = [(seq, op) for seq, op in _read_wal(f"{project_path}.wal") if seq > base_seq]
+    if not tail and sidecar is None:
+        return None
+    graph = Graph.from_snapshot(snapshot)
+    for _, data in tail:
+        try:
+            op_from_dict(data).apply(graph)
+        except Exception as e:
+            print("WAL replay error:", e)
+    return graph
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class Autosave:
+    def __init__(self, project_path: str = "project.json", batch_interval: float = 1.0, compact_every: int = 2000):
+        self.project_path = project_path
+        self.wal_path = f"{project_path}.wal"
+        self.autosave_path = f"{project_path}.autosave"
+        self.batch_interval = batch_interval
+        self.compact_every = compact_every
+        # Guards the in-memory records; appends from the UI thread only ever wait on it briefly
+        self._lock = threading.Lock()
+        # Serializes writes to the WAL file (flush, compaction rewrite), taken before `_lock`
+        self._io_lock = threading.Lock()
+        # Serializes snapshot writes (sidecar, project), taken before `_io_lock`
+        self._snapshot_lock = threading.Lock()
+        self._pending: List[str] = []
+        # Records written since the last completed snapshot, kept to rewrite the WAL after compaction
+        self._tail: List[Tuple[int, str]] = []
+        self._seq = 0
+        # WAL sequence covered by the newest snapshot on disk; older ones are not written over it
+        self._written_seq = 0
+        self._journal: Optional[Journal] = None
+        self._snapshot_fn: Optional[Callable[[], Any]] = None
+        self._schedule: Optional[Callable[[Callable[[], Generator]], None]] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # A compaction is queued, capturing or writing; appends don't start another
+        self._compacting = False
+
+    # --- lifecycle ---
+    def start(self, journal: Journal, snapshot_fn: Optional[Callable[[], Any]] = None,
+              schedule: Optional[Callable[[Callable[[], Generator]], None]] = None):
+        """Start logging `journal`'s ops.
+
+        `snapshot_fn` returns the project snapshot (default: the graph's),
+        either as a dict, copied at once, or as a generator that yields
+        between chunks and returns a dict nothing else mutates; it must
+        read the graph before its first yield, as that is the state the
+        WAL sequence is taken from. `schedule` receives `compact_steps`
+        when a compaction is due, to run it on the graph's thread (e.g.
+        posted to the frame scheduler); without it the capture runs inside
+        the `append` that made it due.
+        """
+        if self._thread is not None:
+            return
+        self._journal = journal
+        self._snapshot_fn = snapshot_fn or journal.graph.snapshot
+        self._schedule = schedule
+        # Sequence numbers must keep growing past the WAL and both snapshots
+        existing = _read_wal(self.wal_path)
+        self._written_seq = max(_snapshot_seq(self.project_path), _snapshot_seq(self.autosave_path))
+        self._seq = max(self._seq, existing[-1][0] if existing else 0, self._written_seq)
+        self._stop.clear()
+        journal.subscribe(self.append)
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        if self._journal is not None:
+            self._journal.unsubscribe(self.append)
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.flush()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    # --- write path ---
+    def append(self, op: Op):
+        with self._lock:
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, "op": op.to_dict()}, separators=(",", ":"))
+            self._pending.append(line)
+            self._tail.append((self._seq, line))
+            due = len(self._tail) >= self.compact_every and not self._compacting
+            if due:
+                self._compacting = True
+        if not due:
+            return
+        if self._schedule is not None:
+            self._schedule(self.compact_steps)
+        else:
+            self._drive(self.compact_steps())
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                lines = self._pending
+                self._pending = []
+            # Written outside `_lock`: appends keep going during the fsync
+            with open(self.wal_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.batch_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print("Autosave flush error:", e)
+
+    def discard(self):
+        """Drop unsaved records and the sidecar, e.g. when the project is reloaded from disk."""
+        with self._snapshot_lock, self._io_lock, self._lock:
+            self._pending = []
+            self._tail = []
+            _remove(self.autosave_path)
+            _remove(self.wal_path)
+
+    # --- explicit save ---
+    def save(self, snapshot: Dict):
+        """Write `snapshot` (the current graph, owned by the caller) as the project.
+
+        It is stamped with the current WAL sequence; the sidecar and the
+        WAL records it covers are dropped, so nothing is recovered over it.
+        """
+        if not self.running:
+            # The sequence is not known without a WAL being written; any leftover one is stale
+            write_snapshot_atomic(self.project_path, snapshot)
+            self.discard()
+            return
+        with self._lock:
+            seq = self._seq
+        snapshot = dict(snapshot, wal_seq=seq)
+        with self._snapshot_lock:
+            write_snapshot_atomic(self.project_path, snapshot)
+            self._written_seq = max(self._written_seq, seq)
+            _remove(self.autosave_path)
+            self._truncate_wal(seq)
+
+    # --- compaction ---
+    def compact_steps(self) -> Generator:
+        """Capture a snapshot (one step per chunk of `snapshot_fn`), then write it in the background."""
+        try:
+            if self._snapshot_fn is None:
+                return
+            with self._lock:
+                snap_seq = self._seq
+            snapshot = yield from self._capture()
+        except BaseException:
+            # Failed or cancelled before the write was handed off
+            with self._lock:
+                self._compacting = False
+            raise
+        threading.Thread(target=self._write_compaction, args=(snapshot, snap_seq),
+                         name="autosave-compact", daemon=True).start()
+
+    def compact(self, wait: bool = False):
+        """Snapshot the graph into the sidecar and truncate the WAL to the records it does not cover.
+
+        The capture runs on the caller's thread. With `wait`, returns once
+        the snapshot is on disk and raises if writing it failed.
+        """
+        if self._snapshot_fn is None:
+            return
+        if not wait:
+            with self._lock:
+                self._compacting = True
+            self._drive(self.compact_steps())
+            return
+        with self._lock:
+            snap_seq = self._seq
+        snapshot = self._drive(self._capture())
+        self._compact_to(snapshot, snap_seq)
+
+    def _capture(self) -> Generator:
+        result = self._snapshot_fn()
+        if inspect.isgenerator(result):
+            snapshot = yield from result
+        else:
+            # Deep copy: the graph's snapshot shares meta dicts with the live nodes
+            snapshot = json.loads(json.dumps(result))
+        return snapshot
+
+    @staticmethod
+    def _drive(steps: Generator):
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def _write_compaction(self, snapshot: Dict, snap_seq: int):
+        try:
+            self._compact_to(snapshot, snap_seq)
+        except Exception as e:
+            print("Autosave compaction error:", e)
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _compact_to(self, snapshot: Dict, snap_seq: int):
+        with self._snapshot_lock:
+            if snap_seq <= self._written_seq:
+                # A newer snapshot (or an explicit save) already covers it
+                return
+            write_snapshot_atomic(self.autosave_path, dict(snapshot, wal_seq=snap_seq))
+            self._written_seq = snap_seq
+            self._truncate_wal(snap_seq)
+
+    def _truncate_wal(self, snap_seq: int):
+        with self._io_lock:
+            with self._lock:
+                self._tail = [(seq, line) for seq, line in self._tail if seq > snap_seq]
+                # Buffered lines are part of the new WAL, not appended on top of it
+                self._pending = []
+                lines = [line for _, line in self._tail]
+            tmp = f"{self.wal_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                if lines:
+                    f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.wal_path)
+        _fsync_dir(self.wal_path)
@@ -0,0 +1,93 @@
+"""ui.core.builtin_nodes
+
+Implementations of the built-in node types declared in builtin_nodes.json.
+"""
+import asyncio
+from typing import Any, Dict, Iterator
+
+from .vectorize import apply
+
+
+def compute(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {"out": inputs.get("in")}
+
+
+def data(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {"out": meta.get("value")}
+
+
+def python(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the node's `meta["code"]`; it reads `inputs` and sets `out` (or a full `outputs` dict)."""
+    scope: Dict[str, Any] = {"inputs": inputs, "meta": meta, "out": None}
+    exec(compile(meta.get("code", ""), "<python node>", "exec"), scope)
+    outputs = scope.get("outputs")
+    return dict(outputs) if isinstance(outputs, dict) else {"out": scope.get("out")}
+
+
+def op(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """`a <meta["op"]> b`, elementwise on arrays and column batches (see `ui.core.vectorize`)."""
+    return {"result": apply(meta.get("op", "add"), inputs.get("a"), inputs.get("b"))}
+
+
+async def command(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the shell command `meta["command"]` with `in` on its stdin; waits without holding a thread."""
+    data = inputs.get("in")
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    proc = await asyncio.create_subprocess_shell(
+        meta["command"], stdin=asyncio.subprocess.PIPE if data is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    try:
+        out, _ = await proc.communicate(data)
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return {"stdout": out, "code": proc.returncode}
+
+
+def file_source(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    with open(meta["path"], "rb") as f:
+        return {"out": f.read()}
+
+
+def file_source_stream(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """The file at `meta["path"]` in chunks of `meta["chunk_size"]` bytes (default 1 MiB)."""
+    size = int(meta.get("chunk_size", 1024 * 1024))
+
+    def chunks() -> Iterator[bytes]:
+        with open(meta["path"], "rb") as f:
+            while True:
+                block = f.read(size)
+                if not block:
+                    return
+                yield block
+    return {"out": chunks()}
+
+
+def _as_bytes(value: Any) -> memoryview:
+    """Bytes to write for a sink input: str as UTF-8, anything with the buffer protocol (bytes, arrays) as is."""
+    if value is None:
+        return memoryview(b"")
+    if isinstance(value, str):
+        return memoryview(value.encode("utf-8"))
+    view = memoryview(value)
+    # Non-contiguous arrays are copied once; the rest are written without a copy
+    return view.cast("B") if view.c_contiguous else memoryview(view.tobytes())
+
+
+def file_sink(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    data = _as_bytes(inputs.get("in"))
+    with open(meta["path"], "wb") as f:
+        f.write(data)
+    return {"written": data.nbytes}
+
+
+def file_sink_stream(inputs: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Write every chunk of `in` to `meta["path"]`; emits the byte count once done."""
+    written = 0
+    with open(meta["path"], "wb") as f:
+        for chunk in inputs.get("in", ()):
+            if chunk is not None:
+                written += f.write(_as_bytes(chunk))
+    return {"written": [written]}
@@ -0,0 +1,176 @@
+"""ui.core.clipboard
+
+Copy/cut/paste of subgraphs for Omega-Visual.
+
+`copy_subgraph` captures a set of nodes, the links between them and, for
+group nodes, their interiors (recursively). The payload carries no ids:
+nodes are referenced by their index in the payload, group ports named
+after interior members ("<member>.<port>") become "#<index>.<port>", and
+positions are relative to the selection's top-left corner. `paste_ops`
+assigns fresh ids through a caller-supplied allocator and returns one
+`Batch`, so a paste of any size is a single journal entry and undo step.
+
+`encode`/`decode` turn a payload into clipboard text: compact JSON,
+zlib-compressed and base64-encoded behind `PREFIX`, so other text on the
+system clipboard is recognised and ignored.
+"""
+import base64
+import binascii
+import copy
+import json
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .graph import Graph
+from .groups import is_group
+from .history import AddLink, AddNode, Batch, RemoveNode
+from .links import Link
+from .nodes import Node
+
+PREFIX = "omega-subgraph:1:"
+
+Payload = Dict
+InteriorFn = Callable[[Node], Optional[Graph]]
+
+
+def _rename(port: str, ids: Dict, fmt: Callable[[object], str]) -> str:
+    member, sep, rest = port.partition(".")
+    if sep and member in ids:
+        return f"{fmt(ids[member])}.{rest}"
+    return port
+
+
+def copy_subgraph(graph: Graph, node_ids: Sequence[str], interior: Optional[InteriorFn] = None,
+                  positions: Optional[Dict[str, Sequence[float]]] = None) -> Payload:
+    """Payload for `node_ids`; links leaving the selection are not copied.
+
+    `interior(group_node)` returns a group's interior graph (for instance
+    `GroupManager.load`); without it groups are copied with an empty interior.
+    `positions` overrides `meta["pos"]` (e.g. positions read from the editor).
+    """
+    nodes = [graph.nodes[nid] for nid in dict.fromkeys(node_ids) if nid in graph.nodes]
+    index = {node.id: i for i, node in enumerate(nodes)}
+    positions = positions or {}
+    placed = {node.id: positions.get(node.id) or node.meta.get("pos") for node in nodes}
+    xs = [pos[0] for pos in placed.values() if pos]
+    ys = [pos[1] for pos in placed.values() if pos]
+    origin = [min(xs), min(ys)] if xs and ys else [0, 0]
+
+    rows = []
+    groups = {}
+    ports: Dict[str, Callable[[str], str]] = {}
+    for i, node in enumerate(nodes):
+        meta = copy.deepcopy(node.meta)
+        pos = placed[node.id]
+        if pos:
+            meta["pos"] = [pos[0] - origin[0], pos[1] - origin[1]]
+        inputs, outputs = list(node.inputs), list(node.outputs)
+        if is_group(node):
+            inner = (interior(node) if interior is not None else None) or Graph()
+            groups[str(i)] = copy_subgraph(inner, list(inner.nodes), interior)
+            members = {nid: j for j, nid in enumerate(inner.nodes)}
+            rename = lambda p, m=members: _rename(p, m, lambda j: f"#{j}")
+            info = meta.get("group", {})
+            info.pop("file", None)
+            info.pop("hash", None)
+            info["members"] = []
+            info["ports"] = {
+                side: {rename(name): [f"#{members[t[0]]}" if t[0] in members else t[0], t[1]]
+                       for name, t in info.get("ports", {}).get(side, {}).items()}
+                for side in ("in", "out")
+            }
+            inputs, outputs = [rename(p) for p in inputs], [rename(p) for p in outputs]
+            ports[node.id] = rename
+        rows.append([node.type, node.title, inputs, outputs, meta])
+
+    links = []
+    same = lambda p: p
+    for node in nodes:
+        for link in graph.links_of(node.id):
+            # Each internal link is seen from both ends; keep it once, from its source
+            if link.start_node == node.id and link.end_node in index:
+                links.append([index[link.start_node], ports.get(link.start_node, same)(link.start_port),
+                              index[link.end_node], ports.get(link.end_node, same)(link.end_port)])
+    return {"origin": origin, "nodes": rows, "links": links, "groups": groups}
+
+
+def encode(payload: Payload) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return PREFIX + base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+
+
+def decode(text: Optional[str]) -> Optional[Payload]:
+    """Payload from clipboard text, or None if the text is not a (valid) subgraph."""
+    if not text or not text.startswith(PREFIX):
+        return None
+    try:
+        payload = json.loads(zlib.decompress(base64.b64decode(text[len(PREFIX):], validate=True)))
+    except (ValueError, binascii.Error, zlib.error):
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get("nodes"), list):
+        return None
+    return payload
+
+
+def _build(payload: Payload, new_id: Callable[[], str], offset: Tuple[float, float],
+           interiors: Dict[str, Graph]) -> Tuple[List[Node], List[Link]]:
+    rows = payload.get("nodes", [])
+    ids = [new_id() for _ in rows]
+    nodes: List[Node] = []
+    ports: Dict[int, Callable[[str], str]] = {}
+    for i, (type_name, title, inputs, outputs, meta) in enumerate(rows):
+        meta = copy.deepcopy(meta)
+        if meta.get("pos"):
+            meta["pos"] = [meta["pos"][0] + offset[0], meta["pos"][1] + offset[1]]
+        sub = payload.get("groups", {}).get(str(i))
+        if sub is not None:
+            # The interior gets fresh ids too, so ungrouping the copy never collides with the original
+            inner_nodes, inner_links = _build(sub, new_id, (0, 0), interiors)
+            inner = Graph()
+            for node in inner_nodes:
+                inner.add_node(node)
+            for link in inner_links:
+                inner.add_link(link)
+            interiors[ids[i]] = inner
+            members = {f"#{j}": node.id for j, node in enumerate(inner_nodes)}
+            rename = lambda p, m=members: _rename(p, m, str)
+            info = meta.setdefault("group", {})
+            info["file"] = f"{ids[i]}.json"
+            info["hash"] = inner.structural_hash()
+            info["members"] = [node.id for node in inner_nodes]
+            info["ports"] = {
+                side: {rename(name): [members.get(t[0], t[0]), t[1]]
+                       for name, t in info.get("ports", {}).get(side, {}).items()}
+                for side in ("in", "out")
+            }
+            inputs, outputs = [rename(p) for p in inputs], [rename(p) for p in outputs]
+            ports[i] = rename
+        nodes.append(Node(id=ids[i], type=type_name, title=title, inputs=list(inputs), outputs=list(outputs), meta=meta))
+
+    same = lambda p: p
+    links: List[Link] = []
+    for s, sp, e, ep in payload.get("links", []):
+        if 0 <= s < len(ids) and 0 <= e < len(ids):
+            links.append(Link(ids[s], ports.get(s, same)(sp), ids[e], ports.get(e, same)(ep)))
+    return nodes, links
+
+
+def paste_ops(payload: Payload, new_id: Callable[[], str], at: Optional[Tuple[float, float]] = None
+              ) -> Tuple[Batch, List[str], Dict[str, Graph]]:
+    """Journal batch inserting `payload`; returns (batch, new top-level ids, group interiors by new id).
+
+    `at` is the new top-left corner (default: where the copy came from).
+    Interiors must be registered with the group manager before the batch is
+    recorded, as `GroupManager.group_ops` does for new groups.
+    """
+    interiors: Dict[str, Graph] = {}
+    offset = tuple(at) if at is not None else tuple(payload.get("origin") or (0, 0))
+    nodes, links = _build(payload, new_id, offset, interiors)
+    ops = [AddNode(node) for node in nodes]
+    ops += [AddLink(link) for link in links]
+    return Batch(ops), [node.id for node in nodes], interiors
+
+
+def cut_ops(graph: Graph, node_ids: Sequence[str]) -> Batch:
+    """Removal half of a cut; the copy is taken separately with `copy_subgraph`."""
+    return Batch([RemoveNode(nid) for nid in dict.fromkeys(node_ids) if nid in graph.nodes])
@@ -0,0 +1,224 @@
+"""ui.core.diff
+
+Graph diff and three-way merge for Omega-Visual projects.
+
+Nodes are matched by id. Among the nodes left unmatched, one that vanished
+under one id and appeared under another with the same content
+(`node_hash`) is reported as renamed. Links are compared as sets of
+`link_key`. Only dict and set lookups are involved, so diffing or merging
+two 100k-node graphs stays linear in their size.
+
+`merge_graphs` works field by field (type, title, ports, each meta key,
+position): a field changed on one side only takes that change, a field
+changed identically on both sides is taken once, and anything else is a
+`Conflict`, resolved in favour of `prefer` and reported. Position
+conflicts are resolved the same way but not reported, since they only
+affect layout.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set
+
+from .graph import LAYOUT_META_KEYS, Graph, LinkKey, link_key, node_hash
+from .links import Link
+from .nodes import Node
+
+_MISSING = object()
+_META = "meta:"
+
+
+def load_graph(path: str) -> Graph:
+    """Graph stored in a project file; a missing file is an empty graph."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return Graph.from_snapshot(json.load(f))
+    except FileNotFoundError:
+        return Graph()
+
+
+def node_fields(node: Node) -> Dict[str, Any]:
+    """Mergeable fields of a node; positions are kept apart under "pos"."""
+    fields = {"type": node.type, "title": node.title, "inputs": list(node.inputs), "outputs": list(node.outputs)}
+    for key, value in node.meta.items():
+        if key not in LAYOUT_META_KEYS:
+            fields[_META + key] = value
+    if node.meta.get("pos") is not None:
+        fields["pos"] = list(node.meta["pos"])
+    return fields
+
+
+def _node_from_fields(node_id: str, fields: Dict[str, Any]) -> Node:
+    meta = {key[len(_META):]: value for key, value in fields.items() if key.startswith(_META)}
+    if "pos" in fields:
+        meta["pos"] = fields["pos"]
+    return Node(id=node_id, type=fields.get("type", "Compute"), title=fields.get("title"),
+                inputs=list(fields.get("inputs", [])), outputs=list(fields.get("outputs", [])), meta=meta)
+
+
+def _content(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in fields.items() if k != "pos"}
+
+
+def _same(a: Node, b: Node) -> bool:
+    # Cheap check first: most nodes are untouched between two versions
+    return (a.type, a.title, a.inputs, a.outputs, a.meta) == (b.type, b.title, b.inputs, b.outputs, b.meta)
+
+
+def _copy_node(node: Node) -> Node:
+    return Node(id=node.id, type=node.type, title=node.title, inputs=list(node.inputs),
+                outputs=list(node.outputs), meta=dict(node.meta))
+
+
+@dataclass
+class GraphDiff:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    moved: List[str] = field(default_factory=list)
+    relinked: List[str] = field(default_factory=list)
+    renamed: Dict[str, str] = field(default_factory=dict)  # old id -> new id
+    links_added: List[LinkKey] = field(default_factory=list)
+    links_removed: List[LinkKey] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.moved or self.renamed
+                    or self.links_added or self.links_removed)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added), "removed": len(self.removed), "changed": len(self.changed),
+            "moved": len(self.moved), "relinked": len(self.relinked), "renamed": len(self.renamed),
+            "links_added": len(self.links_added), "links_removed": len(self.links_removed),
+        }
+
+
+def _link_keys(graph: Graph) -> Set[LinkKey]:
+    return {link_key(link) for link in graph.links}
+
+
+def diff_graphs(base: Graph, other: Graph) -> GraphDiff:
+    """What changed going from `base` to `other`."""
+    d = GraphDiff()
+    for nid, node in other.nodes.items():
+        old = base.nodes.get(nid)
+        if old is None:
+            d.added.append(nid)
+            continue
+        if node is old or _same(node, old):
+            continue
+        if _content(node_fields(node)) != _content(node_fields(old)):
+            d.changed.append(nid)
+        if node.meta.get("pos") != old.meta.get("pos"):
+            d.moved.append(nid)
+    d.removed = [nid for nid in base.nodes if nid not in other.nodes]
+
+    # Renames: pair unmatched nodes whose content hash is unique on both sides
+    if d.added and d.removed:
+        gone: Dict[str, List[str]] = {}
+        for nid in d.removed:
+            gone.setdefault(node_hash(base.nodes[nid]), []).append(nid)
+        new: Dict[str, List[str]] = {}
+        for nid in d.added:
+            new.setdefault(node_hash(other.nodes[nid]), []).append(nid)
+        for h, olds in gone.items():
+            news = new.get(h)
+            if len(olds) == 1 and news is not None and len(news) == 1:
+                d.renamed[olds[0]] = news[0]
+        if d.renamed:
+            paired = set(d.renamed.values())
+            d.added = [nid for nid in d.added if nid not in paired]
+            d.removed = [nid for nid in d.removed if nid not in d.renamed]
+
+    before, after = _link_keys(base), _link_keys(other)
+    d.links_added = sorted(after - before)
+    d.links_removed = sorted(before - after)
+    touched = dict.fromkeys(n for key in d.links_added + d.links_removed for n in (key[0], key[2]))
+    d.relinked = [nid for nid in touched if nid in base.nodes and nid in other.nodes]
+    return d
+
+
+@dataclass
+class Conflict:
+    node: str
+    field: str  # a node field, "node" (edited on one side, removed or added differently on the other) or "link"
+    ours: Any = None
+    theirs: Any = None
+
+
+@dataclass
+class MergeResult:
+    graph: Graph
+    conflicts: List[Conflict] = field(default_factory=list)
+
+    @property
+    def clean(self) -> bool:
+        return not self.conflicts
+
+
+def _merge_fields(nid: str, base: Dict[str, Any], ours: Dict[str, Any], theirs: Dict[str, Any],
+                  prefer: str, conflicts: List[Conflict]) -> Dict[str, Any]:
+    merged = {}
+    for key in dict.fromkeys(list(base) + list(ours) + list(theirs)):
+        b, o, t = base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING)
+        if o == t or t == b:
+            value = o
+        elif o == b:
+            value = t
+        else:
+            value = o if prefer == "ours" else t
+            if key != "pos":
+                conflicts.append(Conflict(nid, key, None if o is _MISSING else o, None if t is _MISSING else t))
+        if value is not _MISSING:
+            merged[key] = value
+    return merged
+
+
+def merge_graphs(base: Graph, ours: Graph, theirs: Graph, prefer: str = "ours") -> MergeResult:
+    """Three-way merge of two edited copies of `base`; conflicts resolve to `prefer` ("ours"/"theirs")."""
+    result = Graph()
+    conflicts: List[Conflict] = []
+    for nid in dict.fromkeys(list(base.nodes) + list(ours.nodes) + list(theirs.nodes)):
+        b, o, t = base.nodes.get(nid), ours.nodes.get(nid), theirs.nodes.get(nid)
+        if o is not None and t is not None:
+            if _same(o, t):
+                result.add_node(_copy_node(o))
+                continue
+            if b is not None and _same(t, b):
+                result.add_node(_copy_node(o))
+                continue
+            if b is not None and _same(o, b):
+                result.add_node(_copy_node(t))
+                continue
+        bf = node_fields(b) if b is not None else {}
+        of = node_fields(o) if o is not None else None
+        tf = node_fields(t) if t is not None else None
+        if of is None and tf is None:
+            continue
+        if of is None or tf is None:
+            kept = of if of is not None else tf
+            if b is None:
+                merged = kept  # added on one side only
+            elif _content(kept) == _content(bf):
+                continue  # removed on one side, untouched on the other
+            else:
+                conflicts.append(Conflict(nid, "node", of, tf))
+                merged = (of if prefer == "ours" else tf)
+                if merged is None:
+                    continue
+        elif b is None and _content(of) != _content(tf):
+            # Same id added on both sides with different content
+            conflicts.append(Conflict(nid, "node", of, tf))
+            merged = of if prefer == "ours" else tf
+        else:
+            merged = _merge_fields(nid, bf, of, tf, prefer, conflicts)
+        result.add_node(_node_from_fields(nid, merged))
+
+    # A link survives unless one side removed it; links added on either side are kept
+    b, o, t = _link_keys(base), _link_keys(ours), _link_keys(theirs)
+    for key in sorted((o & t) | (o - b) | (t - b)):
+        if key[0] in result.nodes and key[2] in result.nodes:
+            result.add_link(Link(*key))
+        else:
+            conflicts.append(Conflict(key[0] if key[0] not in result.nodes else key[2], "link",
+                                      list(key) if key in o else None, list(key) if key in t else None))
+    return MergeResult(result, conflicts)
@@ -0,0 +1,480 @@
+"""ui.core.evaluator
+
+Incremental graph evaluation for Omega-Visual.
+
+Nodes are evaluated in topological order with their registered
+implementation. Results are kept per node; edits reported by the journal
+only mark the edited node's downstream cone dirty, so the next run
+re-evaluates just that cone. Group nodes are evaluated as a unit by a
+nested evaluator over their interior, which is only loaded when dirty.
+
+Node types marked `isolated` run in a `WorkerPool` process. `evaluate_steps`
+yields while such a node is running, so the UI can drive an evaluation
+from its frame scheduler instead of blocking on it.
+
+With a `ResultCache`, each node's result is keyed by its type, version,
+meta and the keys of its inputs (`self.keys`); a node whose key is cached
+is not run at all, so reopening a project or re-running an unchanged
+pipeline reads results back instead of recomputing them.
+
+Trees of dirty `Op` nodes fed with arrays or column batches run fused,
+as one vectorized expression (`ui.core.vectorize`). Only the tree's root
+stores a result; the other members are computed on demand if anything
+reads them later.
+
+Node types with an `async def` implementation run on an `EventLoop`
+(`ui.core.aio`). `evaluate_steps` starts them without waiting and only
+waits for one when a node reading its outputs comes up, so independent
+I/O-bound nodes are all in flight together. Editing a node cancels the
+async nodes running in its downstream cone; they stay dirty.
+
+With a `Telemetry` channel, every stored output is also published as the
+variable "<node>.<port>" for the realtime variables panel.
+
+File-bound node types (manifest key `file`) are keyed by the content hash
+of their file from `FileBindings` (`ui.core.filewatch`): a file changed
+back to contents seen before is read from the cache, not from disk.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, wait
+from typing import Any, Dict, Generator, Iterable, List, Optional, Set, Tuple
+
+from .aio import DEFAULT_CONCURRENCY, EventLoop
+from .filewatch import FileBindings
+from .graph import Graph
+from .groups import GroupManager, is_group
+from .history import AddLink, AddNode, Batch, Journal, Op, RemoveLink, RemoveNode, SetMeta
+from .nodes import Node, NodeRegistry
+from .result_cache import ResultCache, result_key, value_key
+from .telemetry import Telemetry
+from .vectorize import OP_ENTRY, is_batch, plan_fusion, run_fused
+from .workers import WorkerPool
+
+
+class Evaluator:
+    def __init__(self, graph: Graph, registry: NodeRegistry, groups: Optional[GroupManager] = None,
+                 pool: Optional[WorkerPool] = None, cache: Optional[ResultCache] = None, fuse: bool = True,
+                 loop: Optional[EventLoop] = None, telemetry: Optional[Telemetry] = None,
+                 files: Optional[FileBindings] = None):
+        self.graph = graph
+        self.registry = registry
+        self.groups = groups
+        self.pool = pool
+        self.loop = loop
+        self.telemetry = telemetry
+        # Content hashes of the files read by file-bound node types
+        self.files = files
+        self.cache = cache
+        self.fuse = fuse
+        self.results: Dict[str, Dict[str, Any]] = {}
+        # Result cache key of each node's current outputs
+        self.keys: Dict[str, str] = {}
+        # Fused members whose result was never materialized
+        self._lazy: Set[str] = set()
+        self.last_run = {"computed": 0, "cached": 0, "fused": 0}
+        self.errors: Dict[str, str] = {}
+        # Values for interior ports fed from outside a group: {(node, port): value}
+        self.external: Dict[Tuple[str, str], Any] = {}
+        self._dirty: Set[str] = set(graph.nodes)
+        self._group_evaluators: Dict[str, "Evaluator"] = {}
+        # Async nodes started by the current run: {node: (future, cache key, start time)}
+        self._inflight: Dict[str, Tuple[Future, Optional[str], float]] = {}
+
+    # --- dirty tracking ---
+    def attach(self, journal: Journal):
+        journal.subscribe(self._on_op)
+
+    def _on_op(self, op: Op):
+        if isinstance(op, Batch):
+            for sub in op.ops:
+                self._on_op(sub)
+        elif isinstance(op, AddNode):
+            self.mark_dirty(op.node.id)
+        elif isinstance(op, RemoveNode):
+            self.results.pop(op.node_id, None)
+            self.errors.pop(op.node_id, None)
+            self.keys.pop(op.node_id, None)
+            self._lazy.discard(op.node_id)
+            self._dirty.discard(op.node_id)
+            self._group_evaluators.pop(op.node_id, None)
+            for link in op.links:
+                if link.end_node != op.node_id:
+                    self.mark_dirty(link.end_node)
+        elif isinstance(op, (AddLink, RemoveLink)):
+            self.mark_dirty(op.link.end_node)
+        elif isinstance(op, SetMeta):
+            self.mark_dirty(op.node_id)
+
+    def downstream(self, node_ids: Iterable[str]) -> Set[str]:
+        """The given nodes plus every node reachable through their outputs."""
+        seen: Set[str] = set()
+        queue = deque(n for n in node_ids if n in self.graph.nodes)
+        while queue:
+            nid = queue.popleft()
+            if nid in seen:
+                continue
+            seen.add(nid)
+            for link in self.graph.links_of(nid):
+                if link.start_node == nid and link.end_node not in seen:
+                    queue.append(link.end_node)
+        return seen
+
+    def mark_dirty(self, *node_ids: str):
+        cone = self.downstream(node_ids)
+        self._dirty |= cone
+        for nid in cone & self._inflight.keys():
+            # Its inputs or meta changed under it: the result would be stale
+            self._inflight[nid][0].cancel()
+        if self.groups is not None:
+            for nid in cone:
+                if is_group(self.graph.nodes.get(nid)):
+                    self.groups.mark_dirty(nid)
+
+    def mark_all_dirty(self):
+        self.mark_dirty(*self.graph.nodes)
+
+    @property
+    def dirty(self) -> Set[str]:
+        return set(self._dirty)
+
+    # --- evaluation ---
+    def _topological(self, subset: Set[str]) -> List[str]:
+        indegree = {nid: 0 for nid in subset}
+        for nid in subset:
+            for link in self.graph.links_of(nid):
+                if link.end_node == nid and link.start_node in subset and link.start_node != nid:
+                    indegree[nid] += 1
+        ready = deque(sorted(n for n, d in indegree.items() if d == 0))
+        order: List[str] = []
+        while ready:
+            nid = ready.popleft()
+            order.append(nid)
+            for link in self.graph.links_of(nid):
+                if link.start_node == nid and link.end_node in indegree and link.end_node != nid:
+                    indegree[link.end_node] -= 1
+                    if indegree[link.end_node] == 0:
+                        ready.append(link.end_node)
+        for nid in subset:
+            if nid not in order:
+                self.errors[nid] = "cycle"
+        return order
+
+    def topological_order(self, subset: Set[str]) -> List[str]:
+        """`subset` in dependency order; nodes on a cycle are left out and get a "cycle" error."""
+        return self._topological(subset)
+
+    def inputs_for(self, node: Node) -> Dict[str, Any]:
+        inputs: Dict[str, Any] = {}
+        for port in node.inputs:
+            key = (node.id, port)
+            if key in self.external:
+                inputs[port] = self.external[key]
+        for link in self.graph.links_of(node.id):
+            if link.end_node == node.id:
+                inputs[link.end_port] = self.outputs_of(link.start_node).get(link.start_port)
+        return inputs
+
+    def outputs_of(self, node_id: str) -> Dict[str, Any]:
+        """A node's current outputs, computing a fused member's on first use."""
+        outputs = self.results.get(node_id)
+        if outputs is None and node_id in self._lazy:
+            self._lazy.discard(node_id)
+            node = self.graph.nodes.get(node_id)
+            if node is not None:
+                outputs = self.results[node_id] = self.run_node(node, self.inputs_for(node))
+        return outputs or {}
+
+    def result_key_for(self, node: Node) -> Optional[str]:
+        """Cache key of the outputs `node` would compute now, or None if they cannot be cached.
+
+        An input fed by a node without a key (a group, an impure type) is
+        keyed by hashing its value instead. A file-bound type is keyed by the
+        content hash of its file too (as already known to `files`; see
+        `_step`), and is not cached without it.
+        """
+        if self.cache is None or is_group(node):
+            return None
+        nt = self.registry.get(node.type)
+        if nt is None or not nt.cached:
+            return None
+        inputs: List[Tuple[str, str]] = []
+        if nt.file:
+            digest = self.files.hash_of(node) if self.files is not None else None
+            if digest is None:
+                return None
+            inputs.append(("@file", digest))
+        for port in node.inputs:
+            if (node.id, port) in self.external:
+                key = value_key(self.external[(node.id, port)])
+                if key is None:
+                    return None
+                inputs.append((port, key))
+        for link in self.graph.links_of(node.id):
+            if link.end_node != node.id:
+                continue
+            upstream = self.keys.get(link.start_node)
+            if upstream is not None:
+                key = f"{upstream}:{link.start_port}"
+            elif link.start_node in self.results or link.start_node in self._lazy:
+                key = value_key(self.outputs_of(link.start_node).get(link.start_port))
+            else:
+                key = None
+            if key is None:
+                return None
+            inputs.append((link.end_port, key))
+        return result_key(nt.name, nt.version, nt.entry, node.meta, inputs)
+
+    def run_node(self, node: Node, inputs: Dict[str, Any]):
+        """Compute one node's outputs; the single place evaluation strategies hook into.
+
+        Isolated node types return a Future from the worker pool instead, and
+        async ones a Future from the event loop (or block on a private loop
+        when the evaluator has none).
+        """
+        if is_group(node):
+            return self._run_group(node, inputs)
+        nt = self.registry.get(node.type)
+        meta = self.meta_for(node)
+        if nt is not None and nt.isolated:
+            if self.pool is None:
+                raise RuntimeError(f"{node.type} runs in a worker process and no pool is configured")
+            return self.pool.submit(nt.entry, inputs, meta, search_path=nt.search_path)
+        impl = nt.implementation() if nt else None
+        if impl is None:
+            return {}
+        if nt.is_async:
+            if self.loop is None:
+                return asyncio.run(impl(inputs, meta)) or {}
+            return self.loop.run_node(nt.name, impl, inputs, meta, nt.concurrency or DEFAULT_CONCURRENCY)
+        return impl(inputs, meta) or {}
+
+    def meta_for(self, node: Node) -> Dict[str, Any]:
+        """The meta `node`'s implementation receives: a copy, with a file-bound type's path made absolute.
+
+        The path is resolved by `files`, the same one that is watched and
+        hashed, so the implementation never depends on the working directory.
+        """
+        meta = dict(node.meta)
+        nt = self.registry.get(node.type)
+        if nt is not None and nt.file and self.files is not None:
+            path = self.files.resolve(node)
+            if path is not None:
+                meta[nt.file] = path
+        return meta
+
+    def _is_async(self, node: Node) -> bool:
+        nt = self.registry.get(node.type)
+        return nt is not None and not nt.isolated and not is_group(node) and nt.is_async
+
+    def _run_group(self, node: Node, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        if self.groups is None:
+            return {}
+        sub = self._group_evaluators.get(node.id)
+        interior = self.groups.interior_for_evaluation(node, force=sub is None)
+        ports = node.meta.get("group", {}).get("ports", {})
+        if interior is not None:
+            if sub is None or sub.graph is not interior:
+                sub = Evaluator(interior, self.registry, self.groups, self.pool, self.cache, self.fuse, self.loop,
+                                self.telemetry, self.files)
+                self._group_evaluators[node.id] = sub
+            sub.external = {tuple(ports.get("in", {})[p]): v for p, v in inputs.items() if p in ports.get("in", {})}
+            sub.mark_all_dirty()
+            sub.evaluate()
+        elif node.id in self.results:
+            return self.results[node.id]
+        return {p: sub.outputs_of(n).get(port) for p, (n, port) in ports.get("out", {}).items()}
+
+    def evaluate(self) -> Dict[str, Dict[str, Any]]:
+        """Re-evaluate the dirty nodes; returns the outputs that were recomputed."""
+        steps = self.evaluate_steps()
+        while True:
+            try:
+                pending = next(steps)
+            except StopIteration as stop:
+                return stop.value
+            wait([pending])
+
+    def evaluate_steps(self) -> Generator[Future, None, Dict[str, Dict[str, Any]]]:
+        """`evaluate` as a generator that yields the Future of each isolated or async node while it runs.
+
+        Nodes edited meanwhile stay dirty for the next run; closing the
+        generator early cancels the async nodes still running and leaves
+        them, and the nodes it did not reach, dirty as well.
+        """
+        pending, self._dirty = self._dirty, set()
+        order = self._topological(pending)
+        plans = plan_fusion(self.graph, order, self._fusable) if self.fuse else {}
+        deferred = {nid for members in plans.values() for nid in members}
+        updated: Dict[str, Dict[str, Any]] = {}
+        self.last_run = {"computed": 0, "cached": 0, "fused": 0}
+        done = 0
+        self._inflight = {}
+        try:
+            for nid in order:
+                node = self.graph.nodes.get(nid)
+                if node is not None and self._inflight:
+                    # Async nodes run side by side; wait only for the ones this node reads
+                    reads = self._upstream([nid] + plans.get(nid, []))
+                    yield from self._collect(reads & self._inflight.keys(), updated)
+                if node is None or nid in self._dirty:
+                    # Gone, or edited since the run started (e.g. an upstream was cancelled): next run
+                    pass
+                elif nid in deferred:
+                    self._defer(node)
+                elif nid in plans and self._run_fused(node, plans[nid], updated):
+                    pass
+                else:
+                    for member in plans.get(nid, ()):
+                        # Scalar inputs: the tree runs node by node after all
+                        if member in self._lazy:
+                            yield from self._step(self.graph.nodes[member], updated)
+                    yield from self._step(node, updated)
+                done += 1
+            yield from self._collect(list(self._inflight), updated)
+        finally:
+            for nid, (future, _, _) in self._inflight.items():
+                future.cancel()
+                self._dirty.add(nid)
+            self._inflight = {}
+            self._dirty.update(order[done:])
+        return updated
+
+    def _upstream(self, node_ids: Iterable[str]) -> Set[str]:
+        return {link.start_node for nid in node_ids for link in self.graph.links_of(nid) if link.end_node == nid}
+
+    def _collect(self, node_ids: Iterable[str], updated: Dict[str, Dict[str, Any]]) -> Generator[Future, None, None]:
+        """Wait for async nodes started by `_step` and store their outputs."""
+        for nid in sorted(node_ids):
+            future, key, started = self._inflight[nid]
+            while not future.done():
+                yield future
+            del self._inflight[nid]
+            if future.cancelled():
+                # Cancelled by an edit (mark_dirty): the node is dirty again
+                continue
+            try:
+                self._computed(nid, future.result(), key, started, updated)
+            except Exception as e:
+                self._fail(nid, e)
+
+    def _step(self, node: Node, updated: Dict[str, Dict[str, Any]]) -> Generator[Future, None, None]:
+        nid = node.id
+        self._lazy.discard(nid)
+        # The file of a file-bound node is hashed off this thread; its key waits for the digest
+        digest = self.files.request_hash(node) if self.files is not None else None
+        while digest is not None and not digest.done():
+            yield digest
+        try:
+            key = self.result_key_for(node)
+            hit, outputs = self.cache.get(key) if key is not None else (False, None)
+            if hit:
+                self.last_run["cached"] += 1
+                self._store(nid, outputs, key)
+                updated[nid] = outputs
+                return
+            started = time.perf_counter()
+            outputs = self.run_node(node, self.inputs_for(node))
+            if isinstance(outputs, Future):
+                if self._is_async(node):
+                    self._inflight[nid] = (outputs, key, started)
+                    return
+                while not outputs.done():
+                    yield outputs
+                outputs = outputs.result()
+            self._computed(nid, outputs, key, started, updated)
+        except CancelledError:
+            self._dirty.add(nid)
+        except Exception as e:
+            self._fail(nid, e)
+
+    def _computed(self, nid: str, outputs: Dict[str, Any], key: Optional[str], started: float,
+                  updated: Dict[str, Dict[str, Any]]):
+        self.last_run["computed"] += 1
+        if key is not None and self.cache.worth_storing(time.perf_counter() - started):
+            self.cache.put(key, outputs)
+        self._store(nid, outputs, key)
+        updated[nid] = outputs
+
+    def _fail(self, nid: str, error: Exception):
+        self.results.pop(nid, None)
+        self.keys.pop(nid, None)
+        self.errors[nid] = str(error)
+
+    def _store(self, nid: str, outputs: Dict[str, Any], key: Optional[str]):
+        self.results[nid] = outputs
+        self.errors.pop(nid, None)
+        if self.telemetry is not None:
+            self.telemetry.publish_outputs(nid, outputs)
+        if key is not None:
+            self.keys[nid] = key
+        else:
+            self.keys.pop(nid, None)
+
+    # --- fusion ---
+    def _fusable(self, node: Node) -> bool:
+        nt = self.registry.get(node.type)
+        return nt is not None and nt.entry == OP_ENTRY and not is_group(node)
+
+    def _defer(self, node: Node):
+        """Leave a fused member's result to its root; its key still chains downstream."""
+        self.results.pop(node.id, None)
+        self.errors.pop(node.id, None)
+        key = self.result_key_for(node)
+        if key is not None:
+            self.keys[node.id] = key
+        else:
+            self.keys.pop(node.id, None)
+        self._lazy.add(node.id)
+
+    def _expression(self, node: Node, members: Set[str], leaves: List[Any]):
+        feeding = {link.end_port: link for link in self.graph.links_of(node.id) if link.end_node == node.id}
+        operands = []
+        for port in (list(node.inputs) + [None, None])[:2]:
+            link = feeding.get(port)
+            if link is not None and link.start_node in members:
+                operands.append(self._expression(self.graph.nodes[link.start_node], members, leaves))
+                continue
+            # Same sources as inputs_for, without materializing the members
+            if link is not None:
+                leaves.append(self.outputs_of(link.start_node).get(link.start_port))
+            else:
+                leaves.append(self.external.get((node.id, port)))
+            operands.append(("leaf", len(leaves) - 1))
+        return ("op", node.meta.get("op", "add"), operands[0], operands[1])
+
+    def _run_fused(self, root: Node, members: List[str], updated: Dict[str, Dict[str, Any]]) -> bool:
+        """Run a fused tree as one expression; False if its inputs are not batches."""
+        key = self.result_key_for(root)
+        if key is not None:
+            hit, outputs = self.cache.get(key)
+            if hit:
+                self.last_run["cached"] += 1
+                self._store(root.id, outputs, key)
+                updated[root.id] = outputs
+                return True
+        leaves: List[Any] = []
+        try:
+            expr = self._expression(root, set(members), leaves)
+        except Exception as e:
+            self.results.pop(root.id, None)
+            self.keys.pop(root.id, None)
+            self.errors[root.id] = str(e)
+            return True
+        if not any(is_batch(v) for v in leaves):
+            return False
+        try:
+            started = time.perf_counter()
+            outputs = {(root.outputs[0] if root.outputs else "result"): run_fused(expr, leaves)}
+            self.last_run["computed"] += 1
+            self.last_run["fused"] += len(members)
+            if key is not None and self.cache.worth_storing(time.perf_counter() - started):
+                self.cache.put(key, outputs)
+            self._store(root.id, outputs, key)
+            updated[root.id] = outputs
+        except Exception as e:
+            self.results.pop(root.id, None)
+            self.keys.pop(root.id, None)
+            self.errors[root.id] = str(e)
+        return True
@@ -0,0 +1,340 @@
+"""ui.core.filewatch
+
+Workspace file watching and file-bound nodes.
+
+`FileWatcher` is the one watcher of the editor: a thread running
+`watchfiles` over the workspace root (and the directory of any tracked
+file outside it). watchfiles debounces bursts of events; the watcher
+coalesces each burst into one set of (kind, path) changes, kind being
+"added", "modified" or "deleted", and hands it to every subscriber.
+Without watchfiles installed it falls back to polling the mtimes of the
+tracked files.
+
+`FileBindings` ties nodes to the files they read. A node type declares
+the meta key holding its path with the manifest key `file` (FileSource:
+`"file": "path"`). For every bound file the bindings keep its stat
+signature (mtime, size) and a content hash:
+
+- a change event whose stat signature is unchanged is dropped without
+  reading the file;
+- otherwise the file is hashed on the watcher thread; if the hash is the
+  one already known (a touch, an editor rewriting the same bytes) it is
+  dropped too;
+- only a real content change reports the nodes bound to that file, so
+  the caller marks just them dirty and re-evaluation covers their
+  downstream cone.
+
+The hash also goes into the result cache key of a file-bound node
+(`Evaluator.result_key_for`), so a node whose file is back to contents
+seen before reads its result from the cache instead of the file. A file
+not hashed yet (first evaluation, or changed since) is hashed on a
+hashing thread (`request_hash`); `Evaluator.evaluate_steps` yields until
+the digest is ready, so the UI thread never reads the file to key it.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .graph import Graph
+from .history import AddNode, Batch, Journal, Op, RemoveNode, SetMeta
+from .nodes import Node, NodeRegistry
+
+try:
+    import watchfiles
+except ImportError:  # polling fallback
+    watchfiles = None
+
+Change = Tuple[str, str]  # (kind, absolute path)
+ChangeListener = Callable[[Set[Change]], None]
+
+_KINDS = {1: "added", 2: "modified", 3: "deleted"}
+# Generated next to the project or by editors; never interesting
+IGNORED_SUFFIXES = (".tmp", ".swp", "~", ".pyc")
+
+
+class FileWatcher:
+    def __init__(self, root: str, debounce_ms: int = 200, ignore_dirs: Iterable[str] = (),
+                 poll_interval: float = 1.0):
+        self.root = os.path.abspath(root)
+        self.debounce_ms = debounce_ms
+        self.ignore_dirs = set(ignore_dirs)
+        self.poll_interval = poll_interval
+        self._listeners: List[ChangeListener] = []
+        self._tracked: Dict[str, Optional[Tuple[int, int]]] = {}  # polling fallback: path -> (mtime_ns, size)
+        self._extra_dirs: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Set to make the watch loop restart with a new set of directories
+        self._restart = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"batches": 0, "changes": 0}
+
+    def subscribe(self, listener: ChangeListener):
+        self._listeners.append(listener)
+
+    def track(self, path: str):
+        """Make sure changes to `path` are reported (files outside the root get their directory watched)."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._tracked:
+                return
+            self._tracked[path] = _signature(path)
+            directory = os.path.dirname(path)
+            if watchfiles is not None and not _inside(path, self.root) and directory not in self._extra_dirs:
+                self._extra_dirs.add(directory)
+                self._restart.set()
+
+    def untrack(self, path: str):
+        with self._lock:
+            self._tracked.pop(os.path.abspath(path), None)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        target = self._watch if watchfiles is not None else self._poll
+        self._thread = threading.Thread(target=target, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._restart.set()
+        # watchfiles notices the stop event within its poll timeout; leaving it running at exit can crash
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    # --- loops ---
+    def _ignored(self, path: str) -> bool:
+        if path.endswith(IGNORED_SUFFIXES):
+            return True
+        parts = os.path.relpath(path, self.root).split(os.sep) if _inside(path, self.root) else []
+        return any(p in self.ignore_dirs for p in parts[:-1])
+
+    def _watch(self):
+        while not self._stop.is_set():
+            self._restart.clear()
+            with self._lock:
+                paths = [self.root, *sorted(d for d in self._extra_dirs if os.path.isdir(d))]
+            try:
+                for raw in watchfiles.watch(*paths, debounce=self.debounce_ms, stop_event=self._restart,
+                                            rust_timeout=500, yield_on_timeout=False, raise_interrupt=False):
+                    changes = {(_KINDS.get(int(kind), "modified"), os.path.abspath(p)) for kind, p in raw}
+                    self._emit({c for c in changes if not self._ignored(c[1])})
+            except Exception as e:
+                print("File watcher error:", e)
+                self._stop.wait(self.poll_interval)
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            changes: Set[Change] = set()
+            with self._lock:
+                tracked = list(self._tracked.items())
+            for path, old in tracked:
+                new = _signature(path)
+                if new != old:
+                    with self._lock:
+                        if path in self._tracked:
+                            self._tracked[path] = new
+                    kind = "deleted" if new is None else "added" if old is None else "modified"
+                    changes.add((kind, path))
+            self._emit(changes)
+
+    def _emit(self, changes: Set[Change]):
+        if not changes:
+            return
+        self.stats["batches"] += 1
+        self.stats["changes"] += len(changes)
+        for listener in list(self._listeners):
+            try:
+                listener(changes)
+            except Exception as e:
+                print("File watcher listener error:", e)
+
+
+def _inside(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def content_hash(path: str, block: int = 1024 * 1024) -> Optional[str]:
+    h = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(block)
+                if not data:
+                    break
+                h.update(data)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+class FileBindings:
+    """Which nodes read which files, and what those files contained (see module docstring)."""
+
+    def __init__(self, watcher: FileWatcher, registry: NodeRegistry, on_changed: Callable[[Set[str]], None]):
+        self.watcher = watcher
+        self.registry = registry
+        # Called on the watcher thread with the ids of nodes whose file content changed
+        self.on_changed = on_changed
+        self._graph: Optional[Graph] = None
+        self._lock = threading.Lock()
+        self._node_path: Dict[str, str] = {}
+        self._path_nodes: Dict[str, Set[str]] = {}
+        self._files: Dict[str, Tuple[Optional[Tuple[int, int]], Optional[str]]] = {}  # path -> (signature, hash)
+        # Hashing for `request_hash`, off the UI thread; one at a time, files are read sequentially anyway
+        self._hasher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-hash")
+        self._hashing: Dict[str, Future] = {}
+        self.stats = {"events": 0, "stat_skipped": 0, "hash_skipped": 0, "changed": 0}
+        watcher.subscribe(self._on_changes)
+
+    # --- bindings ---
+    def attach(self, journal: Journal):
+        journal.subscribe(self._on_op)
+        self.bind_graph(journal.graph)
+
+    def bind_graph(self, graph: Graph):
+        self._graph = graph
+        with self._lock:
+            old = list(self._node_path)
+        for nid in old:
+            self._unbind(nid)
+        for node in graph.nodes.values():
+            self._bind(node.id)
+
+    def path_of(self, node_id: str) -> Optional[str]:
+        return self._node_path.get(node_id)
+
+    def resolve(self, node: Node) -> Optional[str]:
+        """Absolute path of the file `node` reads (relative paths are from the workspace root), or None.
+
+        The one place paths are resolved: the evaluator passes this path to
+        the implementation (`Evaluator.meta_for`), so what runs is what is watched.
+        """
+        nt = self.registry.get(node.type)
+        if nt is None or not nt.file:
+            return None
+        path = node.meta.get(nt.file)
+        if not isinstance(path, str) or not path:
+            return None
+        return os.path.abspath(os.path.join(self.watcher.root, path))
+
+    def _bind(self, node_id: str):
+        node = self._graph.nodes.get(node_id) if self._graph is not None else None
+        path = self.resolve(node) if node is not None else None
+        if path is None:
+            return
+        with self._lock:
+            self._node_path[node_id] = path
+            self._path_nodes.setdefault(path, set()).add(node_id)
+        self.watcher.track(path)
+
+    def _unbind(self, node_id: str):
+        with self._lock:
+            path = self._node_path.pop(node_id, None)
+            if path is None:
+                return
+            nodes = self._path_nodes.get(path)
+            if nodes is not None:
+                nodes.discard(node_id)
+                if nodes:
+                    return
+                del self._path_nodes[path]
+            self._files.pop(path, None)
+        self.watcher.untrack(path)
+
+    def _on_op(self, op: Op):
+        if isinstance(op, Batch):
+            for sub in op.ops:
+                self._on_op(sub)
+        elif isinstance(op, AddNode):
+            self._bind(op.node.id)
+        elif isinstance(op, RemoveNode):
+            self._unbind(op.node_id)
+        elif isinstance(op, SetMeta):
+            self._unbind(op.node_id)
+            self._bind(op.node_id)
+
+    # --- contents ---
+    def hash_of(self, node: Node) -> Optional[str]:
+        """Known content hash of the file `node` reads, if its stat signature still matches; never reads it.
+
+        None if the node reads no file, the file is unreadable, or it has
+        not been hashed since it last changed (see `request_hash`).
+        """
+        path = self.resolve(node)
+        if path is None:
+            return None
+        with self._lock:
+            known = self._files.get(path)
+        if known is not None and known[0] == _signature(path):
+            return known[1]
+        return None
+
+    def request_hash(self, node: Node) -> Optional[Future]:
+        """Future of the content hash of the file `node` reads, hashed on the hashing thread if not known.
+
+        None if the node reads no file. Callers on the UI thread wait for
+        the future between frames, then read the digest with `hash_of`.
+        """
+        path = self.resolve(node)
+        if path is None:
+            return None
+        signature = _signature(path)
+        with self._lock:
+            known = self._files.get(path)
+            if known is not None and known[0] == signature:
+                done: Future = Future()
+                done.set_result(known[1])
+                return done
+            future = self._hashing.get(path)
+            if future is None:
+                future = self._hashing[path] = self._hasher.submit(self._hash_file, path)
+            return future
+
+    def _hash_file(self, path: str) -> Optional[str]:
+        try:
+            signature = _signature(path)
+            digest = content_hash(path) if signature is not None else None
+            with self._lock:
+                self._files[path] = (signature, digest)
+            return digest
+        finally:
+            with self._lock:
+                self._hashing.pop(path, None)
+
+    def _on_changes(self, changes: Set[Change]):
+        dirty: Set[str] = set()
+        for _, path in changes:
+            with self._lock:
+                nodes = set(self._path_nodes.get(path, ()))
+                known = self._files.get(path)
+            if not nodes:
+                continue
+            self.stats["events"] += 1
+            signature = _signature(path)
+            if known is not None and known[0] == signature:
+                self.stats["stat_skipped"] += 1
+                continue
+            digest = content_hash(path) if signature is not None else None
+            with self._lock:
+                if path in self._path_nodes:
+                    self._files[path] = (signature, digest)
+            if known is not None and known[1] is not None and known[1] == digest:
+                self.stats["hash_skipped"] += 1
+                continue
+            self.stats["changed"] += 1
+            dirty |= nodes
+        if dirty:
+            self.on_changed(dirty)
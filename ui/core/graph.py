@@ -2,25 +2,95 @@
 
 Graph manager for Omega-Visual.
 """
-from typing import Dict, List
+import hashlib
+import json
+from typing import Dict, List, Optional, Set, Tuple
 from .nodes import Node
 from .links import Link
 
 
+LinkKey = Tuple[str, str, str, str]
+
+# Meta keys that only affect presentation and are left out of structural hashes
+LAYOUT_META_KEYS = ("pos",)
+
+
+def link_key(link: Link) -> LinkKey:
+    return (link.start_node, link.start_port, link.end_node, link.end_port)
+
+
+def node_hash(node: Node) -> str:
+    """Hash of a node's content, independent of its id and position.
+
+    Group nodes carry their interior hash in meta, so they hash as a unit
+    without loading the interior.
+    """
+    meta = {k: v for k, v in node.meta.items() if k not in LAYOUT_META_KEYS}
+    data = json.dumps([node.type, node.title, node.inputs, node.outputs, meta], sort_keys=True, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
 class Graph:
     def __init__(self):
         self.nodes: Dict[str, Node] = {}
-        self.links: List[Link] = []
+        # Links indexed by key and by node so edits cost O(degree), not O(links)
+        self._links: Dict[LinkKey, Link] = {}
+        self._adjacency: Dict[str, Set[LinkKey]] = {}
+
+    @property
+    def links(self) -> List[Link]:
+        return list(self._links.values())
 
     def add_node(self, node: Node):
         self.nodes[node.id] = node
 
     def add_link(self, link: Link):
-        self.links.append(link)
+        key = link_key(link)
+        if key in self._links:
+            return
+        self._links[key] = link
+        self._adjacency.setdefault(link.start_node, set()).add(key)
+        self._adjacency.setdefault(link.end_node, set()).add(key)
+
+    def remove_link(self, link: Link) -> Optional[Link]:
+        key = link_key(link)
+        removed = self._links.pop(key, None)
+        if removed is None:
+            return None
+        for nid in (link.start_node, link.end_node):
+            keys = self._adjacency.get(nid)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._adjacency[nid]
+        return removed
+
+    def has_link(self, link: Link) -> bool:
+        return link_key(link) in self._links
+
+    def links_of(self, node_id: str) -> List[Link]:
+        return [self._links[k] for k in self._adjacency.get(node_id, ())]
 
-    def remove_node(self, node_id: str):
+    def remove_node(self, node_id: str) -> List[Link]:
+        """Remove a node and its links; returns the links that were dropped."""
         self.nodes.pop(node_id, None)
-        self.links = [l for l in self.links if l.start_node != node_id and l.end_node != node_id]
+        dropped = self.links_of(node_id)
+        for link in dropped:
+            self.remove_link(link)
+        return dropped
+
+    def clear(self):
+        self.nodes.clear()
+        self._links.clear()
+        self._adjacency.clear()
+
+    def structural_hash(self) -> str:
+        h = hashlib.sha1()
+        for nid in sorted(self.nodes):
+            h.update(f"{nid}={node_hash(self.nodes[nid])};".encode("utf-8"))
+        for key in sorted(self._links):
+            h.update(("|".join(key) + ";").encode("utf-8"))
+        return h.hexdigest()
 
     def snapshot(self) -> Dict:
         return {
@@ -40,6 +110,24 @@ class Graph:
                     "from": {"node": l.start_node, "port": l.start_port},
                     "to": {"node": l.end_node, "port": l.end_port},
                 }
-                for l in self.links
+                for l in self._links.values()
             ],
-        }
\ No newline at end of file
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict) -> "Graph":
+        graph = cls()
+        for n in data.get("nodes", []):
+            graph.add_node(Node(
+                id=n["id"],
+                type=n.get("type", "Compute"),
+                title=n.get("title"),
+                inputs=list(n.get("inputs", [])),
+                outputs=list(n.get("outputs", [])),
+                meta=dict(n.get("meta", {})),
+            ))
+        for l in data.get("links", []):
+            s = l.get("from", {})
+            e = l.get("to", {})
+            graph.add_link(Link(start_node=s.get("node"), start_port=s.get("port"), end_node=e.get("node"), end_port=e.get("port")))
+        return graph
@@ -0,0 +1,209 @@
+"""ui.core.groups
+
+Hierarchical node groups for Omega-Visual.
+
+A group is an ordinary `Node` of type `Group` whose meta points at a sidecar
+file holding its interior graph and records the interior's structural hash
+and the mapping of its aggregated ports. The outer graph, its snapshot and
+the journal therefore treat a group as a single unit; the interior is only
+read from disk when the group is expanded or needs re-evaluation.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .autosave import write_snapshot_atomic
+from .graph import Graph
+from .history import AddLink, AddNode, Batch, RemoveNode
+from .links import Link
+from .nodes import Node
+
+
+GROUP_TYPE = "Group"
+GROUP_COLOR = "#B388FF"
+
+
+def is_group(node: Optional[Node]) -> bool:
+    return node is not None and node.type == GROUP_TYPE
+
+
+def boundary_ports(interior: Graph, external: Iterable[Link] = ()) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """Aggregate an interior's open ports into group ports.
+
+    Inputs are interior input ports without an interior producer; outputs are
+    interior output ports without an interior consumer, plus any port that is
+    consumed from outside. Returns `{group_port: [node, port]}` for each side.
+    """
+    fed = set()
+    consumed = set()
+    for link in interior.links:
+        fed.add((link.end_node, link.end_port))
+        consumed.add((link.start_node, link.start_port))
+    for link in external:
+        if link.start_node in interior.nodes:
+            consumed.discard((link.start_node, link.start_port))
+    inputs: Dict[str, List[str]] = {}
+    outputs: Dict[str, List[str]] = {}
+    for node in interior.nodes.values():
+        for port in node.inputs:
+            if (node.id, port) not in fed:
+                inputs[f"{node.id}.{port}"] = [node.id, port]
+        for port in node.outputs:
+            if (node.id, port) not in consumed:
+                outputs[f"{node.id}.{port}"] = [node.id, port]
+    return inputs, outputs
+
+
+class GroupManager:
+    """Loads, caches and persists group interiors next to the project file."""
+
+    def __init__(self, project_path: str = "project.json"):
+        self.project_path = project_path
+        self.group_dir = f"{project_path}.groups"
+        self._interiors: Dict[str, Graph] = {}
+        self._expanded: set = set()
+        self._dirty: set = set()
+
+    # --- persistence ---
+    def interior_path(self, group: Node) -> str:
+        rel = group.meta.get("group", {}).get("file") or f"{group.id}.json"
+        return os.path.join(self.group_dir, rel)
+
+    def is_loaded(self, group_id: str) -> bool:
+        return group_id in self._interiors
+
+    def load(self, group: Node) -> Graph:
+        interior = self._interiors.get(group.id)
+        if interior is not None:
+            return interior
+        try:
+            with open(self.interior_path(group), "r", encoding="utf-8") as f:
+                interior = Graph.from_snapshot(json.load(f))
+        except FileNotFoundError:
+            interior = Graph()
+        self._interiors[group.id] = interior
+        return interior
+
+    def save(self, group: Node):
+        interior = self._interiors.get(group.id)
+        if interior is None:
+            return
+        os.makedirs(self.group_dir, exist_ok=True)
+        write_snapshot_atomic(self.interior_path(group), interior.snapshot())
+        group.meta.setdefault("group", {})["hash"] = interior.structural_hash()
+
+    def adopt(self, group: Node, interior: Graph):
+        """Register and persist the interior of a group built elsewhere (e.g. pasted)."""
+        self._interiors[group.id] = interior
+        self._dirty.add(group.id)
+        self.save(group)
+
+    def unload(self, group_id: str):
+        if group_id in self._expanded:
+            return
+        self._interiors.pop(group_id, None)
+
+    # --- expansion / evaluation ---
+    def expand(self, group: Node) -> Graph:
+        self._expanded.add(group.id)
+        return self.load(group)
+
+    def collapse(self, group_id: str):
+        self._expanded.discard(group_id)
+        self.unload(group_id)
+
+    def is_expanded(self, group_id: str) -> bool:
+        return group_id in self._expanded
+
+    def mark_dirty(self, group_id: str):
+        self._dirty.add(group_id)
+
+    def is_dirty(self, group_id: str) -> bool:
+        return group_id in self._dirty
+
+    def interior_for_evaluation(self, group: Node, force: bool = False) -> Optional[Graph]:
+        """Interior to evaluate, or None when cached group results are still valid."""
+        if not force and group.id not in self._dirty:
+            return None
+        self._dirty.discard(group.id)
+        return self.load(group)
+
+    # --- grouping ---
+    def group_ops(self, graph: Graph, node_ids: Iterable[str], group_id: str, title: str = GROUP_TYPE) -> Batch:
+        """Build the journal batch that replaces `node_ids` with one group node.
+
+        The interior is written to disk right away so the outer snapshot, WAL
+        and undo history can refer to it by file name.
+        """
+        members = [nid for nid in node_ids if nid in graph.nodes]
+        member_set = set(members)
+        interior = Graph()
+        for nid in members:
+            node = graph.nodes[nid]
+            interior.add_node(Node(id=node.id, type=node.type, title=node.title, inputs=list(node.inputs),
+                                   outputs=list(node.outputs), meta=dict(node.meta)))
+        external: List[Link] = []
+        seen = set()
+        for nid in members:
+            for link in graph.links_of(nid):
+                key = (link.start_node, link.start_port, link.end_node, link.end_port)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if link.start_node in member_set and link.end_node in member_set:
+                    interior.add_link(Link(link.start_node, link.start_port, link.end_node, link.end_port))
+                else:
+                    external.append(link)
+
+        inputs, outputs = boundary_ports(interior, external)
+        rewired: List[Link] = []
+        for link in external:
+            if link.end_node in member_set:
+                rewired.append(Link(link.start_node, link.start_port, group_id, f"{link.end_node}.{link.end_port}"))
+            else:
+                rewired.append(Link(group_id, f"{link.start_node}.{link.start_port}", link.end_node, link.end_port))
+
+        xs = [graph.nodes[n].meta["pos"][0] for n in members if graph.nodes[n].meta.get("pos")]
+        ys = [graph.nodes[n].meta["pos"][1] for n in members if graph.nodes[n].meta.get("pos")]
+        meta = {
+            "color": GROUP_COLOR,
+            # Member ids stay reserved in the outer graph so ungrouping never collides
+            "group": {"file": f"{group_id}.json", "hash": interior.structural_hash(), "members": members,
+                      "ports": {"in": inputs, "out": outputs}},
+        }
+        if xs and ys:
+            meta["pos"] = [min(xs), min(ys)]
+        group = Node(id=group_id, type=GROUP_TYPE, title=title, inputs=list(inputs), outputs=list(outputs), meta=meta)
+
+        self._interiors[group_id] = interior
+        self._dirty.add(group_id)
+        self.save(group)
+
+        ops = [RemoveNode(nid) for nid in members]
+        ops.append(AddNode(group, links=rewired))
+        return Batch(ops)
+
+    def ungroup_ops(self, graph: Graph, group_id: str) -> Optional[Batch]:
+        """Build the journal batch that dissolves a group back into the outer graph."""
+        group = graph.nodes.get(group_id)
+        if not is_group(group):
+            return None
+        interior = self.load(group)
+        ports = group.meta.get("group", {}).get("ports", {})
+        ops = [RemoveNode(group_id)]
+        for node in interior.nodes.values():
+            ops.append(AddNode(Node(id=node.id, type=node.type, title=node.title, inputs=list(node.inputs),
+                                    outputs=list(node.outputs), meta=dict(node.meta))))
+        for link in interior.links:
+            ops.append(AddLink(Link(link.start_node, link.start_port, link.end_node, link.end_port)))
+        for link in graph.links_of(group_id):
+            if link.end_node == group_id:
+                target = ports.get("in", {}).get(link.end_port)
+                if target:
+                    ops.append(AddLink(Link(link.start_node, link.start_port, target[0], target[1])))
+            else:
+                source = ports.get("out", {}).get(link.start_port)
+                if source:
+                    ops.append(AddLink(Link(source[0], source[1], link.end_node, link.end_port)))
+        self._expanded.discard(group_id)
+        return Batch(ops)
@@ -0,0 +1,335 @@
+"""ui.core.history
+
+Undo/redo command journal for Omega-Visual.
+
+Every edit to a `Graph` goes through an operation that knows how to apply
+itself and how to build its inverse. Entries only hold what the edit touched
+(a node and its links, a position pair, one meta value), so undo and redo
+cost O(size of op) regardless of graph size.
+"""
+import copy
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .graph import Graph
+from .links import Link
+from .nodes import Node
+
+
+_MISSING = "__missing__"
+
+
+def _node_to_dict(node: Node) -> Dict:
+    return {
+        "id": node.id,
+        "type": node.type,
+        "title": node.title,
+        "inputs": list(node.inputs),
+        "outputs": list(node.outputs),
+        "meta": copy.deepcopy(node.meta),
+    }
+
+
+def _node_from_dict(data: Dict) -> Node:
+    return Node(
+        id=data["id"],
+        type=data.get("type", "Compute"),
+        title=data.get("title"),
+        inputs=list(data.get("inputs", [])),
+        outputs=list(data.get("outputs", [])),
+        meta=dict(data.get("meta", {})),
+    )
+
+
+def _link_to_dict(link: Link) -> Dict:
+    return {
+        "from": {"node": link.start_node, "port": link.start_port},
+        "to": {"node": link.end_node, "port": link.end_port},
+    }
+
+
+def _link_from_dict(data: Dict) -> Link:
+    s = data.get("from", {})
+    e = data.get("to", {})
+    return Link(start_node=s.get("node"), start_port=s.get("port"), end_node=e.get("node"), end_port=e.get("port"))
+
+
+class Op:
+    """Base class for journal operations."""
+
+    kind = "op"
+
+    def apply(self, graph: Graph):
+        raise NotImplementedError
+
+    def invert(self) -> "Op":
+        raise NotImplementedError
+
+    def merge(self, other: "Op") -> Optional["Op"]:
+        """Return a single op equivalent to `self` followed by `other`, or None."""
+        return None
+
+    def to_dict(self) -> Dict:
+        raise NotImplementedError
+
+
+@dataclass
+class AddNode(Op):
+    node: Node
+    links: List[Link] = field(default_factory=list)
+
+    kind = "add_node"
+
+    def apply(self, graph: Graph):
+        graph.add_node(self.node)
+        for link in self.links:
+            graph.add_link(link)
+
+    def invert(self) -> Op:
+        return RemoveNode(self.node.id, node=self.node, links=list(self.links))
+
+    def to_dict(self) -> Dict:
+        return {"op": self.kind, "node": _node_to_dict(self.node), "links": [_link_to_dict(l) for l in self.links]}
+
+
+@dataclass
+class RemoveNode(Op):
+    node_id: str
+    # Captured on apply so the inverse can restore the node with its links
+    node: Optional[Node] = None
+    links: List[Link] = field(default_factory=list)
+
+    kind = "remove_node"
+
+    def apply(self, graph: Graph):
+        node = graph.nodes.get(self.node_id)
+        if node is not None:
+            self.node = node
+        self.links = graph.remove_node(self.node_id)
+
+    def invert(self) -> Op:
+        if self.node is None:
+            raise ValueError(f"RemoveNode({self.node_id}) has not been applied")
+        return AddNode(self.node, links=list(self.links))
+
+    def to_dict(self) -> Dict:
+        return {"op": self.kind, "id": self.node_id}
+
+
+@dataclass
+class MoveNode(Op):
+    node_id: str
+    old: Optional[List[float]]
+    new: List[float]
+    stamp: float = field(default_factory=time.monotonic, compare=False)
+
+    kind = "move"
+
+    def apply(self, graph: Graph):
+        node = graph.nodes.get(self.node_id)
+        if node is None:
+            return
+        if self.new is None:
+            node.meta.pop("pos", None)
+        else:
+            node.meta["pos"] = list(self.new)
+
+    def invert(self) -> Op:
+        return MoveNode(self.node_id, old=self.new, new=self.old)
+
+    def merge(self, other: Op) -> Optional[Op]:
+        if not isinstance(other, MoveNode) or other.node_id != self.node_id:
+            return None
+        if other.stamp - self.stamp > Journal.MOVE_MERGE_WINDOW:
+            return None
+        return MoveNode(self.node_id, old=self.old, new=other.new, stamp=other.stamp)
+
+    def to_dict(self) -> Dict:
+        return {"op": self.kind, "id": self.node_id, "old": self.old, "new": self.new}
+
+
+@dataclass
+class AddLink(Op):
+    link: Link
+
+    kind = "link"
+
+    def apply(self, graph: Graph):
+        graph.add_link(self.link)
+
+    def invert(self) -> Op:
+        return RemoveLink(self.link)
+
+    def to_dict(self) -> Dict:
+        return {"op": self.kind, "link": _link_to_dict(self.link)}
+
+
+@dataclass
+class RemoveLink(Op):
+    link: Link
+
+    kind = "unlink"
+
+    def apply(self, graph: Graph):
+        graph.remove_link(self.link)
+
+    def invert(self) -> Op:
+        return AddLink(self.link)
+
+    def to_dict(self) -> Dict:
+        return {"op": self.kind, "link": _link_to_dict(self.link)}
+
+
+@dataclass
+class SetMeta(Op):
+    node_id: str
+    key: str
+    old: Any
+    new: Any
+
+    kind = "meta"
+
+    def apply(self, graph: Graph):
+        node = graph.nodes.get(self.node_id)
+        if node is None:
+            return
+        if self.new == _MISSING:
+            node.meta.pop(self.key, None)
+        else:
+            node.meta[self.key] = self.new
+
+    def invert(self) -> Op:
+        return SetMeta(self.node_id, self.key, old=self.new, new=self.old)
+
+    def to_dict(self) -> Dict:
+        return {"op": self.kind, "id": self.node_id, "key": self.key, "old": self.old, "new": self.new}
+
+
+@dataclass
+class Batch(Op):
+    """Several ops applied, undone and redone as a single entry."""
+
+    ops: List[Op] = field(default_factory=list)
+
+    kind = "batch"
+
+    def apply(self, graph: Graph):
+        for op in self.ops:
+            op.apply(graph)
+
+    def invert(self) -> Op:
+        return Batch([op.invert() for op in reversed(self.ops)])
+
+    def to_dict(self) -> Dict:
+        return {"op": self.kind, "ops": [op.to_dict() for op in self.ops]}
+
+
+def set_meta(graph: Graph, node_id: str, key: str, value: Any) -> SetMeta:
+    """Build a SetMeta op capturing the current value as its inverse."""
+    node = graph.nodes.get(node_id)
+    old = node.meta.get(key, _MISSING) if node else _MISSING
+    return SetMeta(node_id, key, old=old, new=value)
+
+
+def move_node(graph: Graph, node_id: str, pos) -> MoveNode:
+    """Build a MoveNode op capturing the current position as its inverse."""
+    node = graph.nodes.get(node_id)
+    old = node.meta.get("pos") if node else None
+    return MoveNode(node_id, old=list(old) if old is not None else None, new=list(pos))
+
+
+def op_from_dict(data: Dict) -> Op:
+    kind = data.get("op")
+    if kind == AddNode.kind:
+        return AddNode(_node_from_dict(data["node"]), links=[_link_from_dict(l) for l in data.get("links", [])])
+    if kind == RemoveNode.kind:
+        return RemoveNode(data["id"])
+    if kind == MoveNode.kind:
+        return MoveNode(data["id"], old=data.get("old"), new=data.get("new"))
+    if kind == AddLink.kind:
+        return AddLink(_link_from_dict(data["link"]))
+    if kind == RemoveLink.kind:
+        return RemoveLink(_link_from_dict(data["link"]))
+    if kind == SetMeta.kind:
+        return SetMeta(data["id"], data["key"], old=data.get("old", _MISSING), new=data.get("new", _MISSING))
+    if kind == Batch.kind:
+        return Batch([op_from_dict(d) for d in data.get("ops", [])])
+    raise ValueError(f"Unknown op: {kind}")
+
+
+class Journal:
+    """Bounded undo/redo ring over a Graph.
+
+    Listeners receive every op that reaches the graph (recorded, undone or
+    redone), which is what autosave and sync consume.
+    """
+
+    MOVE_MERGE_WINDOW = 0.5  # seconds between drag samples merged into one entry
+
+    def __init__(self, graph: Graph, capacity: int = 512):
+        self.graph = graph
+        self.capacity = capacity
+        self._undo: Deque[Op] = deque(maxlen=capacity)
+        self._redo: Deque[Op] = deque(maxlen=capacity)
+        self._listeners: List[Callable[[Op], None]] = []
+
+    def subscribe(self, listener: Callable[[Op], None]):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Op], None]):
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def _emit(self, op: Op):
+        for listener in list(self._listeners):
+            try:
+                listener(op)
+            except Exception as e:
+                print("Journal listener error:", e)
+
+    def record(self, op: Op) -> Op:
+        """Apply an op to the graph and push it on the undo ring."""
+        op.apply(self.graph)
+        self._redo.clear()
+        if self._undo:
+            merged = self._undo[-1].merge(op)
+            if merged is not None:
+                self._undo[-1] = merged
+                self._emit(op)
+                return op
+        self._undo.append(op)
+        self._emit(op)
+        return op
+
+    def undo(self) -> Optional[Op]:
+        if not self._undo:
+            return None
+        op = self._undo.pop()
+        inverse = op.invert()
+        inverse.apply(self.graph)
+        self._redo.append(op)
+        self._emit(inverse)
+        return inverse
+
+    def redo(self) -> Optional[Op]:
+        if not self._redo:
+            return None
+        op = self._redo.pop()
+        op.apply(self.graph)
+        self._undo.append(op)
+        self._emit(op)
+        return op
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
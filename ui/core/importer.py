@@ -0,0 +1,345 @@
+"""ui.core.importer
+
+Python source importer for Omega-Visual.
+
+Each file is parsed with `ast` into a small JSON-serializable summary
+(imports, functions, classes and the calls made inside each function).
+Summaries are produced in a process pool and cached per file by mtime and
+content hash, so re-importing a repository only re-parses files whose
+bytes changed. The summaries are then resolved into one `Graph`:
+
+- Module, Class and Function nodes, linked parent -> child on `scope`;
+- imported module -> importing module on `imports`;
+- callee -> caller on `calls`, for calls that resolve inside the tree.
+"""
+import ast
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .autosave import write_snapshot_atomic
+from .graph import Graph
+from .layout import layered_layout, layout_input
+from .links import Link
+from .nodes import Node
+from .search import SKIP_DIRS
+
+MODULE_TYPE = "Module"
+CLASS_TYPE = "Class"
+FUNCTION_TYPE = "Function"
+
+# Below this many files to parse, pool start-up costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+Summary = Dict
+
+
+def module_name(rel_path: str, package: str = "") -> Tuple[str, bool]:
+    """Dotted module name for a path relative to the import root, and whether it is a package.
+
+    `package` is the root's own name when the root is itself a package.
+    """
+    parts = ([package] if package else []) + rel_path[:-3].replace(os.sep, "/").split("/")
+    is_package = parts[-1] == "__init__"
+    if is_package:
+        parts = parts[:-1]
+    return ".".join(parts) or "__init__", is_package
+
+
+class _Collector(ast.NodeVisitor):
+    def __init__(self, module: str, is_package: bool):
+        self.module = module
+        self.is_package = is_package
+        self.imports: Dict[str, str] = {}
+        self.import_modules: List[str] = []
+        self.defs: List[Dict] = []
+        self._scope: List[Tuple[str, Optional[Dict]]] = []  # (name, def record)
+
+    def _resolve_relative(self, module: Optional[str], level: int) -> str:
+        if not level:
+            return module or ""
+        base = self.module.split(".")
+        if not self.is_package:
+            base = base[:-1]
+        if level > 1:
+            base = base[:-(level - 1)] if level - 1 <= len(base) else []
+        return ".".join(base + ([module] if module else []))
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self.import_modules.append(alias.name)
+            if alias.asname:
+                self.imports[alias.asname] = alias.name
+            else:
+                head = alias.name.split(".")[0]
+                self.imports[head] = head
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        base = self._resolve_relative(node.module, node.level)
+        self.import_modules.append(base)
+        for alias in node.names:
+            if alias.name == "*":
+                continue
+            target = f"{base}.{alias.name}" if base else alias.name
+            self.imports[alias.asname or alias.name] = target
+            # `from pkg import submodule` imports a module too
+            self.import_modules.append(target)
+
+    def _visit_def(self, node, kind: str):
+        qualname = ".".join([name for name, _ in self._scope] + [node.name])
+        record = {"qualname": qualname, "kind": kind, "line": node.lineno, "calls": []}
+        self.defs.append(record)
+        self._scope.append((node.name, record))
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def visit_FunctionDef(self, node):
+        self._visit_def(node, "function")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self._visit_def(node, "class")
+
+    def visit_Call(self, node: ast.Call):
+        name = _dotted(node.func)
+        if name:
+            for _, record in reversed(self._scope):
+                if record["kind"] == "function":
+                    if name not in record["calls"]:
+                        record["calls"].append(name)
+                    break
+        self.generic_visit(node)
+
+
+def _dotted(expr) -> Optional[str]:
+    parts = []
+    while isinstance(expr, ast.Attribute):
+        parts.append(expr.attr)
+        expr = expr.value
+    if not isinstance(expr, ast.Name):
+        return None
+    parts.append(expr.id)
+    return ".".join(reversed(parts))
+
+
+def summarize_source(source: bytes, module: str, is_package: bool) -> Summary:
+    tree = ast.parse(source)
+    collector = _Collector(module, is_package)
+    collector.visit(tree)
+    return {
+        "module": module,
+        "imports": collector.imports,
+        "import_modules": sorted(set(m for m in collector.import_modules if m)),
+        "defs": collector.defs,
+    }
+
+
+def _parse_job(job: Tuple[str, str, bool, Optional[str]]) -> Tuple[str, str, Optional[Summary], Optional[str]]:
+    """Worker entry point: (path, module, is_package, cached sha) -> (path, sha, summary, error).
+
+    A None summary with no error means the content hash matched the cache.
+    """
+    path, module, is_package, known_sha = job
+    try:
+        with open(path, "rb") as f:
+            source = f.read()
+    except OSError as e:
+        return path, "", None, str(e)
+    sha = hashlib.sha1(source).hexdigest()
+    if sha == known_sha:
+        return path, sha, None, None
+    try:
+        return path, sha, summarize_source(source, module, is_package), None
+    except (SyntaxError, ValueError) as e:
+        return path, sha, {"module": module, "imports": {}, "import_modules": [], "defs": []}, str(e)
+
+
+class ImportCache:
+    """Per-file summaries keyed by path, validated by mtime and then content hash."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                print("Import cache error:", e)
+
+    def lookup(self, path: str, mtime: float, module: str) -> Tuple[Optional[Summary], Optional[str]]:
+        """(summary, None) on an mtime hit; (None, sha) when only the hash can still match."""
+        entry = self.entries.get(path)
+        # The same file imported from a different root gets a different module name
+        if entry is None or entry["summary"]["module"] != module:
+            return None, None
+        if entry["mtime"] == mtime:
+            return entry["summary"], None
+        return None, entry["sha"]
+
+    def store(self, path: str, mtime: float, sha: str, summary: Summary):
+        self.entries[path] = {"mtime": mtime, "sha": sha, "summary": summary}
+
+    def touch(self, path: str, mtime: float):
+        self.entries[path]["mtime"] = mtime
+
+    def prune(self, keep):
+        for path in [p for p in self.entries if p not in keep]:
+            del self.entries[path]
+
+    def save(self):
+        if self.path:
+            write_snapshot_atomic(self.path, {"files": self.entries})
+
+
+@dataclass
+class ImportResult:
+    graph: Graph
+    parsed: int = 0
+    cached: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def python_files(root: str) -> List[str]:
+    found = []
+    for current, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        found.extend(os.path.join(current, f) for f in sorted(files) if f.endswith(".py"))
+    return found
+
+
+def summarize_tree(root: str, cache: Optional[ImportCache] = None, workers: Optional[int] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Tuple[Dict[str, Summary], ImportResult]:
+    """Summaries for every .py file under root, keyed by relative path."""
+    cache = cache or ImportCache()
+    result = ImportResult(Graph())
+    summaries: Dict[str, Summary] = {}
+    jobs = []
+    mtimes: Dict[str, float] = {}
+    paths = python_files(root)
+    package = os.path.basename(os.path.abspath(root)) if os.path.isfile(os.path.join(root, "__init__.py")) else ""
+    for path in paths:
+        rel = os.path.relpath(path, root)
+        try:
+            mtimes[path] = os.stat(path).st_mtime
+        except OSError:
+            continue
+        module, is_package = module_name(rel, package)
+        summary, known_sha = cache.lookup(path, mtimes[path], module)
+        if summary is not None:
+            summaries[rel] = summary
+            result.cached += 1
+        else:
+            jobs.append((path, module, is_package, known_sha))
+
+    if len(jobs) >= PARALLEL_THRESHOLD and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = pool.map(_parse_job, jobs, chunksize=max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4)))
+            _collect(root, outcomes, len(jobs), cache, mtimes, summaries, result, progress)
+    else:
+        _collect(root, map(_parse_job, jobs), len(jobs), cache, mtimes, summaries, result, progress)
+    cache.prune(set(mtimes))
+    cache.save()
+    return summaries, result
+
+
+def _collect(root, outcomes, total, cache, mtimes, summaries, result, progress):
+    for done, (path, sha, summary, error) in enumerate(outcomes, 1):
+        rel = os.path.relpath(path, root)
+        if error:
+            result.errors[rel] = error
+        if summary is None and not error:
+            cache.touch(path, mtimes[path])
+            summaries[rel] = cache.entries[path]["summary"]
+            result.cached += 1
+        elif summary is not None:
+            cache.store(path, mtimes[path], sha, summary)
+            summaries[rel] = summary
+            result.parsed += 1
+        if progress is not None:
+            progress(done, total)
+
+
+def _def_id(kind: str, qualified: str) -> str:
+    return f"{'cls' if kind == 'class' else 'fn'}:{qualified}"
+
+
+def build_graph(summaries: Dict[str, Summary], graph: Optional[Graph] = None) -> Graph:
+    graph = graph or Graph()
+    modules = {s["module"]: rel for rel, s in summaries.items()}
+    defs: Dict[str, Tuple[str, str]] = {}  # qualified name -> (node id, kind)
+
+    for rel, s in sorted(summaries.items()):
+        mod = s["module"]
+        graph.add_node(Node(f"mod:{mod}", MODULE_TYPE, title=mod, inputs=["imports"], outputs=["module"],
+                            meta={"path": rel, "line": 1}))
+        for d in s["defs"]:
+            qualified = f"{mod}.{d['qualname']}"
+            nid = _def_id(d["kind"], qualified)
+            if d["kind"] == "class":
+                node = Node(nid, CLASS_TYPE, title=d["qualname"], inputs=["scope"], outputs=["class"])
+            else:
+                node = Node(nid, FUNCTION_TYPE, title=d["qualname"], inputs=["scope", "calls"], outputs=["function"])
+            node.meta = {"path": rel, "line": d["line"]}
+            graph.add_node(node)
+            defs[qualified] = (nid, d["kind"])
+
+    def out_port(nid: str) -> str:
+        return graph.nodes[nid].outputs[0]
+
+    for rel, s in summaries.items():
+        mod = s["module"]
+        # Containment
+        for d in s["defs"]:
+            nid = _def_id(d["kind"], f"{mod}.{d['qualname']}")
+            parent_q = d["qualname"].rpartition(".")[0]
+            parent = defs[f"{mod}.{parent_q}"][0] if parent_q else f"mod:{mod}"
+            graph.add_link(Link(parent, out_port(parent), nid, "scope"))
+        # Imports between modules of the tree
+        for target in s["import_modules"]:
+            while target and target not in modules:
+                target = target.rpartition(".")[0]
+            if target and target != mod:
+                graph.add_link(Link(f"mod:{target}", "module", f"mod:{mod}", "imports"))
+        # Calls
+        for d in s["defs"]:
+            if d["kind"] != "function":
+                continue
+            caller = _def_id("function", f"{mod}.{d['qualname']}")
+            owner = d["qualname"].rpartition(".")[0]
+            for call in d["calls"]:
+                callee = _resolve_call(call, mod, owner, s["imports"], defs)
+                if callee is not None and callee != caller:
+                    graph.add_link(Link(callee, out_port(callee), caller, "calls"))
+    return graph
+
+
+def _resolve_call(call: str, mod: str, owner: str, imports: Dict[str, str],
+                  defs: Dict[str, Tuple[str, str]]) -> Optional[str]:
+    head, _, rest = call.partition(".")
+    candidates = []
+    if head in ("self", "cls") and owner and rest:
+        candidates.append(f"{mod}.{owner}.{rest}")
+    candidates.append(f"{mod}.{call}")
+    if head in imports:
+        candidates.append(f"{imports[head]}.{rest}" if rest else imports[head])
+    for qualified in candidates:
+        if qualified in defs:
+            return defs[qualified][0]
+    return None
+
+
+def import_tree(root: str, cache: Optional[ImportCache] = None, workers: Optional[int] = None,
+                progress: Optional[Callable[[int, int], None]] = None, layout: bool = True) -> ImportResult:
+    """Parse every Python file under root and return the resulting graph."""
+    summaries, result = summarize_tree(root, cache, workers, progress)
+    build_graph(summaries, result.graph)
+    if layout and result.graph.nodes:
+        ids, edges, _ = layout_input(result.graph)
+        for nid, (x, y) in layered_layout(ids, edges).items():
+            result.graph.nodes[nid].meta["pos"] = [x, y]
+    return result
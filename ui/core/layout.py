@@ -0,0 +1,323 @@
+"""ui.core.layout
+
+Automatic graph layout for Omega-Visual.
+
+`layered_layout` is a Sugiyama-style layout for DAGs (cycle breaking,
+longest-path layering, barycenter ordering). `force_layout` is a
+NumPy-vectorized force-directed layout whose repulsion uses a recursive
+grid Barnes-Hut approximation (see `_repulsion`). `LayoutJob` runs either in
+a worker thread and streams intermediate positions.
+
+Both work on plain data extracted from the graph (`layout_input`), so the
+worker never reads the live `Graph` while the UI edits it.
+"""
+import math
+import random
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .graph import Graph
+
+Positions = Dict[str, Tuple[float, float]]
+StepCallback = Callable[[Positions, int], None]
+
+
+def layout_input(graph: Graph) -> Tuple[List[str], List[Tuple[str, str]], Positions]:
+    ids = list(graph.nodes)
+    edges = []
+    seen = set()
+    for link in graph.links:
+        key = (link.start_node, link.end_node)
+        if link.start_node != link.end_node and key not in seen and link.start_node in graph.nodes and link.end_node in graph.nodes:
+            seen.add(key)
+            edges.append(key)
+    positions = {}
+    for nid, node in graph.nodes.items():
+        pos = node.meta.get("pos")
+        if pos:
+            positions[nid] = (float(pos[0]), float(pos[1]))
+    return ids, edges, positions
+
+
+# --- layered (Sugiyama-style) ---
+def _acyclic_edges(ids: List[str], edges: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Drop back edges found by an iterative DFS so the rest form a DAG."""
+    succ: Dict[str, List[str]] = {n: [] for n in ids}
+    for a, b in edges:
+        succ[a].append(b)
+    state: Dict[str, int] = {}  # 1 = on stack, 2 = done
+    back = set()
+    for root in ids:
+        if root in state:
+            continue
+        stack = [(root, iter(succ[root]))]
+        state[root] = 1
+        while stack:
+            node, it = stack[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                state[node] = 2
+                stack.pop()
+            elif state.get(nxt) == 1:
+                back.add((node, nxt))
+            elif nxt not in state:
+                state[nxt] = 1
+                stack.append((nxt, iter(succ[nxt])))
+    return [e for e in edges if e not in back]
+
+
+def layered_layout(ids: List[str], edges: List[Tuple[str, str]], x_gap: float = 240.0, y_gap: float = 110.0,
+                   origin: Tuple[float, float] = (40.0, 40.0), sweeps: int = 4) -> Positions:
+    dag = _acyclic_edges(ids, edges)
+    succ: Dict[str, List[str]] = {n: [] for n in ids}
+    pred: Dict[str, List[str]] = {n: [] for n in ids}
+    for a, b in dag:
+        succ[a].append(b)
+        pred[b].append(a)
+
+    # Longest-path layering in topological order
+    indegree = {n: len(pred[n]) for n in ids}
+    queue = deque(n for n in ids if indegree[n] == 0)
+    layer: Dict[str, int] = {}
+    while queue:
+        n = queue.popleft()
+        layer[n] = max((layer[p] + 1 for p in pred[n]), default=0)
+        for s in succ[n]:
+            indegree[s] -= 1
+            if indegree[s] == 0:
+                queue.append(s)
+    layers: List[List[str]] = []
+    for n in ids:
+        li = layer.get(n, 0)
+        while len(layers) <= li:
+            layers.append([])
+        layers[li].append(n)
+
+    # Barycenter ordering, alternating downward and upward sweeps
+    index = {n: i for lay in layers for i, n in enumerate(lay)}
+    for sweep in range(sweeps):
+        down = sweep % 2 == 0
+        rng = range(1, len(layers)) if down else range(len(layers) - 2, -1, -1)
+        for li in rng:
+            neighbours = pred if down else succ
+            lay = layers[li]
+
+            def key(n, neighbours=neighbours):
+                ns = neighbours[n]
+                return sum(index[m] for m in ns) / len(ns) if ns else index[n]
+
+            lay.sort(key=key)
+            for i, n in enumerate(lay):
+                index[n] = i
+
+    positions: Positions = {}
+    tallest = max((len(lay) for lay in layers), default=0)
+    for li, lay in enumerate(layers):
+        offset = (tallest - len(lay)) * y_gap / 2.0
+        for i, n in enumerate(lay):
+            positions[n] = (origin[0] + li * x_gap, origin[1] + offset + i * y_gap)
+    return positions
+
+
+def is_dag(ids: List[str], edges: List[Tuple[str, str]]) -> bool:
+    return len(_acyclic_edges(ids, edges)) == len(edges)
+
+
+# --- force-directed (NumPy) ---
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("force_layout requires numpy (pip install numpy)") from e
+    return numpy
+
+
+def _pairwise(np, p, k2: float, chunk: int):
+    """Exact all-pairs repulsion, chunked to bound memory."""
+    disp = np.zeros_like(p)
+    for start in range(0, len(p), chunk):
+        stop = min(start + chunk, len(p))
+        d = p[start:stop, None, :] - p[None, :, :]
+        d2 = (d * d).sum(axis=2)
+        d2[d2 == 0.0] = np.inf
+        disp[start:stop] = (d * (k2 / d2)[:, :, None]).sum(axis=1)
+    return disp
+
+
+def _repulsion(np, pos, members, k2: float, leaf: int, chunk: int, per_cell: int = 64):
+    """Repulsive displacement for `members`, Barnes-Hut style over a grid.
+
+    Members are binned into cells of roughly `per_cell` nodes. Each member is
+    pushed by the centroid of every other cell (far field) and exactly by
+    the members of its own cell (near field). Cells up to `leaf` members are
+    batched into padded arrays by size bucket; denser cells recurse, so
+    clusters never degrade to one all-pairs computation.
+    """
+    m = len(members)
+    p = pos[members]
+    lo = p.min(axis=0)
+    span = p.max(axis=0) - lo
+    if m <= leaf or float(span.max()) < 1e-6:
+        return _pairwise(np, p, k2, chunk)
+
+    grid = max(2, int(round(math.sqrt(m / per_cell))))
+    cells = grid * grid
+    cell_xy = np.minimum(((p - lo) / np.maximum(span, 1e-9) * grid).astype(np.int64), grid - 1)
+    cid = cell_xy[:, 0] * grid + cell_xy[:, 1]
+    mass = np.bincount(cid, minlength=cells).astype(np.float64)
+    occupied = np.nonzero(mass)[0]
+    occ_mass = mass[occupied]
+    centroid = np.stack([
+        np.bincount(cid, weights=p[:, 0], minlength=cells)[occupied],
+        np.bincount(cid, weights=p[:, 1], minlength=cells)[occupied],
+    ], axis=1) / occ_mass[:, None]
+
+    # Far field: every member against the centroid of every other occupied cell
+    disp = np.zeros((m, 2))
+    cx, cy = centroid[:, 0], centroid[:, 1]
+    for start in range(0, m, chunk):
+        stop = min(start + chunk, m)
+        dx = p[start:stop, 0, None] - cx[None, :]
+        dy = p[start:stop, 1, None] - cy[None, :]
+        w = occ_mass[None, :] * k2 / (dx * dx + dy * dy + 1e-6)
+        w[cid[start:stop, None] == occupied[None, :]] = 0.0
+        disp[start:stop, 0] = (dx * w).sum(axis=1)
+        disp[start:stop, 1] = (dy * w).sum(axis=1)
+
+    # Near field inside each cell
+    order = np.argsort(cid, kind="stable")
+    starts = np.searchsorted(cid[order], occupied, side="left")
+    sizes = occ_mass.astype(np.int64)
+    bucket = 8
+    lower = 2
+    while lower <= leaf:
+        sel = np.nonzero((sizes >= lower) & (sizes <= bucket))[0]
+        if len(sel):
+            width = int(sizes[sel].max())
+            ranks = np.arange(width)
+            valid = ranks[None, :] < sizes[sel][:, None]
+            idx = order[np.where(valid, starts[sel][:, None] + ranks[None, :], 0)]
+            qx, qy = p[idx, 0], p[idx, 1]
+            dx = qx[:, :, None] - qx[:, None, :]
+            dy = qy[:, :, None] - qy[:, None, :]
+            d2 = dx * dx + dy * dy
+            # Padding slots and self-pairs contribute nothing
+            d2[d2 == 0.0] = np.inf
+            w = k2 / d2
+            w *= valid[:, None, :]
+            fx = (dx * w).sum(axis=2)
+            fy = (dy * w).sum(axis=2)
+            rows = idx[valid]
+            disp[rows, 0] += fx[valid]
+            disp[rows, 1] += fy[valid]
+        lower = bucket + 1
+        bucket *= 2
+    for cell in np.nonzero(sizes > leaf)[0]:
+        local = order[starts[cell]:starts[cell] + sizes[cell]]
+        disp[local] += _repulsion(np, pos, members[local], k2, leaf, chunk, per_cell)
+    return disp
+
+
+def force_layout(ids: List[str], edges: List[Tuple[str, str]], initial: Optional[Positions] = None,
+                 iterations: Optional[int] = None, ideal: float = 180.0, leaf: int = 128,
+                 on_step: Optional[StepCallback] = None, step_every: int = 10,
+                 cancel: Optional[threading.Event] = None, chunk: int = 2048) -> Positions:
+    np = _numpy()
+    n = len(ids)
+    if n == 0:
+        return {}
+    index = {nid: i for i, nid in enumerate(ids)}
+    # Big graphs get fewer, costlier iterations: ~150 below 2k nodes, ~40 at 10k
+    iterations = iterations or max(30, min(150, 400000 // n))
+    rng = random.Random(0)
+    spread = ideal * math.sqrt(n)
+    initial = initial or {}
+    pos = np.array([initial.get(nid) or (rng.uniform(0, spread), rng.uniform(0, spread)) for nid in ids], dtype=np.float64)
+    # Separate nodes saved on top of each other
+    pos += np.array([(rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in ids])
+    e = np.array([(index[a], index[b]) for a, b in edges], dtype=np.int64).reshape(-1, 2)
+    everyone = np.arange(n)
+    k2 = ideal * ideal
+    temp = spread / 10.0
+    cooling = (1.0 / max(temp, 1.0)) ** (1.0 / max(iterations, 1))
+
+    def snapshot() -> Positions:
+        return {nid: (float(pos[i, 0]), float(pos[i, 1])) for i, nid in enumerate(ids)}
+
+    for it in range(iterations):
+        if cancel is not None and cancel.is_set():
+            break
+        disp = _repulsion(np, pos, everyone, k2, leaf, chunk)
+
+        # Attraction along edges
+        if len(e):
+            d = pos[e[:, 0]] - pos[e[:, 1]]
+            dist = np.sqrt((d * d).sum(axis=1)) + 1e-9
+            f = d * (dist / ideal)[:, None]
+            np.add.at(disp, e[:, 0], -f)
+            np.add.at(disp, e[:, 1], f)
+
+        # Move, capped by the temperature
+        length = np.sqrt((disp * disp).sum(axis=1)) + 1e-9
+        pos += disp * (np.minimum(length, temp) / length)[:, None]
+        temp *= cooling
+
+        if on_step is not None and (it + 1) % step_every == 0:
+            on_step(snapshot(), it + 1)
+
+    # Shift into positive canvas coordinates
+    pos -= pos.min(axis=0) - 40.0
+    return snapshot()
+
+
+def auto_layout(ids: List[str], edges: List[Tuple[str, str]], initial: Optional[Positions] = None, **kwargs) -> Positions:
+    """Layered layout for DAGs, force-directed for everything else."""
+    if is_dag(ids, edges):
+        return layered_layout(ids, edges)
+    try:
+        return force_layout(ids, edges, initial=initial, **kwargs)
+    except ImportError:
+        return layered_layout(ids, edges)
+
+
+class LayoutJob:
+    """Runs a layout in a worker thread, streaming intermediate positions."""
+
+    def __init__(self, graph: Graph, algorithm: str = "auto", on_step: Optional[StepCallback] = None,
+                 on_done: Optional[Callable[[Positions], None]] = None, **kwargs):
+        self.ids, self.edges, self.initial = layout_input(graph)
+        self.algorithm = algorithm
+        self.on_step = on_step
+        self.on_done = on_done
+        self.kwargs = kwargs
+        self.cancel_event = threading.Event()
+        self.result: Optional[Positions] = None
+        self._thread = threading.Thread(target=self._run, name="layout", daemon=True)
+
+    def start(self) -> "LayoutJob":
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            if self.algorithm == "layered":
+                result = layered_layout(self.ids, self.edges)
+            else:
+                kwargs = dict(self.kwargs, on_step=self.on_step, cancel=self.cancel_event)
+                if self.algorithm == "force":
+                    result = force_layout(self.ids, self.edges, initial=self.initial, **kwargs)
+                else:
+                    result = auto_layout(self.ids, self.edges, initial=self.initial, **kwargs)
+        except Exception as e:
+            print("Layout error:", e)
+            return
+        self.result = result
+        if self.on_done is not None and not self.cancel_event.is_set():
+            self.on_done(result)
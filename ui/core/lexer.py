@@ -0,0 +1,265 @@
+"""ui.core.lexer
+
+Incremental syntax highlighting for editor buffers.
+
+`tokenize_python` lexes one line given the state left by the previous
+line (inside a triple-quoted or backslash-continued string, or not) and
+returns the line's tokens and the state it leaves. `IncrementalLexer`
+keeps, for every line of a `PieceTable`, its tokens and the state it
+starts in. An edit only invalidates the lines it touched; re-lexing starts
+at the first invalid line and stops as soon as a line ends in the state
+the next line was already known to start in, so typing costs a line or
+two of lexing, not the file. Opening a triple quote is the case that
+re-lexes to the end of the string, as it must.
+
+Lexing runs on a background thread (`LexWorker`) over a snapshot of the
+buffer, which shares the buffer's immutable pieces and costs a copy of the
+piece list. A thread rather than a worker process: shipping the text to a
+process would cost a copy of the file per keystroke. Results come back in
+batches tagged with the buffer version they were computed for; the UI
+thread applies them in `apply()`, once per frame, and drops those made
+stale by a later edit.
+"""
+import builtins
+import keyword
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .textbuffer import PieceTable
+
+# (start, end, kind) within the line; kind None is plain text
+Token = Tuple[int, int, Optional[str]]
+# None outside strings, else (quote, raw) of the string the line ends in
+State = Optional[Tuple[str, bool]]
+Tokenizer = Callable[[str, State], Tuple[List[Token], State]]
+
+# Lines per result batch sent back to the UI thread
+BATCH_LINES = 512
+
+_KEYWORDS = frozenset(keyword.kwlist) | frozenset(getattr(keyword, "softkwlist", ()))
+_BUILTINS = frozenset(n for n in dir(builtins) if not n.startswith("_")) | {"self", "cls"}
+_PYTHON = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>\#.*)
+  | (?P<string>(?i:[rbuf]{0,2})(?:'''|\"\"\"|'|\"))
+  | (?P<number>(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+
+                |(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?)[jJ]?)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<decorator>@[^\W\d][\w.]*)
+  | (?P<op>[^\s\w'"\#]+)
+""", re.VERBOSE)
+
+
+def _string_end(line: str, pos: int, quote: str, raw: bool) -> int:
+    """Index just past the closing `quote` at or after `pos`, or -1 if the line ends first."""
+    while pos < len(line):
+        c = line[pos]
+        if c == "\\":
+            # Raw strings too: a backslash keeps the quote after it from closing the string
+            pos += 2
+            continue
+        if line.startswith(quote, pos):
+            return pos + len(quote)
+        pos += 1
+    return -1
+
+
+def tokenize_python(line: str, state: State) -> Tuple[List[Token], State]:
+    tokens: List[Token] = []
+    pos = 0
+    if state is not None:
+        quote, raw = state
+        end = _string_end(line, 0, quote, raw)
+        if end < 0:
+            continued = len(quote) == 3 or line.rstrip("\r").endswith("\\")
+            return [(0, len(line), "string")], state if continued else None
+        tokens.append((0, end, "string"))
+        pos = end
+    pending_def = False  # the next name is the one being defined
+    while pos < len(line):
+        m = _PYTHON.match(line, pos)
+        if m is None:
+            tokens.append((pos, pos + 1, None))
+            pos += 1
+            continue
+        kind = m.lastgroup
+        end = m.end()
+        if kind == "ws":
+            kind = None
+        elif kind == "name":
+            word = m.group()
+            if pending_def:
+                kind = "def"
+            elif word in _KEYWORDS:
+                kind = "keyword"
+            elif word in _BUILTINS:
+                kind = "builtin"
+            else:
+                kind = None
+            pending_def = word in ("def", "class")
+        else:
+            pending_def = False
+            if kind == "string":
+                opener = m.group()
+                quote = opener.lstrip("rRbBuUfF")
+                raw = "r" in opener[:len(opener) - len(quote)].lower()
+                close = _string_end(line, end, quote, raw)
+                if close < 0:
+                    tokens.append((pos, len(line), "string"))
+                    continued = len(quote) == 3 or line.rstrip("\r").endswith("\\")
+                    return _merge(tokens), (quote, raw) if continued else None
+                end = close
+        tokens.append((pos, end, kind))
+        pos = end
+    return _merge(tokens), None
+
+
+def _merge(tokens: List[Token]) -> List[Token]:
+    """Join neighbouring tokens of the same kind (fewer items to draw)."""
+    out: List[Token] = []
+    for start, end, kind in tokens:
+        if out and out[-1][2] == kind and out[-1][1] == start:
+            out[-1] = (out[-1][0], end, kind)
+        else:
+            out.append((start, end, kind))
+    return out
+
+
+_UNKNOWN = ("?", False)  # start state of a line not lexed since it was edited
+
+
+class IncrementalLexer:
+    """Per-line tokens of a buffer, kept current by `LexWorker` (see module docstring)."""
+
+    def __init__(self, buffer: PieceTable, tokenize: Tokenizer = tokenize_python,
+                 worker: Optional["LexWorker"] = None):
+        self.buffer = buffer
+        self.tokenize = tokenize
+        self.worker = worker or WORKER
+        n = buffer.line_count()
+        self._tokens: List[Optional[List[Token]]] = [None] * n
+        self._states: List[State] = [None] + [_UNKNOWN] * (n - 1)
+        # Every line before this one has its tokens and a known end state; None when all do
+        self._dirty_from: Optional[int] = 0
+        self._results: Deque[Tuple[int, int, List[Tuple[List[Token], State]], bool]] = deque()
+        self._requested: Optional[Tuple[int, int]] = None  # (version, line) of the job in flight
+        # Bumped whenever applied results change some line's tokens
+        self.generation = 0
+        buffer.subscribe(self._on_edit)
+
+    def tokens(self, line: int) -> Optional[List[Token]]:
+        """Tokens of `line`, or None while it has not been lexed since its last edit."""
+        return self._tokens[line] if 0 <= line < len(self._tokens) else None
+
+    @property
+    def done(self) -> bool:
+        return self._dirty_from is None
+
+    def _on_edit(self, line: int, removed: int, added: int):
+        self._tokens[line:line + removed + 1] = [None] * (added + 1)
+        self._states[line + 1:line + removed + 1] = [_UNKNOWN] * added
+        if self._dirty_from is None or line < self._dirty_from:
+            self._dirty_from = line
+
+    def apply(self) -> bool:
+        """Take in the worker's results (UI thread, once per frame); True if any line changed."""
+        changed = False
+        version = self.buffer.version
+        while self._results:
+            job_version, start, batch, finished = self._results.popleft()
+            if job_version != version or start != self._dirty_from:
+                continue  # made stale by an edit since
+            for k, (toks, end_state) in enumerate(batch):
+                self._tokens[start + k] = toks
+                if start + k + 1 < len(self._states):
+                    self._states[start + k + 1] = end_state
+            self._dirty_from = self._first_invalid(start + len(batch)) if finished else start + len(batch)
+            changed = True
+        if changed:
+            self.generation += 1
+        if self._dirty_from is not None and self._requested != (version, self._dirty_from):
+            self._requested = (version, self._dirty_from)
+            self.worker.submit(self, version, self._dirty_from, self._states[self._dirty_from])
+        return changed
+
+    def _first_invalid(self, line: int) -> Optional[int]:
+        """First line from `line` on still waiting for tokens (edited elsewhere meanwhile)."""
+        try:
+            return self._tokens.index(None, line)
+        except ValueError:
+            return None
+
+    def close(self):
+        self.buffer.unsubscribe(self._on_edit)
+        self.worker.forget(self)
+
+
+class LexWorker:
+    """Background thread lexing for every open `IncrementalLexer`; the latest job per lexer wins."""
+
+    def __init__(self):
+        self._jobs: Dict[int, Tuple[IncrementalLexer, int, int, State, PieceTable]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, lexer: IncrementalLexer, version: int, line: int, state: State):
+        job = (lexer, version, line, state, lexer.buffer.snapshot())
+        with self._cond:
+            self._jobs[id(lexer)] = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="lexer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def forget(self, lexer: IncrementalLexer):
+        with self._cond:
+            self._jobs.pop(id(lexer), None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+                _, job = self._jobs.popitem()
+            try:
+                self._lex(*job)
+            except (IndexError, ValueError):
+                pass  # the buffer changed under a convergence check; a newer job follows
+
+    @staticmethod
+    def _lex(lexer: IncrementalLexer, version: int, line: int, state: State, snap: PieceTable):
+        total = snap.line_count()
+        start = line
+        batch: List[Tuple[List[Token], State]] = []
+        while line < total:
+            if lexer.buffer.version != version:
+                return
+            for text in snap.lines(line, BATCH_LINES - len(batch)):
+                toks, state = lexer.tokenize(text, state)
+                batch.append((toks, state))
+                line += 1
+                # Converged: the next line already starts in this state and is lexed
+                nxt = line
+                if nxt < total and lexer._tokens[nxt] is not None and lexer._states[nxt] == state:
+                    lexer._results.append((version, start, batch, True))
+                    return
+            if len(batch) >= BATCH_LINES or line >= total:
+                lexer._results.append((version, start, batch, line >= total))
+                start, batch = line, []
+                # Let the render thread have the GIL between batches
+                time.sleep(0)
+        if batch:
+            lexer._results.append((version, start, batch, True))
+
+
+WORKER = LexWorker()
+
+
+def lexer_for(path: str) -> Optional[Tokenizer]:
+    """Tokenizer for a file, by extension; None for plain text."""
+    if path.lower().endswith((".py", ".pyw", ".pyi")):
+        return tokenize_python
+    return None
@@ -2,8 +2,13 @@
 
 Basic node type and model definitions for Omega-Visual.
 """
+import importlib
+import inspect
+import json
+import os
+import sys
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 
 @dataclass
@@ -16,15 +21,66 @@ class Node:
     meta: Dict[str, str] = field(default_factory=dict)
 
 
+# Implementation signature: fn(inputs: {port: value}, meta) -> {port: value}
+NodeImpl = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
 class NodeType:
-    def __init__(self, name: str, inputs: List[str], outputs: List[str], color: str = "#A0A0A0"):
+    def __init__(self, name: str, inputs: List[str], outputs: List[str], color: str = "#A0A0A0",
+                 entry: Optional[str] = None, version: str = "1", search_path: Optional[str] = None,
+                 isolated: bool = False, cached: bool = True, stream: Optional[str] = None,
+                 concurrency: Optional[int] = None, file: Optional[str] = None):
         self.name = name
         self.inputs = inputs
         self.outputs = outputs
         self.color = color
+        # "package.module:function", imported on first use
+        self.entry = entry
+        self.version = version
+        self.search_path = search_path
+        # Runs in a worker process (user code), never in the editor
+        self.isolated = isolated
+        # Pure: the same meta and inputs always give the same outputs, so results may be cached
+        self.cached = cached
+        # "package.module:function" taking and returning iterables of chunks (streaming runs)
+        self.stream = stream
+        # Most nodes of this type running at once, for `async def` implementations
+        self.concurrency = concurrency
+        # Meta key holding the path of the file the node reads; its nodes re-run when the file changes
+        self.file = file
+        self._impl: Optional[NodeImpl] = None
+        self._stream_impl: Optional[NodeImpl] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._impl is not None
+
+    def _import(self, entry: str) -> NodeImpl:
+        module_name, _, attr = entry.partition(":")
+        if self.search_path and self.search_path not in sys.path:
+            sys.path.append(self.search_path)
+        module = importlib.import_module(module_name)
+        return getattr(module, attr or "run")
+
+    def implementation(self) -> Optional[NodeImpl]:
+        if self._impl is None and self.entry:
+            self._impl = self._import(self.entry)
+        return self._impl
+
+    @property
+    def is_async(self) -> bool:
+        """The implementation is a coroutine function (runs on the editor's event loop)."""
+        return inspect.iscoroutinefunction(self.implementation())
+
+    def stream_implementation(self) -> Optional[NodeImpl]:
+        if self._stream_impl is None and self.stream:
+            self._stream_impl = self._import(self.stream)
+        return self._stream_impl
 
 
 class NodeRegistry:
+    MANIFEST_NAME = "manifest.json"
+
     def __init__(self):
         self._types: Dict[str, NodeType] = {}
 
@@ -35,4 +91,61 @@ class NodeRegistry:
         return self._types.get(name)
 
     def list(self) -> List[str]:
-        return list(self._types.keys())
\ No newline at end of file
+        return list(self._types.keys())
+
+    def load_manifest(self, path: str) -> List[str]:
+        """Register the node types declared in a node pack manifest.
+
+        Manifest keys: `name`, `version`, optional `path` (directory added to
+        sys.path for the pack's modules, relative to the manifest) and `types`,
+        each with `name`, `inputs`, `outputs`, `color`, `entry`
+        ("module:function"), optional `isolated` (run in a worker
+        process), optional `cached` (false for impure types whose results
+        must never come from the result cache), optional `stream` (entry
+        of a chunk-streaming implementation), optional `concurrency`
+        (limit on nodes of an `async def` type running at once) and optional
+        `file` (meta key holding the path of the file the node reads, watched
+        for changes). Only the manifest is read;
+        implementation modules are imported by `NodeType.implementation()`
+        the first time a type is used.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        base = os.path.dirname(os.path.abspath(path))
+        search_path = os.path.normpath(os.path.join(base, manifest["path"])) if manifest.get("path") else None
+        pack_version = str(manifest.get("version", "1"))
+        names = []
+        for t in manifest.get("types", []):
+            self.register(NodeType(
+                t["name"],
+                inputs=list(t.get("inputs", [])),
+                outputs=list(t.get("outputs", [])),
+                color=t.get("color", "#A0A0A0"),
+                entry=t.get("entry"),
+                version=str(t.get("version", pack_version)),
+                search_path=search_path,
+                isolated=bool(t.get("isolated", False)),
+                cached=bool(t.get("cached", True)),
+                stream=t.get("stream"),
+                concurrency=int(t["concurrency"]) if t.get("concurrency") else None,
+                file=t.get("file"),
+            ))
+            names.append(t["name"])
+        return names
+
+    def discover(self, plugins_dir: str) -> List[str]:
+        """Index every `<plugins_dir>/<pack>/manifest.json` without importing packs."""
+        names = []
+        try:
+            packs = sorted(os.listdir(plugins_dir))
+        except FileNotFoundError:
+            return names
+        for pack in packs:
+            path = os.path.join(plugins_dir, pack, self.MANIFEST_NAME)
+            if not os.path.isfile(path):
+                continue
+            try:
+                names.extend(self.load_manifest(path))
+            except Exception as e:
+                print(f"Manifest error ({path}):", e)
+        return names
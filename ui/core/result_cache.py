@@ -0,0 +1,248 @@
+"""ui.core.result_cache
+
+Persistent, content-addressed cache of node outputs.
+
+A result is stored under a key derived from what produced it: the node
+type, its implementation version and entry point, the node's meta
+(without layout keys) and, for each input, the key of the result feeding
+it. Keys therefore chain through the graph like a Merkle tree: an
+unchanged pipeline produces the same keys on every run and after
+reopening the project, without hashing the values themselves.
+
+Entries are pickled with protocol 5. Large buffers (NumPy arrays, bytes)
+are written out-of-band after the pickle stream and read back as
+zero-copy, read-only views of a memory-mapped file. Small results are
+also kept in a bounded in-memory LRU. The directory is bounded by
+`max_bytes`, evicting the least recently used entries first. Results that
+took less than `min_seconds` to compute are not worth a file and are not
+stored; their keys still chain, so nodes downstream of them still hit.
+"""
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .graph import LAYOUT_META_KEYS
+
+_MAGIC = b"OVRC1\0"
+_HEADER = struct.Struct("<6sIQ")  # magic, buffer count, pickle length
+_ALIGN = 64
+# Below this size a plain read is cheaper than mapping the file
+MMAP_THRESHOLD = 256 * 1024
+
+
+def result_key(type_name: str, version: str, entry: Optional[str], meta: Dict[str, Any],
+               inputs: Iterable[Tuple[str, str]]) -> str:
+    """Key of a node result; `inputs` pairs each input port with the key of the value on it."""
+    content = {k: v for k, v in meta.items() if k not in LAYOUT_META_KEYS}
+    data = json.dumps([type_name, version, entry, content, sorted(inputs)], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def value_key(value: Any) -> Optional[str]:
+    """Key of a value that did not come from a cached result; None if it cannot be pickled."""
+    try:
+        data = pickle.dumps(value, protocol=5)
+    except Exception:
+        return None
+    return "v:" + hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+class ResultCache:
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024,
+                 hot_bytes: int = 64 * 1024 * 1024, hot_item_bytes: int = 1024 * 1024,
+                 min_seconds: float = 0.002):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_seconds = min_seconds
+        self.hot_bytes = hot_bytes
+        self.hot_item_bytes = hot_item_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> file size, LRU first
+        self._size = 0
+        self._hot: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._hot_size = 0
+        self._scanned = False
+        self.stats = {"hot_hits": 0, "disk_hits": 0, "misses": 0, "stored": 0, "evicted": 0, "unstorable": 0}
+
+    def worth_storing(self, seconds: float) -> bool:
+        return seconds >= self.min_seconds
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    # --- index ---
+    def _scan(self):
+        """Index the entries already on disk, least recently used first (by mtime)."""
+        self._scanned = True
+        entries = []
+        try:
+            shards = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for shard in shards:
+            try:
+                with os.scandir(os.path.join(self.directory, shard)) as it:
+                    for entry in it:
+                        if entry.is_file() and not entry.name.endswith(".tmp"):
+                            st = entry.stat()
+                            entries.append((st.st_mtime, entry.name, st.st_size))
+            except (NotADirectoryError, FileNotFoundError):
+                continue
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+
+    def _ensure_index(self):
+        if not self._scanned:
+            self._scan()
+
+    # --- reads ---
+    def get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        with self._lock:
+            hot = self._hot.get(key)
+            if hot is not None:
+                self._hot.move_to_end(key)
+                if key in self._index:
+                    self._index.move_to_end(key)
+                self.stats["hot_hits"] += 1
+                return True, hot[0]
+            self._ensure_index()
+            if key not in self._index:
+                self.stats["misses"] += 1
+                return False, None
+            self._index.move_to_end(key)
+        try:
+            outputs, size = self._read(self.path(key))
+            os.utime(self.path(key))
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            with self._lock:
+                self._forget(key)
+                self.stats["misses"] += 1
+            return False, None
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, outputs, size)
+        return True, outputs
+
+    def _read(self, path: str) -> Tuple[Dict[str, Any], int]:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                data = f.read()
+            else:
+                # The views handed to pickle keep the mapping alive; it is not closed here
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(data)
+        magic, count, length = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC:
+            raise ValueError("not a result cache entry")
+        offset = _HEADER.size
+        lengths = struct.unpack_from(f"<{count}Q", view, offset)
+        offset += 8 * count
+        payload = view[offset:offset + length]
+        offset += length
+        buffers = []
+        for n in lengths:
+            offset += _pad(offset)
+            buffers.append(view[offset:offset + n])
+            offset += n
+        return pickle.loads(payload, buffers=buffers), size
+
+    # --- writes ---
+    def put(self, key: str, outputs: Dict[str, Any]) -> bool:
+        buffers: List[pickle.PickleBuffer] = []
+        try:
+            payload = pickle.dumps(outputs, protocol=5, buffer_callback=buffers.append)
+            raws = [b.raw() for b in buffers]
+        except Exception:
+            # Unpicklable or non-contiguous outputs are simply not cached
+            self.stats["unstorable"] += 1
+            return False
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, len(raws), len(payload)))
+                f.write(struct.pack(f"<{len(raws)}Q", *(r.nbytes for r in raws)))
+                f.write(payload)
+                for raw in raws:
+                    # Buffers start 64-byte aligned so mapped arrays are aligned too
+                    f.write(b"\0" * _pad(f.tell()))
+                    f.write(raw)
+                size = f.tell()
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return False
+        with self._lock:
+            self._ensure_index()
+            self._size -= self._index.pop(key, 0)
+            self._index[key] = size
+            self._size += size
+            self.stats["stored"] += 1
+            self._remember(key, outputs, size)
+            doomed = self._evict()
+        for old in doomed:
+            try:
+                os.unlink(self.path(old))
+            except OSError:
+                pass
+        return True
+
+    def _remember(self, key: str, outputs: Dict[str, Any], size: int):
+        if size > self.hot_item_bytes:
+            return
+        old = self._hot.pop(key, None)
+        if old is not None:
+            self._hot_size -= old[1]
+        self._hot[key] = (outputs, size)
+        self._hot_size += size
+        while self._hot_size > self.hot_bytes and self._hot:
+            _, (_, n) = self._hot.popitem(last=False)
+            self._hot_size -= n
+
+    def _forget(self, key: str):
+        self._size -= self._index.pop(key, 0)
+        old = self._hot.pop(key, None)
+        if old is not None:
+            self._hot_size -= old[1]
+
+    def _evict(self) -> List[str]:
+        doomed = []
+        while self._size > self.max_bytes and len(self._index) > 1:
+            key = next(iter(self._index))
+            self._forget(key)
+            doomed.append(key)
+        self.stats["evicted"] += len(doomed)
+        return doomed
+
+    def clear(self):
+        with self._lock:
+            self._ensure_index()
+            keys = list(self._index)
+            for key in keys:
+                self._forget(key)
+        for key in keys:
+            try:
+                os.unlink(self.path(key))
+            except OSError:
+                pass
+
+    def size(self) -> int:
+        with self._lock:
+            self._ensure_index()
+            return self._size
@@ -0,0 +1,197 @@
+"""ui.core.scheduler
+
+Frame-budgeted task scheduler for the DearPyGui render thread.
+
+DearPyGui items must only be touched from the thread that renders them.
+Background threads (WebSocket client, layout, importer) `post` their UI
+work here instead, and the render loop calls `run_frame` once per frame:
+tasks run in priority order until the frame's time budget is spent, and
+whatever is left waits for the next frame.
+
+- `key`: posting a task with the key of one still pending replaces it
+  (the newest arguments win, the queue position of the first is kept), so
+  a stream of status or position updates costs one call per frame;
+- a task that returns a generator is resumed one step at a time, so large
+  operations (loading a project, filling the explorer) are written as a
+  loop that `yield`s between chunks and never blocks a frame for long;
+- a generator that yields a pending Future (e.g. a node running in a
+  worker process) is parked until the Future is done, costing nothing
+  per frame while it waits.
+"""
+import heapq
+import inspect
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+HIGH = 0     # input feedback, status text
+NORMAL = 1   # graph/editor updates
+LOW = 2      # minimap, snapshots, explorer
+
+# 60 fps leaves ~16.6 ms per frame; half of it is for queued work
+DEFAULT_BUDGET = 0.008
+
+
+class _Task:
+    __slots__ = ("fn", "args", "key", "priority", "order", "gen", "cancelled")
+
+    def __init__(self, fn: Callable, args: Tuple, key: Optional[Hashable], priority: int, order: int):
+        self.fn = fn
+        self.args = args
+        self.key = key
+        self.priority = priority
+        self.order = order
+        self.gen = None
+        self.cancelled = False
+
+
+class FrameScheduler:
+    def __init__(self, budget: float = DEFAULT_BUDGET):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[int, int, int, _Task]] = []
+        self._keyed: Dict[Hashable, _Task] = {}
+        self._waiting: List[Tuple[_Task, Any]] = []
+        self._orders = itertools.count()
+        self._ids = itertools.count()
+        # The render thread is the one that calls run_frame (the importing thread until then)
+        self._owner = threading.get_ident()
+        self.stats = {"posted": 0, "coalesced": 0, "run": 0, "errors": 0, "frames": 0, "over_budget": 0, "last_ms": 0.0}
+
+    def on_render_thread(self) -> bool:
+        return threading.get_ident() == self._owner
+
+    def post(self, fn: Callable, *args: Any, priority: int = NORMAL, key: Optional[Hashable] = None):
+        """Queue `fn(*args)` for the render thread; safe to call from any thread."""
+        with self._lock:
+            self.stats["posted"] += 1
+            order = None
+            if key is not None:
+                old = self._keyed.get(key)
+                if old is not None:
+                    old.cancelled = True
+                    self.stats["coalesced"] += 1
+                    order = old.order
+                    priority = min(priority, old.priority)
+            task = _Task(fn, args, key, priority, next(self._orders) if order is None else order)
+            if key is not None:
+                self._keyed[key] = task
+            self._push(task)
+
+    def call(self, fn: Callable, *args: Any, priority: int = NORMAL, key: Optional[Hashable] = None):
+        """Run now when already on the render thread, otherwise `post`."""
+        if self.on_render_thread():
+            fn(*args)
+        else:
+            self.post(fn, *args, priority=priority, key=key)
+
+    def cancel(self, key: Hashable) -> bool:
+        with self._lock:
+            task = self._keyed.pop(key, None)
+            if task is None:
+                return False
+            task.cancelled = True
+            return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for entry in self._heap if not entry[3].cancelled) + len(self._waiting)
+
+    def run_frame(self, budget: Optional[float] = None) -> int:
+        """Run queued tasks until `budget` seconds have passed; returns how many ran.
+
+        At least one task runs per frame, so a budget smaller than a single
+        step still makes progress.
+        """
+        self._owner = threading.get_ident()
+        start = time.perf_counter()
+        if self._waiting:
+            self._wake_waiting()
+        deadline = start + (self.budget if budget is None else budget)
+        ran = 0
+        while True:
+            task = self._pop()
+            if task is None:
+                break
+            self._run(task)
+            ran += 1
+            if time.perf_counter() >= deadline:
+                break
+        elapsed = time.perf_counter() - start
+        self.stats["frames"] += 1
+        self.stats["run"] += ran
+        self.stats["last_ms"] = round(elapsed * 1000.0, 3)
+        if ran and elapsed > (self.budget if budget is None else budget) * 1.5:
+            self.stats["over_budget"] += 1
+        return ran
+
+    def drain(self):
+        """Run everything queued, ignoring the budget (shutdown, headless use)."""
+        while self.run_frame(budget=float("inf")) or self._waiting:
+            if not self._heap:
+                time.sleep(0.001)
+
+    # --- internals ---
+    def _push(self, task: _Task):
+        heapq.heappush(self._heap, (task.priority, task.order, next(self._ids), task))
+
+    def _wake_waiting(self):
+        cancelled = []
+        with self._lock:
+            still = []
+            for task, future in self._waiting:
+                if task.cancelled:
+                    cancelled.append(task)
+                elif future.done():
+                    self._push(task)
+                else:
+                    still.append((task, future))
+            self._waiting = still
+        # Outside the lock: a generator's cleanup may post again
+        for task in cancelled:
+            task.gen.close()
+
+    def _pop(self) -> Optional[_Task]:
+        while True:
+            with self._lock:
+                if not self._heap:
+                    return None
+                task = heapq.heappop(self._heap)[3]
+                if not task.cancelled:
+                    if task.key is not None and self._keyed.get(task.key) is task:
+                        del self._keyed[task.key]
+                    return task
+            if task.gen is not None:
+                task.gen.close()
+
+    def _run(self, task: _Task):
+        try:
+            if task.gen is None:
+                result = task.fn(*task.args)
+                if not inspect.isgenerator(result):
+                    return
+                task.gen = result
+            waiting_on = next(task.gen)
+        except StopIteration:
+            return
+        except Exception as e:
+            self.stats["errors"] += 1
+            print("Scheduler task error:", e)
+            return
+        with self._lock:
+            # A newer post with the same key supersedes the rest of this job
+            superseded = task.key is not None and task.key in self._keyed
+            if not superseded:
+                if task.key is not None:
+                    self._keyed[task.key] = task
+                if callable(getattr(waiting_on, "done", None)) and not waiting_on.done():
+                    self._waiting.append((task, waiting_on))
+                else:
+                    # Same order: the job keeps its place ahead of work posted after it
+                    self._push(task)
+        if superseded:
+            task.gen.close()
+
+
+SCHEDULER = FrameScheduler()
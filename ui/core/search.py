@@ -0,0 +1,372 @@
+"""ui.core.search
+
+Full-text and symbol index over graph nodes and workspace files for Omega-Visual.
+
+`SearchIndex` is an inverted trigram index: a substring query intersects
+the posting sets of its trigrams (smallest first) and only verifies the
+survivors, so lookups do not scan every document. Queries shorter than a
+trigram use a sorted word list instead. `Indexer` keeps it current:
+workspace files are indexed by one scan on a background thread, then
+re-read from the change events of the editor's `FileWatcher`, and nodes
+are re-indexed from journal notifications.
+
+The contents of text files are indexed in blocks of `TEXT_BLOCK_LINES`
+lines, one document per block; a match in a block is reported with the
+line it falls on (`SearchHit.line`) and that line as its label.
+"""
+import bisect
+import heapq
+import itertools
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .filewatch import FileWatcher
+from .graph import Graph
+from .history import AddNode, Batch, Journal, Op, RemoveNode, SetMeta
+from .nodes import Node
+
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+_SYMBOL_RE = re.compile(r"^[ \t]*(?:async[ \t]+)?(def|class)[ \t]+([A-Za-z_][A-Za-z0-9_]*)", re.MULTILINE)
+
+SKIP_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox"}
+# The editor's own files next to the project (project.json.wal, .results/ shards, ...), never indexed
+ARTIFACT_DIR_SUFFIXES = (".results", ".groups")
+ARTIFACT_FILE_SUFFIXES = (".wal", ".wal.tmp", ".autosave", ".import-cache.json", ".tmp")
+SYMBOL_EXTENSIONS = (".py",)
+MAX_SYMBOL_FILE_SIZE = 2 * 1024 * 1024
+# Files whose contents are full-text indexed
+TEXT_EXTENSIONS = (".py", ".pyi", ".md", ".rst", ".txt", ".json", ".toml", ".cfg", ".ini", ".yaml", ".yml",
+                   ".js", ".ts", ".html", ".css", ".sh", ".ps1")
+MAX_TEXT_FILE_SIZE = 1024 * 1024
+TEXT_BLOCK_LINES = 64
+
+
+@dataclass
+class SearchHit:
+    doc_id: str
+    kind: str  # "node" | "file" | "symbol" | "text"
+    label: str
+    target: str  # node id or file path
+    line: int = 0  # 1-based; for "text", the block's first line until a match places it
+    # "text" blocks only: the block as written, for the label (the index keeps it lowercased)
+    source: str = field(default="", repr=False)
+
+
+def skip_dir(name: str) -> bool:
+    return name in SKIP_DIRS or name.startswith(".") or name.endswith(ARTIFACT_DIR_SUFFIXES)
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs: Dict[str, Tuple[str, SearchHit]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        # Sorted lowercase words -> docs, for one- and two-character queries
+        self._words: List[str] = []
+        self._word_docs: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: str, text: str, hit: SearchHit):
+        text = text.lower()
+        with self._lock:
+            old = self._docs.get(doc_id)
+            if old is not None and old[0] == text:
+                self._docs[doc_id] = (text, hit)
+                return
+            old_text = old[0] if old else ""
+            old_grams, new_grams = _trigrams(old_text), _trigrams(text)
+            for g in old_grams - new_grams:
+                self._discard(self._postings, g, doc_id)
+            for g in new_grams - old_grams:
+                self._postings.setdefault(g, set()).add(doc_id)
+            old_words, new_words = set(_WORD_RE.findall(old_text)), set(_WORD_RE.findall(text))
+            for w in old_words - new_words:
+                self._discard_word(w, doc_id)
+            for w in new_words - old_words:
+                docs = self._word_docs.get(w)
+                if docs is None:
+                    docs = self._word_docs[w] = set()
+                    bisect.insort(self._words, w)
+                docs.add(doc_id)
+            self._docs[doc_id] = (text, hit)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            old = self._docs.pop(doc_id, None)
+            if old is None:
+                return
+            for g in _trigrams(old[0]):
+                self._discard(self._postings, g, doc_id)
+            for w in set(_WORD_RE.findall(old[0])):
+                self._discard_word(w, doc_id)
+
+    def remove_prefix(self, prefix: str):
+        with self._lock:
+            for doc_id in [d for d in self._docs if d.startswith(prefix)]:
+                self.remove(doc_id)
+
+    @staticmethod
+    def _discard(table: Dict[str, Set[str]], key: str, doc_id: str):
+        docs = table.get(key)
+        if docs is not None:
+            docs.discard(doc_id)
+            if not docs:
+                del table[key]
+
+    def _discard_word(self, word: str, doc_id: str):
+        docs = self._word_docs.get(word)
+        if docs is None:
+            return
+        docs.discard(doc_id)
+        if not docs:
+            del self._word_docs[word]
+            i = bisect.bisect_left(self._words, word)
+            if i < len(self._words) and self._words[i] == word:
+                del self._words[i]
+
+    def search(self, query: str, limit: int = 50) -> List[SearchHit]:
+        q = query.strip().lower()
+        if not q:
+            return []
+        # Very common terms match most documents; rank a bounded sample of them
+        cap = max(limit * 20, 1000)
+        with self._lock:
+            if len(q) < 3:
+                candidates: Set[str] = set()
+                i = bisect.bisect_left(self._words, q)
+                while i < len(self._words) and self._words[i].startswith(q) and len(candidates) < cap:
+                    candidates.update(itertools.islice(self._word_docs[self._words[i]], cap))
+                    i += 1
+            else:
+                postings = []
+                for g in _trigrams(q):
+                    docs = self._postings.get(g)
+                    if not docs:
+                        return []
+                    postings.append(docs)
+                postings.sort(key=len)
+                candidates = postings[0].intersection(*postings[1:])
+            matches = []
+            for doc_id in itertools.islice(candidates, cap * 4):
+                text, hit = self._docs[doc_id]
+                pos = text.find(q)
+                if pos < 0:
+                    continue
+                # Prefer matches in the label, at word starts, in short documents
+                in_label = 0 if q in hit.label.lower() else 1
+                word_start = 0 if pos == 0 or not text[pos - 1].isalnum() else 1
+                if hit.kind == "text":
+                    hit = _text_hit(hit, text, pos)
+                matches.append(((in_label, word_start, len(text)), doc_id, hit))
+                if len(matches) >= cap:
+                    break
+        return [hit for _, _, hit in heapq.nsmallest(limit, matches, key=lambda m: (m[0], m[1]))]
+
+
+def _text_hit(block: SearchHit, text: str, pos: int) -> SearchHit:
+    """The hit of a match at `pos` of a text block: its line and, as label, that line as written."""
+    offset = text.count("\n", 0, pos)
+    snippet = block.source.split("\n")[offset].strip()[:80]
+    line = block.line + offset
+    return SearchHit(block.doc_id, "text", f"{block.label}:{line}  {snippet}", block.target, line)
+
+
+def node_text(node: Node) -> str:
+    parts = [node.id, node.title or "", node.type]
+    for key, value in node.meta.items():
+        if key in ("pos", "color"):
+            continue
+        parts.append(f"{key} {value}")
+    return " ".join(parts)
+
+
+class Indexer:
+    """Keeps a SearchIndex in sync with a graph and a workspace directory."""
+
+    def __init__(self, index: SearchIndex, root: str):
+        self.index = index
+        self.root = root
+        self._mtimes: Dict[str, float] = {}
+        # Symbol and text block docs of each file
+        self._file_docs: Dict[str, List[str]] = {}
+        self._graph: Optional[Graph] = None
+        # The initial scan and watcher events both update the file docs
+        self._files_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- graph ---
+    def attach(self, journal: Journal):
+        self._graph = journal.graph
+        self.index_graph(journal.graph)
+        journal.subscribe(self._on_op)
+
+    def index_graph(self, graph: Graph):
+        self.index.remove_prefix("node:")
+        for node in graph.nodes.values():
+            self.index_node(node)
+
+    def index_node(self, node: Node):
+        label = f"{node.title or node.type} ({node.id})"
+        self.index.add(f"node:{node.id}", node_text(node), SearchHit(f"node:{node.id}", "node", label, node.id))
+
+    def _on_op(self, op: Op):
+        if isinstance(op, Batch):
+            for sub in op.ops:
+                self._on_op(sub)
+        elif isinstance(op, AddNode):
+            self.index_node(op.node)
+        elif isinstance(op, RemoveNode):
+            self.index.remove(f"node:{op.node_id}")
+        elif isinstance(op, SetMeta) and self._graph is not None:
+            node = self._graph.nodes.get(op.node_id)
+            if node is not None:
+                self.index_node(node)
+
+    # --- files ---
+    def watch(self, watcher: FileWatcher):
+        """Follow `watcher`'s change events instead of rescanning the workspace."""
+        watcher.subscribe(self._on_changes)
+
+    def start(self):
+        """Index the workspace once, on a background thread; later changes come from `watch`."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="search-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._thread = None
+
+    def set_root(self, root: str):
+        with self._files_lock:
+            self.root = root
+            self.index.remove_prefix("file:")
+            self.index.remove_prefix("sym:")
+            self.index.remove_prefix("text:")
+            self._mtimes.clear()
+            self._file_docs.clear()
+
+    def _run(self):
+        try:
+            self.scan()
+        except Exception as e:
+            print("Indexer scan error:", e)
+
+    def _skipped(self, path: str) -> bool:
+        if path.endswith(ARTIFACT_FILE_SUFFIXES):
+            return True
+        root = os.path.abspath(self.root).rstrip(os.sep) + os.sep
+        if not path.startswith(root):
+            return True  # a file tracked outside the workspace for a file-bound node
+        return any(skip_dir(part) for part in path[len(root):].split(os.sep)[:-1])
+
+    def _on_changes(self, changes: Set[Tuple[str, str]]):
+        # Runs on the watcher thread
+        with self._files_lock:
+            for _, path in sorted(changes, key=lambda c: c[1]):
+                if self._skipped(path):
+                    continue
+                if os.path.isdir(path):
+                    # A directory moved in: its files come with no event of their own
+                    for sub, mtime in self._walk(path):
+                        self._update_file(sub, mtime)
+                    continue
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    mtime = None
+                if mtime is not None:
+                    self._update_file(path, mtime)
+                    continue
+                # Deleted, or a directory whose files are gone with it
+                prefix = path.rstrip(os.sep) + os.sep
+                for gone in [p for p in self._mtimes if p == path or p.startswith(prefix)]:
+                    del self._mtimes[gone]
+                    self._drop_file(gone)
+
+    def _update_file(self, path: str, mtime: float):
+        if self._mtimes.get(path) == mtime:
+            return
+        self._mtimes[path] = mtime
+        self.index_file(path)
+
+    def _walk(self, top: str) -> Iterable[Tuple[str, float]]:
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not skip_dir(entry.name):
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and not entry.name.endswith(ARTIFACT_FILE_SUFFIXES):
+                            try:
+                                yield entry.path, entry.stat().st_mtime
+                            except OSError:
+                                pass
+            except OSError:
+                continue
+
+    def scan(self):
+        """One incremental pass: index new or modified files, drop deleted ones."""
+        with self._files_lock:
+            seen = set()
+            for path, mtime in self._walk(self.root):
+                seen.add(path)
+                self._update_file(path, mtime)
+            for path in [p for p in self._mtimes if p not in seen]:
+                del self._mtimes[path]
+                self._drop_file(path)
+
+    def index_file(self, path: str):
+        rel = os.path.relpath(path, self.root)
+        self.index.add(f"file:{path}", rel, SearchHit(f"file:{path}", "file", rel, path))
+        self._drop_docs(path)
+        is_symbols, is_text = path.endswith(SYMBOL_EXTENSIONS), path.endswith(TEXT_EXTENSIONS)
+        if not (is_symbols or is_text):
+            return
+        try:
+            size = os.path.getsize(path)
+            if size > max(MAX_SYMBOL_FILE_SIZE, MAX_TEXT_FILE_SIZE):
+                return
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                source = f.read()
+        except OSError:
+            return
+        docs = []
+        if is_symbols and size <= MAX_SYMBOL_FILE_SIZE:
+            line, last = 1, 0
+            for match in _SYMBOL_RE.finditer(source):
+                kind, name = match.group(1), match.group(2)
+                line += source.count("\n", last, match.start())
+                last = match.start()
+                doc_id = f"sym:{path}:{line}"
+                self.index.add(doc_id, f"{name} {kind}", SearchHit(doc_id, "symbol", f"{name}  {rel}:{line}", path, line))
+                docs.append(doc_id)
+        if is_text and size <= MAX_TEXT_FILE_SIZE and "\0" not in source:
+            lines = source.split("\n")
+            for first in range(0, len(lines), TEXT_BLOCK_LINES):
+                doc_id = f"text:{path}:{first + 1}"
+                block = "\n".join(lines[first:first + TEXT_BLOCK_LINES])
+                self.index.add(doc_id, block, SearchHit(doc_id, "text", rel, path, first + 1, block))
+                docs.append(doc_id)
+        if docs:
+            self._file_docs[path] = docs
+
+    def _drop_docs(self, path: str):
+        for doc_id in self._file_docs.pop(path, ()):
+            self.index.remove(doc_id)
+
+    def _drop_file(self, path: str):
+        self.index.remove(f"file:{path}")
+        self._drop_docs(path)
@@ -0,0 +1,339 @@
+"""ui.core.shm
+
+Shared-memory transport for large node values.
+
+Values exposing a contiguous buffer (NumPy arrays, bytes, bytearray,
+memoryview) of at least `THRESHOLD` bytes cross the editor/worker
+boundary as a `ShmHandle` naming a `multiprocessing.shared_memory`
+segment, instead of being pickled through a pipe:
+
+- the editor side (`SharedStore`) copies a value into a segment the first
+  time it leaves the process; a value that came back from a worker is
+  already a view of a segment and is passed on by handle, without a copy;
+- the worker side (`Attachments`) maps the inputs of one task as
+  read-only views, returns an input unchanged by its own handle and moves
+  other large outputs into new segments. Node code can allocate its output
+  directly in shared memory with `new_array`, so a chain of nodes moves
+  data without copying it at all.
+
+The editor owns every segment and unlinks it once nothing references it.
+Each view the store hands out counts as a reference until it is garbage
+collected, and `pin`/`release` count the tasks using a handle in a worker.
+
+Arrays and buffers come back read-only: several nodes may be reading the
+same segment. Bytes-like values come back as `memoryview`s.
+"""
+import itertools
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+# Below this a pickle through the pipe is cheaper than a segment
+THRESHOLD = 1024 * 1024
+
+_names = itertools.count()
+
+
+@dataclass(frozen=True)
+class ShmHandle:
+    name: str
+    nbytes: int
+    kind: str  # "ndarray" or "bytes"
+    dtype: Optional[str] = None
+    shape: Optional[Tuple[int, ...]] = None
+
+
+def _is_ndarray(value: Any) -> bool:
+    return type(value).__module__ == "numpy" and type(value).__name__ == "ndarray"
+
+
+def _buffer_of(value: Any) -> Optional[Tuple[memoryview, str, Optional[str], Optional[Tuple[int, ...]]]]:
+    """(bytes view, kind, dtype, shape) of a value that can live in a segment, else None."""
+    try:
+        if _is_ndarray(value):
+            if value.dtype.hasobject or not value.flags.c_contiguous:
+                return None
+            return memoryview(value).cast("B"), "ndarray", value.dtype.str, tuple(value.shape)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            view = memoryview(value)
+            if not view.c_contiguous:
+                return None
+            return view.cast("B"), "bytes", None, None
+    except (TypeError, ValueError):
+        # dtypes without a buffer format (datetime, structured with objects...)
+        return None
+    return None
+
+
+def _new_segment(nbytes: int) -> shared_memory.SharedMemory:
+    # SharedMemory rejects size 0
+    return shared_memory.SharedMemory(create=True, size=max(1, nbytes),
+                                      name=f"omega_{os.getpid()}_{next(_names)}")
+
+
+def _view(buf: memoryview, handle: ShmHandle, writable: bool = False) -> Any:
+    if handle.kind == "ndarray":
+        import numpy
+        array = numpy.ndarray(handle.shape, dtype=numpy.dtype(handle.dtype), buffer=buf)
+        array.flags.writeable = writable
+        return array
+    view = buf[:handle.nbytes]
+    return view if writable else view.toreadonly()
+
+
+def preview(value: Any, limit: int = 60) -> str:
+    """Short text for a value, cheap even for huge arrays and buffers (node labels, logs)."""
+    if _is_ndarray(value):
+        return f"{value.dtype} {tuple(value.shape)}"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"{type(value).__name__} {memoryview(value).nbytes} B"
+    text = repr(value) if isinstance(value, (list, tuple, dict, set, str)) else str(value)
+    if len(text) > limit:
+        size = f" ({len(value)} items)" if hasattr(value, "__len__") else ""
+        return text[:limit - 3] + "..." + size
+    return text
+
+
+# --- editor side ---
+class _Segment:
+    __slots__ = ("shm", "handle", "refs")
+
+    def __init__(self, shm: shared_memory.SharedMemory, handle: ShmHandle):
+        self.shm = shm
+        self.handle = handle
+        self.refs = 0
+
+
+class SharedStore:
+    """Owner of the segments used by one editor process."""
+
+    def __init__(self, threshold: int = THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._segments: Dict[str, _Segment] = {}
+        self._by_view: Dict[int, ShmHandle] = {}  # id of a live view -> its handle
+        self.stats = {"shared": 0, "passed": 0, "adopted": 0, "unlinked": 0, "bytes_copied": 0}
+
+    # --- references ---
+    def pin(self, handle: ShmHandle):
+        with self._lock:
+            self._segments[handle.name].refs += 1
+
+    def release(self, handle: ShmHandle):
+        with self._lock:
+            seg = self._segments.get(handle.name)
+            if seg is None:
+                return
+            seg.refs -= 1
+            if seg.refs > 0:
+                return
+            del self._segments[handle.name]
+            self.stats["unlinked"] += 1
+        self._destroy(seg.shm)
+
+    def release_all(self, handles: List[ShmHandle]):
+        for handle in handles:
+            self.release(handle)
+
+    @staticmethod
+    def _destroy(shm: shared_memory.SharedMemory):
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            shm.close()
+        except BufferError:
+            # A view outlived its reference (e.g. a raw slice); the mapping goes with it
+            pass
+
+    def _drop_view(self, view_id: int, handle: ShmHandle):
+        with self._lock:
+            if self._by_view.get(view_id) == handle:
+                del self._by_view[view_id]
+        self.release(handle)
+
+    # --- values ---
+    def share(self, value: Any) -> Any:
+        """Handle for a large buffer value, pinned once for the caller; other values unchanged."""
+        with self._lock:
+            handle = self._by_view.get(id(value))
+            if handle is not None and handle.name in self._segments:
+                self._segments[handle.name].refs += 1
+                self.stats["passed"] += 1
+                return handle
+        found = _buffer_of(value)
+        if found is None or found[0].nbytes < self.threshold:
+            return value
+        buf, kind, dtype, shape = found
+        shm = _new_segment(buf.nbytes)
+        shm.buf[:buf.nbytes] = buf
+        handle = ShmHandle(shm.name, buf.nbytes, kind, dtype, shape)
+        seg = _Segment(shm, handle)
+        seg.refs = 1
+        with self._lock:
+            self._segments[handle.name] = seg
+            self.stats["shared"] += 1
+            self.stats["bytes_copied"] += buf.nbytes
+        return handle
+
+    def view(self, handle: ShmHandle) -> Any:
+        """Read-only value backed by the segment; the segment lives at least as long as it."""
+        with self._lock:
+            seg = self._segments.get(handle.name)
+            if seg is None:
+                # Created by a worker: the editor takes ownership from here
+                seg = self._segments[handle.name] = _Segment(shared_memory.SharedMemory(name=handle.name), handle)
+                self.stats["adopted"] += 1
+            seg.refs += 1
+            value = _view(seg.shm.buf, handle)
+            self._by_view[id(value)] = handle
+        weakref.finalize(value, self._drop_view, id(value), handle)
+        return value
+
+    def export(self, values: Dict[str, Any]) -> Tuple[Dict[str, Any], List[ShmHandle]]:
+        """`values` with large buffers replaced by handles, and the handles to release afterwards."""
+        out: Dict[str, Any] = {}
+        pins: List[ShmHandle] = []
+        for key, value in values.items():
+            shared = self.share(value)
+            if isinstance(shared, ShmHandle):
+                pins.append(shared)
+            out[key] = shared
+        return out, pins
+
+    def load(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """`values` with handles replaced by views."""
+        return {k: self.view(v) if isinstance(v, ShmHandle) else v for k, v in values.items()}
+
+    def live(self) -> int:
+        with self._lock:
+            return len(self._segments)
+
+    def close(self):
+        with self._lock:
+            segments = list(self._segments.values())
+            self._segments.clear()
+            self._by_view.clear()
+        for seg in segments:
+            self._destroy(seg.shm)
+
+
+# --- worker side ---
+_CURRENT: Optional["Attachments"] = None
+# Mappings whose views were still referenced when their task ended
+_LINGERING: List[shared_memory.SharedMemory] = []
+
+
+def new_array(shape, dtype="float64"):
+    """Writable array for a node's output; in a worker it is allocated in shared memory.
+
+    Returning it as an output hands the segment to the editor without a copy.
+    Outside a worker task this is `numpy.empty`.
+    """
+    import numpy
+    if _CURRENT is None:
+        return numpy.empty(shape, dtype=dtype)
+    return _CURRENT.allocate(shape, dtype)
+
+
+class Attachments:
+    """Segments mapped or created by a worker for one task.
+
+    Segments created here and returned as outputs are left for the editor
+    to adopt; the others (scratch arrays, outputs of a failed task) are
+    unlinked when the task ends.
+    """
+
+    def __init__(self, threshold: Optional[int]):
+        self.threshold = threshold
+        self._mapped: List[shared_memory.SharedMemory] = []
+        self._created: List[shared_memory.SharedMemory] = []
+        self._known: Dict[int, Tuple[Any, ShmHandle]] = {}  # id(view) -> (view, handle)
+        self._returned: set = set()
+        self.mapped_bytes = 0
+
+    def __enter__(self) -> "Attachments":
+        global _CURRENT
+        _CURRENT = self
+        return self
+
+    def __exit__(self, *exc):
+        global _CURRENT
+        _CURRENT = None
+        self.close()
+
+    def resolve(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        out = {}
+        for key, value in values.items():
+            if isinstance(value, ShmHandle):
+                shm = shared_memory.SharedMemory(name=value.name)
+                self._mapped.append(shm)
+                self.mapped_bytes += value.nbytes
+                handle, value = value, _view(shm.buf, value)
+                self._known[id(value)] = (value, handle)
+            out[key] = value
+        return out
+
+    def _create(self, nbytes: int) -> shared_memory.SharedMemory:
+        shm = _new_segment(nbytes)
+        self._mapped.append(shm)
+        self._created.append(shm)
+        return shm
+
+    def allocate(self, shape, dtype):
+        import numpy
+        dtype = numpy.dtype(dtype)
+        shape = tuple(shape) if isinstance(shape, (tuple, list)) else (int(shape),)
+        nbytes = int(numpy.prod(shape, dtype=numpy.int64)) * dtype.itemsize
+        shm = self._create(nbytes)
+        handle = ShmHandle(shm.name, nbytes, "ndarray", dtype.str, shape)
+        array = _view(shm.buf, handle, writable=True)
+        self._known[id(array)] = (array, handle)
+        return array
+
+    def export(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        if self.threshold is None:
+            return values
+        out = {}
+        for key, value in values.items():
+            known = self._known.get(id(value))
+            if known is not None:
+                value = known[1]
+            else:
+                found = _buffer_of(value)
+                if found is not None and found[0].nbytes >= self.threshold:
+                    buf, kind, dtype, shape = found
+                    shm = self._create(buf.nbytes)
+                    shm.buf[:buf.nbytes] = buf
+                    value = ShmHandle(shm.name, buf.nbytes, kind, dtype, shape)
+            if isinstance(value, ShmHandle):
+                self._returned.add(value.name)
+            out[key] = value
+        return out
+
+    def discard_returned(self):
+        """The outputs could not be sent: nobody will adopt their segments."""
+        self._returned.clear()
+
+    def close(self):
+        for shm in self._created:
+            if shm.name not in self._returned:
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+        self._known.clear()
+        self._created = []
+        self._returned = set()
+        pending = _LINGERING + self._mapped
+        _LINGERING.clear()
+        self._mapped = []
+        for shm in pending:
+            try:
+                shm.close()
+            except BufferError:
+                _LINGERING.append(shm)
@@ -0,0 +1,235 @@
+"""ui.core.spatial
+
+Uniform-grid spatial index over node positions for Omega-Visual.
+
+Nodes are bucketed into square cells by their rectangle. Rectangle queries
+only visit the cells they overlap, placement (`free_offset`, `free_spot`)
+tries positions ring by ring around the wanted one with such queries, and
+bounds come from the sorted set of occupied rows and columns, so none of
+them scan every node. The index follows the
+journal, so drags update it incrementally.
+"""
+import bisect
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .graph import Graph
+from .history import AddNode, Batch, Journal, MoveNode, Op, RemoveNode
+
+Rect = Tuple[float, float, float, float]
+Cell = Tuple[int, int]
+
+# Approximate on-canvas node size; DearPyGui only knows the real one after rendering
+DEFAULT_NODE_SIZE = (160.0, 80.0)
+# Space left between a placed node and its neighbours
+PLACEMENT_GAP = 20.0
+
+
+class _Axis:
+    """Occupancy counts per row or column, with the occupied keys kept sorted."""
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self._sorted: List[int] = []
+
+    def add(self, key: int):
+        count = self._counts.get(key, 0)
+        if count == 0:
+            bisect.insort(self._sorted, key)
+        self._counts[key] = count + 1
+
+    def remove(self, key: int):
+        count = self._counts.get(key, 0) - 1
+        if count <= 0:
+            self._counts.pop(key, None)
+            i = bisect.bisect_left(self._sorted, key)
+            if i < len(self._sorted) and self._sorted[i] == key:
+                del self._sorted[i]
+        else:
+            self._counts[key] = count
+
+    def first(self) -> Optional[int]:
+        return self._sorted[0] if self._sorted else None
+
+    def last(self) -> Optional[int]:
+        return self._sorted[-1] if self._sorted else None
+
+
+class SpatialIndex:
+    def __init__(self, cell_size: float = 256.0, node_size: Tuple[float, float] = DEFAULT_NODE_SIZE):
+        self.cell_size = float(cell_size)
+        self.node_size = node_size
+        self._rects: Dict[str, Rect] = {}
+        self._cells: Dict[Cell, Set[str]] = {}
+        self._item_cells: Dict[str, List[Cell]] = {}
+        self._cols = _Axis()
+        self._rows = _Axis()
+        self._col_cells: Dict[int, Set[int]] = {}
+        self._row_cells: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._rects
+
+    def _cell_of(self, x: float, y: float) -> Cell:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def _cells_for(self, rect: Rect) -> List[Cell]:
+        c0x, c0y = self._cell_of(rect[0], rect[1])
+        c1x, c1y = self._cell_of(rect[2], rect[3])
+        return [(cx, cy) for cx in range(c0x, c1x + 1) for cy in range(c0y, c1y + 1)]
+
+    # --- maintenance ---
+    def insert(self, node_id: str, x: float, y: float, w: Optional[float] = None, h: Optional[float] = None):
+        if node_id in self._rects:
+            self.remove(node_id)
+        w = self.node_size[0] if w is None else w
+        h = self.node_size[1] if h is None else h
+        rect = (float(x), float(y), float(x) + w, float(y) + h)
+        cells = self._cells_for(rect)
+        self._rects[node_id] = rect
+        self._item_cells[node_id] = cells
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                bucket = self._cells[cell] = set()
+                self._cols.add(cell[0])
+                self._rows.add(cell[1])
+                self._col_cells.setdefault(cell[0], set()).add(cell[1])
+                self._row_cells.setdefault(cell[1], set()).add(cell[0])
+            bucket.add(node_id)
+
+    update = insert
+
+    def remove(self, node_id: str):
+        self._rects.pop(node_id, None)
+        for cell in self._item_cells.pop(node_id, []):
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                continue
+            bucket.discard(node_id)
+            if not bucket:
+                del self._cells[cell]
+                self._cols.remove(cell[0])
+                self._rows.remove(cell[1])
+                self._col_cells[cell[0]].discard(cell[1])
+                if not self._col_cells[cell[0]]:
+                    del self._col_cells[cell[0]]
+                self._row_cells[cell[1]].discard(cell[0])
+                if not self._row_cells[cell[1]]:
+                    del self._row_cells[cell[1]]
+
+    def clear(self):
+        self.__init__(self.cell_size, self.node_size)
+
+    def rect(self, node_id: str) -> Optional[Rect]:
+        return self._rects.get(node_id)
+
+    # --- queries ---
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[str]:
+        """Ids of nodes whose rectangle intersects the given one."""
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        c0x, c0y = self._cell_of(x0, y0)
+        c1x, c1y = self._cell_of(x1, y1)
+        found: Set[str] = set()
+        result: List[str] = []
+        # Large queries over a sparse canvas: walk occupied cells instead of the whole range
+        if (c1x - c0x + 1) * (c1y - c0y + 1) > len(self._cells):
+            cells: Iterable[Cell] = (c for c in self._cells if c0x <= c[0] <= c1x and c0y <= c[1] <= c1y)
+        else:
+            cells = ((cx, cy) for cx in range(c0x, c1x + 1) for cy in range(c0y, c1y + 1))
+        for cell in cells:
+            for nid in self._cells.get(cell, ()):
+                if nid in found:
+                    continue
+                found.add(nid)
+                r = self._rects[nid]
+                if r[0] <= x1 and r[2] >= x0 and r[1] <= y1 and r[3] >= y0:
+                    result.append(nid)
+        return result
+
+    def is_free(self, x: float, y: float, w: Optional[float] = None, h: Optional[float] = None, ignore: Iterable[str] = ()) -> bool:
+        w = self.node_size[0] if w is None else w
+        h = self.node_size[1] if h is None else h
+        skip = set(ignore)
+        return not [n for n in self.query_rect(x, y, x + w, y + h) if n not in skip]
+
+    def free_offset(self, points: List[Tuple[float, float]], w: Optional[float] = None,
+                    h: Optional[float] = None, max_rings: int = 8) -> Tuple[float, float]:
+        """Smallest shift, in node-size steps ring by ring, that puts a node at every point on free space.
+
+        (0, 0) if the points are free already or nothing within `max_rings`
+        is; the check stops at the first occupied point of a candidate.
+        """
+        w = self.node_size[0] if w is None else w
+        h = self.node_size[1] if h is None else h
+        step_x, step_y = w + PLACEMENT_GAP, h + PLACEMENT_GAP
+        for ring in range(max_rings + 1):
+            # Closest first; on ties, to the right and below before left and above
+            for i, j in sorted(self._ring(0, 0, ring), key=lambda c: (c[0] * c[0] + c[1] * c[1], c[1] < 0, c[0] < 0)):
+                dx, dy = i * step_x, j * step_y
+                if all(self.is_free(x + dx, y + dy, w, h) for x, y in points):
+                    return dx, dy
+        return 0.0, 0.0
+
+    def free_spot(self, x: float, y: float) -> Tuple[float, float]:
+        """Nearest free position for one node at or around (x, y)."""
+        dx, dy = self.free_offset([(x, y)])
+        return x + dx, y + dy
+
+    @staticmethod
+    def _ring(cx: int, cy: int, r: int) -> Iterable[Cell]:
+        if r == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-r, r + 1):
+            yield (cx + dx, cy - r)
+            yield (cx + dx, cy + r)
+        for dy in range(-r + 1, r):
+            yield (cx - r, cy + dy)
+            yield (cx + r, cy + dy)
+
+    def bounds(self) -> Optional[Rect]:
+        """Bounding rectangle of all indexed nodes, or None when empty."""
+        if not self._rects:
+            return None
+        col0, col1 = self._cols.first(), self._cols.last()
+        row0, row1 = self._rows.first(), self._rows.last()
+        minx = min(self._rects[n][0] for cy in self._col_cells[col0] for n in self._cells[(col0, cy)])
+        maxx = max(self._rects[n][2] for cy in self._col_cells[col1] for n in self._cells[(col1, cy)])
+        miny = min(self._rects[n][1] for cx in self._row_cells[row0] for n in self._cells[(cx, row0)])
+        maxy = max(self._rects[n][3] for cx in self._row_cells[row1] for n in self._cells[(cx, row1)])
+        return (minx, miny, maxx, maxy)
+
+    # --- graph / journal integration ---
+    def rebuild(self, graph: Graph):
+        self.clear()
+        for node in graph.nodes.values():
+            pos = node.meta.get("pos")
+            if pos:
+                self.insert(node.id, pos[0], pos[1])
+
+    def attach(self, journal: Journal):
+        self.rebuild(journal.graph)
+        journal.subscribe(self._on_op)
+
+    def _on_op(self, op: Op):
+        if isinstance(op, Batch):
+            for sub in op.ops:
+                self._on_op(sub)
+        elif isinstance(op, AddNode):
+            pos = op.node.meta.get("pos")
+            if pos:
+                self.insert(op.node.id, pos[0], pos[1])
+        elif isinstance(op, RemoveNode):
+            self.remove(op.node_id)
+        elif isinstance(op, MoveNode):
+            if op.new is None:
+                self.remove(op.node_id)
+            else:
+                self.insert(op.node_id, op.new[0], op.new[1])
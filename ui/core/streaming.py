@@ -0,0 +1,310 @@
+"""ui.core.streaming
+
+Streaming evaluation: values flow through the graph as chunks.
+
+`StreamRun` starts one thread per node. Every link is a `LinkQueue`
+holding at most `queue_size` chunks; a producer blocks while a queue it
+writes to is full, so a slow consumer slows everything upstream of it and
+memory stays bounded by the queues whatever the size of the data.
+
+A node type with a `stream` implementation gets its linked inputs as
+iterators of chunks and returns {port: iterable of chunks}; iterables may
+be async iterators. Other types are mapped over their inputs: their usual
+implementation runs once per set of chunks (one chunk from each linked
+input), and a node without linked inputs runs once and emits its outputs
+as single chunks. A consumer that stops early (e.g. one input ended)
+releases its queues, and a producer whose outputs are all released stops.
+
+Each queue counts chunks, bytes and the time its producer spent blocked,
+which `link_stats` reports for display. Every chunk is also published to
+the evaluator's telemetry channel, which keeps only the latest.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .graph import LinkKey, link_key
+from .links import Link
+from .nodes import Node
+
+DEFAULT_QUEUE_SIZE = 8
+
+
+def chunk_size(chunk: Any) -> int:
+    nbytes = getattr(chunk, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(chunk, (bytes, bytearray, str)):
+        return len(chunk)
+    return 0
+
+
+class LinkQueue:
+    """Bounded chunk queue for one link."""
+
+    def __init__(self, link: Link, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.link = link
+        self.maxsize = max(1, maxsize)
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self._writer_done = False
+        self._reader_gone = False
+        self.chunks = 0
+        self.bytes = 0
+        self.blocked = 0.0  # seconds the producer waited for room
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def put(self, chunk: Any) -> bool:
+        """Queue a chunk, waiting for room; False once the consumer is gone."""
+        with self._cond:
+            if len(self._items) >= self.maxsize and not self._reader_gone:
+                waited = time.perf_counter()
+                while len(self._items) >= self.maxsize and not self._reader_gone:
+                    self._cond.wait()
+                self.blocked += time.perf_counter() - waited
+            if self._reader_gone:
+                return False
+            if self.started is None:
+                self.started = time.perf_counter()
+            self._items.append(chunk)
+            self.chunks += 1
+            self.bytes += chunk_size(chunk)
+            self._cond.notify_all()
+            return True
+
+    def close(self):
+        """No more chunks will be put."""
+        with self._cond:
+            self._writer_done = True
+            self.finished = time.perf_counter()
+            self._cond.notify_all()
+
+    def release(self):
+        """The consumer will not read any more: drop what is queued and unblock the producer."""
+        with self._cond:
+            self._reader_gone = True
+            self._items.clear()
+            self._cond.notify_all()
+
+    @property
+    def released(self) -> bool:
+        return self._reader_gone
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            with self._cond:
+                while not self._items and not self._writer_done and not self._reader_gone:
+                    self._cond.wait()
+                if not self._items:
+                    return
+                chunk = self._items.popleft()
+                self._cond.notify_all()
+            yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            start = self.started
+            end = self.finished if self.finished is not None else time.perf_counter()
+            elapsed = (end - start) if start is not None else 0.0
+            return {
+                "chunks": self.chunks,
+                "bytes": self.bytes,
+                "queued": len(self._items),
+                "blocked_s": round(self.blocked, 3),
+                "bytes_per_s": self.bytes / elapsed if elapsed > 0 else 0.0,
+                "chunks_per_s": self.chunks / elapsed if elapsed > 0 else 0.0,
+                "done": self._writer_done,
+            }
+
+
+def _sync(iterable: Any) -> Iterator[Any]:
+    """Iterate an iterable or an async iterable from a plain thread."""
+    if hasattr(iterable, "__aiter__"):
+        loop = asyncio.new_event_loop()
+        agen = iterable.__aiter__()
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            aclose = getattr(agen, "aclose", None)
+            if aclose is not None:
+                loop.run_until_complete(aclose())
+            loop.close()
+    else:
+        yield from iterable
+
+
+def _round_robin(outputs: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    """(port, chunk) events from several output iterables, taken in turn so none starves."""
+    live = [(port, _sync(values)) for port, values in outputs.items() if values is not None]
+    while live:
+        still = []
+        for port, it in live:
+            try:
+                chunk = next(it)
+            except StopIteration:
+                continue
+            still.append((port, it))
+            yield port, chunk
+        live = still
+
+
+class StreamRun:
+    """One streaming run over an evaluator's graph (see module docstring)."""
+
+    def __init__(self, evaluator, queue_size: int = DEFAULT_QUEUE_SIZE, on_done: Optional[Callable[["StreamRun"], None]] = None):
+        self.evaluator = evaluator
+        self.graph = evaluator.graph
+        self.queue_size = queue_size
+        self.on_done = on_done
+        # Latest chunk emitted on each output port
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.errors: Dict[str, str] = {}
+        self.queues: Dict[LinkKey, LinkQueue] = {}
+        self._threads: List[threading.Thread] = []
+        self._stopped = threading.Event()
+        self._remaining = 0
+        self._lock = threading.Lock()
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def start(self) -> "StreamRun":
+        order = self.evaluator.topological_order(set(self.graph.nodes))
+        placed = set(order)
+        for link in self.graph.links:
+            if link.start_node in placed and link.end_node in placed:
+                self.queues[link_key(link)] = LinkQueue(link, self.queue_size)
+        self._remaining = len(order)
+        self.started = time.perf_counter()
+        for nid in order:
+            node = self.graph.nodes[nid]
+            t = threading.Thread(target=self._stage, args=(node,), name=f"stream-{nid}", daemon=True)
+            self._threads.append(t)
+        for t in self._threads:
+            t.start()
+        if not self._threads:
+            self._finish_stage()
+        return self
+
+    def stop(self):
+        """Abort: every queue is released, so each stage ends at its next put or get."""
+        self._stopped.set()
+        for q in self.queues.values():
+            q.release()
+            q.close()
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for t in self._threads:
+            t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not self.running
+
+    def link_stats(self) -> Dict[LinkKey, Dict[str, Any]]:
+        return {key: q.stats() for key, q in self.queues.items()}
+
+    # --- stages ---
+    def _links(self, node_id: str) -> Tuple[Dict[str, LinkQueue], Dict[str, List[LinkQueue]], List[LinkQueue]]:
+        inputs: Dict[str, LinkQueue] = {}
+        outputs: Dict[str, List[LinkQueue]] = {}
+        extra: List[LinkQueue] = []
+        for link in self.graph.links_of(node_id):
+            q = self.queues.get(link_key(link))
+            if q is None:
+                continue
+            if link.end_node == node_id:
+                # One stream per port, as inputs_for keeps one value per port
+                if link.end_port in inputs:
+                    extra.append(inputs[link.end_port])
+                inputs[link.end_port] = q
+            if link.start_node == node_id:
+                outputs.setdefault(link.start_port, []).append(q)
+        return inputs, outputs, extra
+
+    def _stage(self, node: Node):
+        inputs, outputs, extra = self._links(node.id)
+        for q in extra:
+            q.release()
+        telemetry = self.evaluator.telemetry
+        try:
+            events = _round_robin(self._open(node, inputs))
+            for port, chunk in events:
+                if self._stopped.is_set():
+                    break
+                with self._lock:
+                    self.results.setdefault(node.id, {})[port] = chunk
+                if telemetry is not None:
+                    telemetry.publish(f"{node.id}.{port}", chunk)
+                for q in outputs.get(port, ()):
+                    q.put(chunk)
+                if outputs and all(q.released for qs in outputs.values() for q in qs):
+                    break  # every consumer is gone: stop producing
+        except Exception as e:
+            with self._lock:
+                self.errors[node.id] = f"{type(e).__name__}: {e}"
+        finally:
+            for qs in outputs.values():
+                for q in qs:
+                    q.close()
+            for q in inputs.values():
+                q.release()
+            self._finish_stage()
+
+    def _open(self, node: Node, inputs: Dict[str, LinkQueue]) -> Dict[str, Any]:
+        nt = self.evaluator.registry.get(node.type)
+        streamed = nt.stream_implementation() if nt is not None else None
+        if streamed is not None:
+            return streamed({port: iter(q) for port, q in inputs.items()}, self.evaluator.meta_for(node)) or {}
+        if not inputs:
+            return {port: [value] for port, value in self._call(node, {}).items()}
+        return self._mapped(node, inputs)
+
+    def _call(self, node: Node, values: Dict[str, Any]) -> Dict[str, Any]:
+        outputs = self.evaluator.run_node(node, values)
+        if isinstance(outputs, Future):
+            outputs = outputs.result()
+        return outputs or {}
+
+    def _mapped(self, node: Node, inputs: Dict[str, LinkQueue]) -> Dict[str, Any]:
+        ports = list(inputs)
+        rows = zip(*(iter(inputs[p]) for p in ports))
+        per_port = {port: deque() for port in node.outputs}
+
+        def results():
+            for row in rows:
+                yield self._call(node, dict(zip(ports, row)))
+
+        it = results()
+
+        def port_stream(port: str):
+            # Ports are consumed in turn by _round_robin: each result fills every port's deque
+            while True:
+                if not per_port[port]:
+                    try:
+                        outputs = next(it)
+                    except StopIteration:
+                        return
+                    for p in per_port:
+                        per_port[p].append(outputs.get(p))
+                yield per_port[port].popleft()
+
+        return {port: port_stream(port) for port in node.outputs}
+
+    def _finish_stage(self):
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining <= 0
+        if last:
+            self.elapsed = time.perf_counter() - self.started
+            if self.on_done is not None:
+                self.on_done(self)
@@ -0,0 +1,162 @@
+"""ui.core.telemetry
+
+Lossy telemetry channel from evaluation to the realtime variables panel.
+
+The evaluator publishes every output it stores as a variable named
+"<node>.<port>". Publishing is O(1) and never blocks: for a watched
+variable the channel overwrites its latest value (older ones are simply
+lost) and, for numbers, folds the value into the current time bucket of
+a min/max series. Unwatched variables cost a set lookup.
+
+Readers pull instead of being pushed to: `take_changed` returns the
+variables updated since the previous call, and `read` their latest value
+and series. A panel refreshing at a fixed rate therefore costs the same
+whether a variable changed once or ten thousand times in between, and
+the series of a variable has at most `history` buckets whatever its
+update rate.
+"""
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+# A bucket: [bucket index, min, max, count]
+Bucket = List[float]
+
+
+def _number(value: Any) -> Optional[float]:
+    """`value` as a float for the series, if it is a real scalar (Python or NumPy)."""
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif type(value).__module__ == "numpy" and getattr(value, "ndim", None) == 0 and value.dtype.kind in "biuf":
+        number = float(value)
+    else:
+        return None
+    return number if math.isfinite(number) else None
+
+
+@dataclass
+class Variable:
+    name: str
+    value: Any = None
+    updated: float = 0.0
+    updates: int = 0
+    series: Deque[Bucket] = field(default_factory=deque)
+
+
+class Telemetry:
+    def __init__(self, bucket_seconds: float = 0.1, history: int = 300):
+        self.bucket_seconds = bucket_seconds
+        self.history = history
+        self._lock = threading.Lock()
+        self._vars: Dict[str, Variable] = {}
+        self._watched: Set[str] = set()
+        self._watch_all = False
+        self._changed: Set[str] = set()
+        # Bumped when the watched set changes, so readers know to re-list
+        self.watch_version = 0
+        self.stats = {"published": 0, "overwritten": 0}
+
+    # --- watching ---
+    def watch(self, *names: str):
+        with self._lock:
+            self._watched.update(names)
+            self.watch_version += 1
+
+    def unwatch(self, *names: str):
+        with self._lock:
+            self._watched.difference_update(names)
+            for name in names:
+                self._vars.pop(name, None)
+                self._changed.discard(name)
+            self.watch_version += 1
+
+    @property
+    def watch_all(self) -> bool:
+        return self._watch_all
+
+    @watch_all.setter
+    def watch_all(self, on: bool):
+        with self._lock:
+            self._watch_all = on
+            if not on:
+                for name in [n for n in self._vars if n not in self._watched]:
+                    del self._vars[name]
+                self._changed &= self._watched
+            self.watch_version += 1
+
+    def watching(self, name: str) -> bool:
+        return self._watch_all or name in self._watched
+
+    # --- writers ---
+    def publish(self, name: str, value: Any, now: Optional[float] = None):
+        if not (self._watch_all or name in self._watched):
+            return
+        now = time.monotonic() if now is None else now
+        number = _number(value)
+        with self._lock:
+            var = self._vars.get(name)
+            if var is None:
+                var = self._vars[name] = Variable(name, series=deque(maxlen=self.history))
+                self.watch_version += int(self._watch_all)
+            if name in self._changed:
+                self.stats["overwritten"] += 1
+            var.value = value
+            var.updated = now
+            var.updates += 1
+            self._changed.add(name)
+            self.stats["published"] += 1
+            if number is None:
+                return
+            bucket = now // self.bucket_seconds
+            series = var.series
+            if series and series[-1][0] == bucket:
+                last = series[-1]
+                last[1] = min(last[1], number)
+                last[2] = max(last[2], number)
+                last[3] += 1
+            else:
+                series.append([bucket, number, number, 1])
+
+    def publish_outputs(self, node_id: str, outputs: Dict[str, Any]):
+        if not self._watch_all and not self._watched:
+            return
+        for port, value in outputs.items():
+            self.publish(f"{node_id}.{port}", value)
+
+    # --- readers ---
+    def names(self) -> List[str]:
+        """Variables with at least one value, sorted."""
+        with self._lock:
+            return sorted(self._vars)
+
+    def take_changed(self) -> Set[str]:
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            return changed
+
+    def read(self, name: str) -> Optional[Variable]:
+        """Copy of a variable (value reference, series list) safe to use outside the lock."""
+        with self._lock:
+            var = self._vars.get(name)
+            if var is None:
+                return None
+            return Variable(var.name, var.value, var.updated, var.updates, deque(list(b) for b in var.series))
+
+    def read_many(self, names: Iterable[str]) -> Dict[str, Variable]:
+        out = {}
+        for name in names:
+            var = self.read(name)
+            if var is not None:
+                out[name] = var
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._vars.clear()
+            self._changed.clear()
+            self.watch_version += 1
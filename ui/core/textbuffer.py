@@ -0,0 +1,258 @@
+"""ui.core.textbuffer
+
+Piece table for editor text.
+
+The text is a sequence of pieces, each a slice of an immutable buffer:
+the file as it was read, or the text of one insertion. An edit splits at
+most two pieces and adds one, so it costs the size of the edit plus the
+length of the piece list, never a copy of the document. Every buffer
+knows the offsets of its newlines, so a piece's line count is a bisect
+and line `n` is found by bisecting prefix sums over the pieces and then
+the newlines of one buffer.
+
+Consecutive typing is coalesced: an insertion right after the previous
+one extends its piece while that piece is short (`COALESCE_CHARS`), so a
+typed paragraph does not leave a piece per keystroke.
+
+Listeners registered with `subscribe` are told, for every edit, the line
+it starts on and how many newlines it removed and added (syntax
+highlighting re-lexes from there). `snapshot` is a frozen copy sharing the
+pieces, for readers on other threads.
+
+`save` writes the pieces one by one to a temporary file and renames it
+over the target, without joining the document into one string.
+"""
+import os
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Callable, Iterator, List, Optional, Tuple
+
+COALESCE_CHARS = 4096
+_NEWLINE = re.compile("\n")
+
+
+class _Buffer:
+    __slots__ = ("text", "newlines")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.newlines = [m.start() for m in _NEWLINE.finditer(text)]
+
+    def count(self, start: int, end: int) -> int:
+        """Newlines in text[start:end]."""
+        return bisect_left(self.newlines, end) - bisect_left(self.newlines, start)
+
+
+# listener(first line, newlines removed, newlines added)
+EditListener = Callable[[int, int, int], None]
+
+# (buffer, start, end, newlines in text[start:end])
+Piece = Tuple[_Buffer, int, int, int]
+
+
+def _piece(buf: _Buffer, start: int, end: int) -> Piece:
+    return buf, start, end, buf.count(start, end)
+
+
+class PieceTable:
+    def __init__(self, text: str = ""):
+        self._pieces: List[Piece] = [_piece(_Buffer(text), 0, len(text))] if text else []
+        self._length = len(text)
+        # Prefix sums over _pieces (chars, newlines), rebuilt after an edit when needed
+        self._starts: Optional[List[int]] = None
+        self._lines: Optional[List[int]] = None
+        # Piece index and buffer of the last insertion, for coalescing
+        self._last: Optional[Tuple[int, _Buffer]] = None
+        self.version = 0
+        self.saved_version = 0
+        self._listeners: List[EditListener] = []
+
+    @classmethod
+    def from_file(cls, path: str, encoding: str = "utf-8") -> "PieceTable":
+        # Undecodable bytes become lone surrogates and are written back as the same bytes by save()
+        with open(path, "r", encoding=encoding, errors="surrogateescape", newline="") as f:
+            return cls(f.read())
+
+    def subscribe(self, listener: EditListener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: EditListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, line: int, removed: int, added: int):
+        for listener in self._listeners:
+            listener(line, removed, added)
+
+    def snapshot(self) -> "PieceTable":
+        """Read-only copy at the current version; costs a copy of the piece list, not the text."""
+        copy = PieceTable()
+        copy._pieces = list(self._pieces)
+        copy._length = self._length
+        copy.version = copy.saved_version = self.version
+        return copy
+
+    # --- size ---
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def modified(self) -> bool:
+        return self.version != self.saved_version
+
+    @property
+    def piece_count(self) -> int:
+        return len(self._pieces)
+
+    def line_count(self) -> int:
+        self._index()
+        return self._lines[-1] + 1
+
+    # --- index ---
+    def _index(self):
+        if self._starts is None:
+            self._starts = [0, *accumulate(p[2] - p[1] for p in self._pieces)]
+            self._lines = [0, *accumulate(p[3] for p in self._pieces)]
+
+    def _invalidate(self):
+        self._starts = self._lines = None
+        self.version += 1
+
+    def _locate(self, offset: int) -> Tuple[int, int]:
+        """(piece index, offset in that piece) of a document offset; the end maps past the last piece."""
+        self._index()
+        i = bisect_right(self._starts, offset) - 1
+        if i >= len(self._pieces):
+            return len(self._pieces), 0
+        return i, offset - self._starts[i]
+
+    def _split(self, offset: int) -> int:
+        """Split the piece containing `offset` so a piece starts there; returns that piece's index."""
+        i, within = self._locate(offset)
+        if within == 0:
+            return i
+        buf, start, end, _ = self._pieces[i]
+        self._pieces[i:i + 1] = [_piece(buf, start, start + within), _piece(buf, start + within, end)]
+        self._starts = self._lines = None
+        return i + 1
+
+    # --- edits ---
+    def insert(self, offset: int, text: str):
+        if not text:
+            return
+        offset = max(0, min(offset, self._length))
+        if self._listeners:
+            self._notify(self.line_of(offset), 0, text.count("\n"))
+        last = self._last
+        if last is not None:
+            i, buf = last
+            if i < len(self._pieces) and self._pieces[i][0] is buf:
+                pbuf, start, end, _ = self._pieces[i]
+                self._index()
+                if self._starts[i + 1] == offset and end - start + len(text) <= COALESCE_CHARS:
+                    merged = _Buffer(pbuf.text[start:end] + text)
+                    self._pieces[i] = _piece(merged, 0, len(merged.text))
+                    self._last = (i, merged)
+                    self._length += len(text)
+                    self._invalidate()
+                    return
+        i = self._split(offset)
+        buf = _Buffer(text)
+        self._pieces.insert(i, _piece(buf, 0, len(text)))
+        self._last = (i, buf)
+        self._length += len(text)
+        self._invalidate()
+
+    def delete(self, offset: int, length: int):
+        offset = max(0, min(offset, self._length))
+        length = min(length, self._length - offset)
+        if length <= 0:
+            return
+        if self._listeners:
+            self._notify(self.line_of(offset), self.text(offset, offset + length).count("\n"), 0)
+        first = self._split(offset)
+        last = self._split(offset + length)
+        del self._pieces[first:last]
+        self._last = None
+        self._length -= length
+        self._invalidate()
+
+    def replace(self, offset: int, length: int, text: str):
+        self.delete(offset, length)
+        self.insert(offset, text)
+
+    # --- reads ---
+    def chunks(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """The text of [start, end) piece by piece."""
+        end = self._length if end is None else min(end, self._length)
+        if start >= end:
+            return
+        i, within = self._locate(start)
+        pos = start
+        while pos < end and i < len(self._pieces):
+            buf, pstart, pend, _ = self._pieces[i]
+            a = pstart + within
+            b = min(pend, a + (end - pos))
+            yield buf.text[a:b]
+            pos += b - a
+            within = 0
+            i += 1
+
+    def text(self, start: int = 0, end: Optional[int] = None) -> str:
+        return "".join(self.chunks(start, end))
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def line_start(self, line: int) -> int:
+        """Offset of the first character of `line` (0-based); past the end for lines beyond it."""
+        if line <= 0:
+            return 0
+        self._index()
+        if line > self._lines[-1]:
+            return self._length
+        # The piece holding the line-th newline
+        i = bisect_left(self._lines, line) - 1
+        buf, start = self._pieces[i][:2]
+        k = line - self._lines[i]  # k-th newline inside this piece
+        nl = buf.newlines[bisect_left(buf.newlines, start) + k - 1]
+        return self._starts[i] + (nl - start) + 1
+
+    def line_of(self, offset: int) -> int:
+        """Line containing `offset`."""
+        i, within = self._locate(offset)
+        if i >= len(self._pieces):
+            return self._lines[-1]
+        buf, start = self._pieces[i][:2]
+        return self._lines[i] + buf.count(start, start + within)
+
+    def line(self, line: int) -> str:
+        """Text of `line` without its newline."""
+        return self.text(self.line_start(line), self.line_start(line + 1)).rstrip("\n")
+
+    def lines(self, first: int, count: int) -> List[str]:
+        """`count` lines from `first`, reading only their span of the document."""
+        first = max(0, first)
+        last = min(first + count, self.line_count())
+        if last <= first:
+            return []
+        text = self.text(self.line_start(first), self.line_start(last))
+        out = text.split("\n")
+        # Up to a line that follows: the span ends with that line's break. Up to the end: the last
+        # line (empty after a trailing break) has none
+        if last < self.line_count():
+            out.pop()
+        return out
+
+    # --- disk ---
+    def save(self, path: str, encoding: str = "utf-8"):
+        """Stream the pieces to `path` via temp file + fsync + rename."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding=encoding, errors="surrogateescape", newline="") as f:
+            for chunk in self.chunks():
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.saved_version = self.version
@@ -0,0 +1,198 @@
+"""ui.core.vectorize
+
+Scalar and batch execution of elementwise `Op` nodes.
+
+An `Op` node combines its two inputs with the operator named by
+`meta["op"]` (default "add"; see `OPS`). `apply` picks the path from the
+input types: plain Python values go through the Python operator (so
+strings and lists still concatenate), NumPy arrays through the matching
+ufunc, and column batches (dicts of column name -> array) column by
+column.
+
+On batches, the evaluator fuses trees of Op nodes whose intermediate
+results only feed the next Op (`plan_fusion`) and runs each tree as one
+expression (`run_fused`): the expression is evaluated over blocks of
+`BLOCK_ROWS` rows into buffers reused from block to block, so a chain of
+k ops makes one pass over its inputs and allocates only its output,
+instead of k full-size temporaries.
+"""
+import operator
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .graph import Graph
+from .nodes import Node
+
+# Entry point of the node type these semantics belong to
+OP_ENTRY = "ui.core.builtin_nodes:op"
+
+# name -> (Python operator, NumPy ufunc name)
+OPS: Dict[str, Tuple[Callable[[Any, Any], Any], str]] = {
+    "add": (operator.add, "add"),
+    "sub": (operator.sub, "subtract"),
+    "mul": (operator.mul, "multiply"),
+    "div": (operator.truediv, "true_divide"),
+    "floordiv": (operator.floordiv, "floor_divide"),
+    "mod": (operator.mod, "remainder"),
+    "pow": (operator.pow, "power"),
+    "min": (min, "minimum"),
+    "max": (max, "maximum"),
+}
+
+# Rows per block: a few buffers of this many float64 stay in L2 cache
+BLOCK_ROWS = 16384
+
+Expr = Tuple  # ("leaf", index) or ("op", name, left, right)
+
+
+def _numpy():
+    import numpy
+    return numpy
+
+
+def is_array(value: Any) -> bool:
+    return type(value).__module__ == "numpy" and type(value).__name__ == "ndarray"
+
+
+def is_batch(value: Any) -> bool:
+    """An array, or a column batch (non-empty dict whose values are all arrays)."""
+    if is_array(value):
+        return True
+    return isinstance(value, dict) and bool(value) and all(is_array(v) for v in value.values())
+
+
+def _ufunc(name: str):
+    try:
+        return getattr(_numpy(), OPS[name][1])
+    except KeyError:
+        raise ValueError(f"unknown op '{name}'") from None
+
+
+def _columns(values: Sequence[Any]) -> List[str]:
+    names = None
+    for value in values:
+        if isinstance(value, dict):
+            if names is None:
+                names = list(value)
+            elif set(value) != set(names):
+                raise ValueError(f"column batches differ: {sorted(names)} vs {sorted(value)}")
+    return names or []
+
+
+def apply(name: str, a: Any, b: Any) -> Any:
+    """`a <op> b` on the scalar or batch path; a missing input passes the other one through."""
+    if a is None or b is None:
+        return a if b is None else b
+    if is_batch(a) or is_batch(b):
+        ufunc = _ufunc(name)
+        if isinstance(a, dict) or isinstance(b, dict):
+            return {c: ufunc(a[c] if isinstance(a, dict) else a, b[c] if isinstance(b, dict) else b)
+                    for c in _columns([a, b])}
+        return ufunc(a, b)
+    try:
+        return OPS[name][0](a, b)
+    except KeyError:
+        raise ValueError(f"unknown op '{name}'") from None
+
+
+# --- fusion ---
+def plan_fusion(graph: Graph, order: Iterable[str], fusable: Callable[[Node], bool]) -> Dict[str, List[str]]:
+    """{root: members} for each tree of two or more fusable nodes among `order`.
+
+    A member (any node of the tree but its root) has a single outgoing
+    link, into another node of the tree, so its result is needed by nothing
+    else. Members are listed in `order`. Nodes with two links into the same
+    port are left alone.
+    """
+    candidates = set()
+    for nid in order:
+        node = graph.nodes.get(nid)
+        if node is None or not fusable(node):
+            continue
+        ports = [link.end_port for link in graph.links_of(nid) if link.end_node == nid]
+        if len(ports) == len(set(ports)):
+            candidates.add(nid)
+    parent: Dict[str, str] = {}
+    for nid in candidates:
+        outgoing = [link for link in graph.links_of(nid) if link.start_node == nid]
+        if len(outgoing) == 1 and outgoing[0].end_node in candidates and outgoing[0].end_node != nid:
+            parent[nid] = outgoing[0].end_node
+    root_of: Dict[str, str] = {}
+
+    def root(nid: str) -> str:
+        if nid not in root_of:
+            root_of[nid] = root(parent[nid]) if nid in parent else nid
+        return root_of[nid]
+
+    plans: Dict[str, List[str]] = {}
+    for nid in order:
+        if nid in parent:
+            plans.setdefault(root(nid), []).append(nid)
+    return plans
+
+
+def _row_split(value, rows: int, ndim: int) -> bool:
+    return getattr(value, "ndim", 0) == ndim and ndim > 0 and value.shape[0] == rows
+
+
+def _sample(expr: Expr, leaves: Sequence[Any], dtypes: Dict[int, Any]):
+    """Evaluate on tiny leaves to learn each node's result dtype."""
+    if expr[0] == "leaf":
+        return leaves[expr[1]]
+    value = _ufunc(expr[1])(_sample(expr[2], leaves, dtypes), _sample(expr[3], leaves, dtypes))
+    dtypes[id(expr)] = _numpy().asarray(value).dtype
+    return value
+
+
+def _run(expr: Expr, leaves: Sequence[Any], dtypes: Dict[int, Any], buffers: Dict, out=None):
+    if expr[0] == "leaf":
+        return leaves[expr[1]]
+    np = _numpy()
+    left = _run(expr[2], leaves, dtypes, buffers)
+    right = _run(expr[3], leaves, dtypes, buffers)
+    if out is None:
+        shape = np.broadcast_shapes(np.shape(left), np.shape(right))
+        out = buffers.get((id(expr), shape))
+        if out is None:
+            out = buffers[(id(expr), shape)] = np.empty(shape, dtypes[id(expr)])
+    _ufunc(expr[1])(left, right, out=out)
+    return out
+
+
+def _prune(expr: Expr, leaves: Sequence[Any]) -> Optional[Expr]:
+    """Drop missing (None) operands the way `apply` does."""
+    if expr[0] == "leaf":
+        return None if leaves[expr[1]] is None else expr
+    left, right = _prune(expr[2], leaves), _prune(expr[3], leaves)
+    if left is None or right is None:
+        return left if right is None else right
+    return ("op", expr[1], left, right)
+
+
+def run_fused(expr: Expr, leaves: Sequence[Any], block_rows: int = BLOCK_ROWS) -> Any:
+    """Value of `expr` over `leaves`, evaluated block by block."""
+    expr = _prune(expr, leaves)
+    if expr is None:
+        return None
+    if expr[0] == "leaf":
+        return leaves[expr[1]]
+    if any(isinstance(v, dict) for v in leaves):
+        return {c: run_fused(expr, [v[c] if isinstance(v, dict) else v for v in leaves], block_rows)
+                for c in _columns(leaves)}
+    np = _numpy()
+    leaves = [v if is_array(v) or np.isscalar(v) else np.asarray(v) for v in leaves]
+    shape = np.broadcast_shapes(*(np.shape(v) for v in leaves))
+    rows, ndim = (shape[0] if shape else 0), len(shape)
+    dtypes: Dict[int, Any] = {}
+    with np.errstate(all="ignore"):
+        _sample(expr, [v[:1] if _row_split(v, rows, ndim) else v for v in leaves], dtypes)
+    out = np.empty(shape, dtypes[id(expr)])
+    buffers: Dict = {}
+    if ndim == 0 or rows <= block_rows:
+        _run(expr, leaves, dtypes, buffers, out)
+        return out if ndim else out[()]
+    split = [_row_split(v, rows, ndim) for v in leaves]
+    for start in range(0, rows, block_rows):
+        stop = min(start + block_rows, rows)
+        block = [v[start:stop] if s else v for v, s in zip(leaves, split)]
+        _run(expr, block, dtypes, buffers, out[start:stop])
+    return out
@@ -0,0 +1,434 @@
+"""ui.core.workers
+
+Warm worker processes for running node implementations out of process.
+
+`WorkerPool` keeps `size` worker processes alive. They are forked from a
+forkserver that imported `preload` once, so interpreter start-up and
+imports are paid when the pool starts, not per evaluation, and the editor
+process itself (threads, GL context) is never forked.
+
+Each task runs under its own limits (`TaskLimits`):
+
+- CPU time and address space are soft `resource` limits set inside the
+  worker around the task, reported as the task's error;
+- wall-clock time is enforced by the pool, which kills the worker.
+
+A worker is replaced after `max_tasks` tasks, when its RSS grows past
+`max_rss_mb`, or when it dies or is killed (`cancel`, `kill_running`),
+so a hung node never needs the editor to restart.
+
+With a `SharedStore`, large buffer inputs and outputs travel as shared
+memory handles instead of through the pipe (see `ui.core.shm`).
+
+This isolates user code from the editor; it is not a security sandbox.
+"""
+import importlib
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+from .shm import Attachments, SharedStore
+
+try:
+    import resource
+except ImportError:  # Windows: wall-clock limit only
+    resource = None
+
+
+class TaskError(Exception):
+    """The task raised, or broke one of its limits, inside the worker."""
+
+
+class TaskKilled(TaskError):
+    """The worker running the task was killed (wall clock, cancel) or died."""
+
+
+@dataclass(frozen=True)
+class TaskLimits:
+    cpu_seconds: float = 10.0
+    memory_mb: int = 1024
+    wall_seconds: float = 30.0
+
+
+DEFAULT_LIMITS = TaskLimits()
+
+
+# --- worker side ---
+class _CpuLimit(Exception):
+    pass
+
+
+def _on_sigxcpu(signum, frame):
+    raise _CpuLimit("CPU time limit exceeded")
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            fields = f.read().split()
+        # Resident minus shared pages: mapped files and shared-memory values are not the worker's growth
+        return (int(fields[1]) - int(fields[2])) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return 0.0
+        # ru_maxrss: KiB on Linux, bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _set_limits(cpu_seconds: Optional[float], memory_mb: Optional[int]):
+    if resource is None:
+        return
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds is None:
+        soft = cpu_hard
+    else:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+        if cpu_hard != resource.RLIM_INFINITY:
+            soft = min(soft, cpu_hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, cpu_hard))
+    _, as_hard = resource.getrlimit(resource.RLIMIT_AS)
+    soft = as_hard if memory_mb is None else memory_mb * 1024 * 1024
+    if as_hard != resource.RLIM_INFINITY:
+        soft = min(soft, as_hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, as_hard))
+
+
+def _load(entry: str, search_path: Optional[str], cache: Dict[str, Any]):
+    fn = cache.get(entry)
+    if fn is None:
+        if search_path and search_path not in sys.path:
+            sys.path.append(search_path)
+        module_name, _, attr = entry.partition(":")
+        fn = cache[entry] = getattr(importlib.import_module(module_name), attr or "run")
+    return fn
+
+
+def _worker_main(conn: Connection, preload: Sequence[str]):
+    import signal
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+    cache: Dict[str, Any] = {}
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+        task_id, entry, search_path, inputs, meta, cpu_seconds, memory_mb, shm_threshold = msg
+        with Attachments(shm_threshold) as shared:
+            try:
+                inputs = shared.resolve(inputs)
+                # Shared inputs are mapped, not allocated by the node: they do not count against it
+                if memory_mb is not None:
+                    memory_mb += shared.mapped_bytes // (1024 * 1024) + 1
+                _set_limits(cpu_seconds, memory_mb)
+                try:
+                    outputs = _load(entry, search_path, cache)(inputs, meta) or {}
+                finally:
+                    _set_limits(None, None)
+                reply = (task_id, True, shared.export(outputs), _rss_mb())
+            except MemoryError:
+                reply = (task_id, False, "memory limit exceeded", _rss_mb())
+            except Exception as e:
+                reply = (task_id, False, f"{type(e).__name__}: {e}", _rss_mb())
+            outputs = inputs = None
+            try:
+                conn.send(reply)
+            except Exception as e:
+                # Unpicklable outputs
+                shared.discard_returned()
+                conn.send((task_id, False, f"result not transferable: {e}", _rss_mb()))
+
+
+# --- pool side ---
+class _Task:
+    __slots__ = ("id", "entry", "search_path", "inputs", "meta", "limits", "future", "pins")
+
+    def __init__(self, task_id, entry, search_path, inputs, meta, limits, future, pins=()):
+        self.id = task_id
+        self.entry = entry
+        self.search_path = search_path
+        self.inputs = inputs
+        self.meta = meta
+        self.limits = limits
+        self.future = future
+        # Shared segments the task's inputs refer to, released when it ends
+        self.pins = list(pins)
+
+
+class _Worker:
+    def __init__(self, process, conn: Connection):
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+        self.task: Optional[_Task] = None
+        self.deadline = 0.0
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class WorkerPool:
+    def __init__(self, size: Optional[int] = None, preload: Sequence[str] = (), limits: TaskLimits = DEFAULT_LIMITS,
+                 max_tasks: int = 200, max_rss_mb: float = 512.0, store: Optional[SharedStore] = None):
+        self.size = size or max(1, min(4, (os.cpu_count() or 1)))
+        self.preload = tuple(preload)
+        self.store = store
+        self.limits = limits
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self.stats = {"submitted": 0, "done": 0, "failed": 0, "killed": 0, "recycled": 0, "spawned": 0}
+        self._ctx = None
+        self._lock = threading.Lock()
+        self._queue: List[_Task] = []
+        self._idle: List[_Worker] = []
+        self._busy: Dict[Connection, _Worker] = {}
+        self._ids = itertools.count(1)
+        self._wake_r: Optional[Connection] = None
+        self._wake_w: Optional[Connection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    # --- lifecycle ---
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> "WorkerPool":
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return self
+            self._ctx = _context()
+            if self._ctx.get_start_method() == "forkserver":
+                self._ctx.set_forkserver_preload(list(self.preload))
+            self._wake_r, self._wake_w = multiprocessing.Pipe(duplex=False)
+            self._thread = threading.Thread(target=self._run, name="worker-pool", daemon=True)
+        # Spawning is slow and runs unlocked (main_ui starts the pool on a background thread): a
+        # close() meanwhile stops whatever was spawned after it, and the pool thread never starts
+        for _ in range(self.size):
+            worker = self._spawn()
+            with self._lock:
+                if not self._closed:
+                    self._idle.append(worker)
+                    continue
+            self._stop(worker)
+            return self
+        with self._lock:
+            if not self._closed:
+                self._thread.start()
+        return self
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            pending, self._queue = self._queue, []
+        for task in pending:
+            task.future.set_exception(TaskKilled("pool closed"))
+        self._wake()
+        # Not started if close() came while start() was still spawning
+        if self._thread is not None and self._thread.ident is not None:
+            self._thread.join(timeout=5)
+        for worker in self._idle + list(self._busy.values()):
+            self._stop(worker, kill=worker.task is not None)
+            if worker.task is not None and not worker.task.future.done():
+                worker.task.future.set_exception(TaskKilled("pool closed"))
+        self._idle.clear()
+        self._busy.clear()
+
+    # --- tasks ---
+    def submit(self, entry: str, inputs: Dict[str, Any], meta: Dict[str, Any], search_path: Optional[str] = None,
+               limits: Optional[TaskLimits] = None) -> Future:
+        """Run `entry(inputs, meta)` ("module:function") in a worker; the Future holds its outputs."""
+        if not self.started:
+            self.start()
+        future: Future = Future()
+        pins = []
+        if self.store is not None:
+            inputs, pins = self.store.export(inputs)
+            future.add_done_callback(lambda _, store=self.store: store.release_all(pins))
+        task = _Task(next(self._ids), entry, search_path, inputs, meta, limits or self.limits, future, pins)
+        with self._lock:
+            if self._closed:
+                future.cancel()
+                raise RuntimeError("worker pool is closed")
+            self.stats["submitted"] += 1
+            self._queue.append(task)
+        self._wake()
+        return future
+
+    def run(self, entry: str, inputs: Dict[str, Any], meta: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return self.submit(entry, inputs, meta, **kwargs).result()
+
+    def cancel(self, future: Future) -> bool:
+        """Drop a queued task, or kill the worker running it."""
+        with self._lock:
+            for task in self._queue:
+                if task.future is future:
+                    self._queue.remove(task)
+                    future.set_exception(TaskKilled("cancelled"))
+                    return True
+            running = [w for w in self._busy.values() if w.task is not None and w.task.future is future]
+        for worker in running:
+            self._kill(worker, "cancelled")
+            return True
+        return False
+
+    def kill_running(self) -> int:
+        """Kill every worker that is running a task (e.g. a hung evaluation); queued tasks are dropped."""
+        with self._lock:
+            queued, self._queue = self._queue, []
+            running = [w for w in self._busy.values() if w.task is not None]
+        for task in queued:
+            task.future.set_exception(TaskKilled("cancelled"))
+        for worker in running:
+            self._kill(worker, "cancelled")
+        return len(running)
+
+    # --- internals ---
+    def _spawn(self) -> _Worker:
+        parent, child = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child, self.preload), name="omega-node-worker", daemon=True)
+        process.start()
+        child.close()
+        self.stats["spawned"] += 1
+        return _Worker(process, parent)
+
+    def _wake(self):
+        if self._wake_w is not None:
+            try:
+                self._wake_w.send_bytes(b"x")
+            except OSError:
+                pass
+
+    def _stop(self, worker: _Worker, kill: bool = False):
+        try:
+            if kill:
+                worker.process.kill()
+            else:
+                worker.conn.send(None)
+        except Exception:
+            pass
+        worker.process.join(timeout=1)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=1)
+        worker.conn.close()
+
+    def _kill(self, worker: _Worker, reason: str):
+        # The dispatcher sees the closed connection and replaces the worker
+        try:
+            worker.process.kill()
+        except Exception:
+            pass
+        task = worker.task
+        if task is not None and not task.future.done():
+            self.stats["killed"] += 1
+            task.future.set_exception(TaskKilled(reason))
+
+    def _dispatch(self):
+        with self._lock:
+            while self._queue and self._idle:
+                task = self._queue.pop(0)
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+                worker = self._idle.pop()
+                worker.task = task
+                worker.deadline = time.monotonic() + task.limits.wall_seconds
+                self._busy[worker.conn] = worker
+                try:
+                    worker.conn.send((task.id, task.entry, task.search_path, task.inputs, task.meta,
+                                      task.limits.cpu_seconds, task.limits.memory_mb,
+                                      self.store.threshold if self.store is not None else None))
+                except Exception as e:
+                    task.future.set_exception(TaskError(f"task not transferable: {e}"))
+                    worker.task = None
+                    del self._busy[worker.conn]
+                    self._idle.append(worker)
+
+    def _finish(self, worker: _Worker):
+        """Return a worker to the idle list, or replace it if it is spent."""
+        worker.task = None
+        worker.tasks += 1
+        with self._lock:
+            self._busy.pop(worker.conn, None)
+        if worker.tasks >= self.max_tasks:
+            self.stats["recycled"] += 1
+            self._stop(worker)
+            worker = self._spawn()
+        with self._lock:
+            self._idle.append(worker)
+
+    def _replace(self, worker: _Worker):
+        with self._lock:
+            self._busy.pop(worker.conn, None)
+        self._stop(worker, kill=True)
+        if not self._closed:
+            fresh = self._spawn()
+            with self._lock:
+                self._idle.append(fresh)
+
+    def _run(self):
+        while not self._closed:
+            self._dispatch()
+            now = time.monotonic()
+            with self._lock:
+                busy = list(self._busy.values())
+            timeout = min((w.deadline for w in busy), default=now + 1.0) - now
+            ready = wait([self._wake_r] + [w.conn for w in busy], timeout=max(0.0, min(timeout, 1.0)))
+            for conn in ready:
+                if conn is self._wake_r:
+                    while self._wake_r.poll():
+                        self._wake_r.recv_bytes()
+                    continue
+                worker = self._busy.get(conn)
+                if worker is None:
+                    continue
+                try:
+                    task_id, ok, value, rss = conn.recv()
+                except (EOFError, OSError):
+                    task = worker.task
+                    if task is not None and not task.future.done():
+                        self.stats["killed"] += 1
+                        task.future.set_exception(TaskKilled(f"worker exited ({worker.process.exitcode})"))
+                    self._replace(worker)
+                    continue
+                task = worker.task
+                if ok and self.store is not None:
+                    # Adopt the worker's segments even if nobody waits for them any more,
+                    # so they are unlinked with their views
+                    value = self.store.load(value)
+                if task is not None and task.id == task_id and not task.future.done():
+                    if ok:
+                        self.stats["done"] += 1
+                        task.future.set_result(value)
+                    else:
+                        self.stats["failed"] += 1
+                        task.future.set_exception(TaskError(value))
+                # Shared values must not outlive their consumers here, until the next reply
+                value = task = None
+                if rss > self.max_rss_mb:
+                    self.stats["recycled"] += 1
+                    self._replace(worker)
+                else:
+                    self._finish(worker)
+            now = time.monotonic()
+            for worker in busy:
+                if worker.task is not None and now >= worker.deadline and worker.conn in self._busy:
+                    self._kill(worker, f"wall time limit ({worker.task.limits.wall_seconds:g} s)")
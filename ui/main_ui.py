@@ -1,5 +1,7 @@
-import threading
 import asyncio
+import os
+import threading
+import time
 import json
 import websockets
 from dearpygui import dearpygui as dpg
@@ -9,15 +11,70 @@ from .windows.main_window import build_main_window, build_main_child
 from .windows.properties_panel import build_properties_panel, build_properties_child
 from .windows.explorer_panel import build_explorer_panel, build_explorer_sidebar
 from .windows.terminal_panel import build_terminal_panel, build_terminal_child
+from .windows.explorer_panel import _open_file_in_editor, close_editor_tab, on_workspace_changes
+from .windows.search_palette import build_search_palette, show_search_palette
+from .windows.changes_panel import build_changes_window, show_changes
+from .windows.variables_panel import build_variables_window, show_variables
+from .widgets.themes import THEMES
 from .core.graph import Graph
 from .core.nodes import Node, NodeType, NodeRegistry
 from .core.links import Link
+from .core.graph import link_key
+from .core.history import Journal, AddNode, RemoveNode, MoveNode, AddLink, RemoveLink, Batch, Op, move_node
+from .core.autosave import Autosave, recover
+from .core.groups import GroupManager, GROUP_TYPE, GROUP_COLOR, is_group
+from .core.evaluator import Evaluator
+from .core.workers import WorkerPool
+from .core.spatial import SpatialIndex
+from .core.layout import LayoutJob
+from .core.search import SearchIndex, Indexer, SearchHit, SKIP_DIRS
+from .core.importer import ImportCache, import_tree
+from .core.scheduler import SCHEDULER, HIGH, LOW
+from .core.clipboard import copy_subgraph, cut_ops, paste_ops, encode, decode
+from .core.diff import diff_graphs, load_graph
+from .core.result_cache import ResultCache
+from .core.shm import SharedStore, preview
+from .core.streaming import StreamRun
+from .core.aio import EventLoop
+from .core.telemetry import Telemetry
+from .core.filewatch import FileWatcher, FileBindings
 
 WS_URL = "ws://127.0.0.1:8000/ws"
 
 # Runtime state
 GRAPH = Graph()
 REGISTRY = NodeRegistry()
+JOURNAL = Journal(GRAPH)
+PROJECT_PATH = "project.json"
+AUTOSAVE = Autosave(PROJECT_PATH)
+GROUPS = GroupManager(PROJECT_PATH)
+# Nodos "isolated" (código de usuario) corren en procesos ya arrancados, no en el editor
+# Valores grandes (arrays, buffers) viajan a los workers por memoria compartida, no por la tubería
+STORE = SharedStore()
+POOL = WorkerPool(preload=("ui.core.builtin_nodes",), store=STORE)
+# Resultados por contenido: reabrir el proyecto no recalcula lo que no cambió
+CACHE = ResultCache(PROJECT_PATH + ".results")
+# Bucle asyncio compartido: cliente WebSocket y nodos async (I/O sin un hilo por nodo)
+LOOP = EventLoop()
+# Valores de salida para el panel de variables: se guarda el último y una serie min/max, nunca se empuja a la UI
+TELEMETRY = Telemetry()
+# Un solo watcher para el workspace; los nodos ligados a un archivo se re-evalúan cuando su contenido cambia
+WATCHER = FileWatcher(os.getcwd(), ignore_dirs=SKIP_DIRS | {os.path.basename(PROJECT_PATH) + ".results"})
+FILES = FileBindings(WATCHER, REGISTRY, lambda ids: SCHEDULER.post(_on_files_changed, ids))
+EVALUATOR = Evaluator(GRAPH, REGISTRY, GROUPS, pool=POOL, cache=CACHE, loop=LOOP, telemetry=TELEMETRY, files=FILES)
+SPATIAL = SpatialIndex()
+SEARCH_INDEX = SearchIndex()
+INDEXER = Indexer(SEARCH_INDEX, os.getcwd())
+_LAYOUT_JOB = None
+# El canvas muestra posiciones intermedias de un layout aún no registradas en el grafo
+_LAYOUT_SHOWN = False
+# Nodos recolocados por paso de frame al mostrar o deshacer un layout
+_POSITIONS_CHUNK = 200
+_STREAM_RUN = None
+# Refresco de los contadores de chunks en los puertos durante un stream
+_STREAM_STATS_PERIOD = 0.25
+BUILTIN_MANIFEST = os.path.join(os.path.dirname(__file__), "core", "builtin_nodes.json")
+PLUGINS_DIR = "plugins"
 _NODE_COUNTER = 0
 _EDITOR_ID = None
 _WS_STATUS_ALIAS = "ws_status"
@@ -35,16 +92,17 @@ _ACTIVITYBAR_ID = None
 _MINIMAP_WIN_ID = None
 _MINIMAP_DRAW_ID = None
 _SETTINGS = {"autosave": False, "wordWrap": "off"}
-
-# Paleta de estilo: negro elegante con acento verde neón
-ACCENT_GREEN = (57, 255, 20, 255)       # #39FF14
-ACCENT_GREEN_DIM = (57, 255, 20, 180)   # con alpha para bordes/hover
-BG_BLACK = (18, 18, 18, 255)            # fondo principal casi negro
-BG_PANEL = (24, 24, 24, 255)            # paneles ligeramente más claros
-TEXT_LIGHT = (230, 230, 230, 255)
-
+_LINK_ITEMS = {}  # link key -> dpg link item
+_CLIPBOARD = None  # (texto, payload) de la última copia, evita decodificar lo propio
+_PASTE_COUNT = 0
+# Batches más grandes se reconcilian repartidos entre frames
+_RECONCILE_CHUNK = 200
 
 def _set_text(item, value):
+    # Desde otros hilos se encola; actualizaciones seguidas del mismo item cuentan una vez por frame
+    if not SCHEDULER.on_render_thread():
+        SCHEDULER.post(_set_text, item, value, priority=HIGH, key=("text", item))
+        return
     try:
         if item and dpg.does_item_exist(item):
             dpg.set_value(item, value)
@@ -81,6 +139,7 @@ def start_ui():
                 dpg.add_menu_item(label="New Project", callback=lambda: _on_new_project())
                 dpg.add_menu_item(label="Open", callback=lambda: _on_open_project())
                 dpg.add_menu_item(label="Save All", callback=_on_save_pressed)
+                dpg.add_menu_item(label="Autosave", check=True, default_value=_SETTINGS["autosave"], callback=lambda s, a: _settings_set("autosave", bool(a)))
                 dpg.add_menu_item(label="Exit", callback=lambda: dpg.stop_dearpygui())
             with dpg.menu(label="Window"):
                 dpg.add_menu_item(label="Toggle Outliner", callback=lambda: _toggle_outliner())
@@ -88,6 +147,14 @@ def start_ui():
                 dpg.add_menu_item(label="Toggle Output Log", callback=lambda: _toggle_log())
                 dpg.add_menu_item(label="Reset Layout", callback=lambda: _reset_layout())
                 dpg.add_menu_item(label="Dark Mode (Metal)", callback=lambda: _apply_metal_dark_theme())
+                dpg.add_menu_item(label="Theme Stats", callback=lambda: _show_theme_stats())
+                dpg.add_menu_item(label="Changes Since Save", callback=lambda: _show_changes_since_save())
+                dpg.add_menu_item(label="Realtime Variables", callback=lambda: show_variables())
+            with dpg.menu(label="Layout"):
+                dpg.add_menu_item(label="Auto Arrange", callback=lambda: _run_layout("auto"))
+                dpg.add_menu_item(label="Layered (DAG)", callback=lambda: _run_layout("layered"))
+                dpg.add_menu_item(label="Force-Directed", callback=lambda: _run_layout("force"))
+                dpg.add_menu_item(label="Stop", callback=lambda: _stop_layout())
             with dpg.menu(label="Help"):
                 dpg.add_menu_item(label="About", callback=lambda: _show_about())
     dpg.set_primary_window(_ROOT_ID, True)
@@ -131,17 +198,8 @@ def start_ui():
         pass
 
     # Apply per-window themes for panels
-    try:
-        # Viewport central: negro suave
-        with dpg.theme() as _viewport_theme:
-            with dpg.theme_component(dpg.mvAll):
-                dpg.add_theme_color(dpg.mvThemeCol_WindowBg, BG_PANEL)
-                dpg.add_theme_color(dpg.mvThemeCol_Border, ACCENT_GREEN_DIM)
-                dpg.add_theme_style(dpg.mvStyleVar_WindowRounding, 4.0)
-                dpg.add_theme_style(dpg.mvStyleVar_ItemSpacing, 8.0, 8.0)
-        dpg.bind_item_theme(_MAIN_WIN_ID, _viewport_theme)
-    except Exception:
-        pass
+    # Viewport central: negro suave
+    THEMES.bind(_MAIN_WIN_ID, "viewport")
 
     # Eliminar la barra de estado inferior: el estado de WS vive en la toolbar
     # Mantener compatibilidad pasando log_label=None
@@ -158,8 +216,14 @@ def start_ui():
     try:
         dpg.set_item_callback("btn_new", _on_new_pressed)
         dpg.set_item_callback("btn_duplicate", _on_duplicate_pressed)
+        dpg.set_item_callback("btn_group", _on_group_pressed)
+        dpg.set_item_callback("btn_ungroup", _on_ungroup_pressed)
+        dpg.set_item_callback("btn_run", _on_run_pressed)
+        dpg.set_item_callback("btn_stream", _on_stream_pressed)
+        dpg.set_item_callback("btn_stop", _on_stop_pressed)
         dpg.set_item_callback("btn_save", _on_save_pressed)
         dpg.set_item_callback("btn_load", _on_load_pressed)
+        dpg.set_item_callback("btn_import_python", _on_import_python_pressed)
     except Exception:
         pass
 
@@ -171,9 +235,44 @@ def start_ui():
         dpg.add_key_down_handler(dpg.mvKey_Control, callback=_on_ctrl_down)
         dpg.add_key_release_handler(dpg.mvKey_Control, callback=_on_ctrl_up)
         dpg.add_key_press_handler(dpg.mvKey_M, callback=_on_m_pressed)
+        # Ctrl+Z / Ctrl+Y: deshacer / rehacer; Supr: borrar nodo seleccionado
+        dpg.add_key_press_handler(dpg.mvKey_Z, callback=_on_z_pressed)
+        dpg.add_key_press_handler(dpg.mvKey_Y, callback=_on_y_pressed)
+        dpg.add_key_press_handler(dpg.mvKey_Delete, callback=_on_delete_pressed)
+        # Ctrl+P: paleta de búsqueda
+        dpg.add_key_press_handler(dpg.mvKey_P, callback=_on_p_pressed)
+        # Ctrl+C / Ctrl+X / Ctrl+V: portapapeles de subgrafos (con el editor bajo el ratón)
+        dpg.add_key_press_handler(dpg.mvKey_C, callback=_on_c_pressed)
+        # imnodes no avisa al arrastrar nodos: se comparan posiciones mientras se arrastra y al soltar
+        dpg.add_mouse_drag_handler(button=dpg.mvMouseButton_Left, callback=_on_mouse_drag)
+        dpg.add_mouse_release_handler(button=dpg.mvMouseButton_Left, callback=_on_mouse_drag)
+        dpg.add_key_press_handler(dpg.mvKey_X, callback=_on_x_pressed)
+        dpg.add_key_press_handler(dpg.mvKey_V, callback=_on_v_pressed)
+
+    # El journal es la única vía de edición del grafo; la UI se reconcilia desde él
+    JOURNAL.subscribe(_on_journal_op)
+    EVALUATOR.attach(JOURNAL)
+    SPATIAL.attach(JOURNAL)
+    INDEXER.attach(JOURNAL)
+    FILES.attach(JOURNAL)
+    build_search_palette(SEARCH_INDEX, _on_search_pick)
+    build_changes_window(lambda nid: _on_node_selected(nid) if nid in GRAPH.nodes else None)
+    build_variables_window(TELEMETRY, _watch_selected_node)
+    # Explorer e índice de búsqueda siguen al watcher; nadie más recorre el workspace periódicamente
+    WATCHER.subscribe(on_workspace_changes)
+    INDEXER.watch(WATCHER)
+    INDEXER.start()
+    WATCHER.start()
+    # El arranque en frío de los workers se paga una vez, fuera del hilo de render
+    threading.Thread(target=POOL.start, daemon=True).start()
+
+    # Recuperar ediciones no guardadas del WAL de autosave (si quedó cola tras un crash)
+    _recover_autosave()
+    if _SETTINGS.get("autosave"):
+        _start_autosave()
 
     # Start WebSocket client thread
-    threading.Thread(target=_start_ws_client, args=(_WS_STATUS_ALIAS, log_label), daemon=True).start()
+    _start_ws_client(_WS_STATUS_ALIAS, log_label)
 
     # Minimap desactivado: no crear overlay ni reconstruirlo
 
@@ -186,106 +285,161 @@ def start_ui():
         pass
 
     dpg.show_viewport()
-    dpg.start_dearpygui()
+    # Bucle manual: el trabajo encolado corre en el hilo de render con presupuesto por frame
+    while dpg.is_dearpygui_running():
+        SCHEDULER.run_frame()
+        dpg.render_dearpygui_frame()
+    AUTOSAVE.stop()
+    INDEXER.stop()
+    WATCHER.stop()
+    POOL.close()
+    STORE.close()
+    LOOP.close()
     dpg.destroy_context()
 
 
 # --- WebSocket client ---
+# Una sola conexión por sesión: el servidor manda el grafo de la sala al unirse y agrupa los eventos por conexión
+_WS_OUTBOX = None  # asyncio.Queue de mensajes a enviar por la conexión abierta (hilo de LOOP)
+_WS_OUTBOX_SIZE = 1024
+# seq del último grafo de la sala recibido: al reconectar solo se pide si cambió
+_WS_SEQ = None
+_WS_RETRY_MAX = 30.0
+
+
 def _start_ws_client(ws_label, log_label):
+    async def read(ws):
+        global _WS_SEQ
+        while True:
+            msg = await ws.recv()
+            # Try JSON
+            try:
+                evt = json.loads(msg)
+            except Exception:
+                print("Server:", msg)
+                _set_text(log_label, f"Server: {msg}")
+                continue
+            if isinstance(evt.get("seq"), int):
+                _WS_SEQ = evt["seq"]
+            SCHEDULER.post(_handle_server_event, evt)
+            _set_text(log_label, f"Server evt: {evt.get('type')}")
+
+    async def write(ws, outbox: asyncio.Queue):
+        while True:
+            data = await outbox.get()
+            await ws.send(json.dumps(data))
+
     async def run():
-        try:
-            async with websockets.connect(WS_URL) as ws:
-                _set_text(ws_label, "WS: connected")
-                print("Connected to WebSocket Server")
-                await ws.send("Hello from GUI!")
-                while True:
+        global _WS_OUTBOX
+        delay = 1.0
+        while True:
+            url = WS_URL if _WS_SEQ is None else f"{WS_URL}?since={_WS_SEQ}"
+            try:
+                async with websockets.connect(url) as ws:
+                    _WS_OUTBOX = asyncio.Queue(maxsize=_WS_OUTBOX_SIZE)
+                    _set_text(ws_label, "WS: connected")
+                    print("Connected to WebSocket Server")
+                    delay = 1.0
+                    tasks = [asyncio.ensure_future(read(ws)), asyncio.ensure_future(write(ws, _WS_OUTBOX))]
                     try:
-                        msg = await ws.recv()
-                        # Try JSON
-                        try:
-                            evt = json.loads(msg)
-                            _handle_server_event(evt)
-                            _set_text(log_label, f"Server evt: {evt.get('type')}")
-                        except Exception:
-                            print("Server:", msg)
-                            _set_text(log_label, f"Server: {msg}")
-                    except Exception as e:
-                        _set_text(ws_label, f"WS error: {e}")
-                        break
-        except Exception as e:
-            _set_text(ws_label, f"WS error: {e}")
+                        # Termina cuando cualquiera falla (conexión cerrada)
+                        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                    finally:
+                        for t in tasks:
+                            t.cancel()
+                    for t in done:
+                        t.result()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _set_text(ws_label, f"WS error: {e}")
+            finally:
+                # Sin conexión los eventos se descartan; al reconectar llega el grafo de la sala
+                _WS_OUTBOX = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _WS_RETRY_MAX)
 
-    asyncio.run(run())
+    LOOP.submit(run())
 
 
-def _send_graph_snapshot():
-    # include positions from UI at save time
-    snap = GRAPH.snapshot()
-    for n in snap["nodes"]:
-        nid = n["id"]
+def _ws_send(data: dict):
+    """Encola `data` en la conexión abierta; se serializa en el hilo de LOOP. Sin conexión se descarta."""
+    outbox = _WS_OUTBOX
+    if outbox is None:
+        return
+
+    def put():
+        try:
+            outbox.put_nowait(data)
+        except asyncio.QueueFull:
+            print("WS send queue full, dropping", data.get("type"))
+
+    LOOP.loop.call_soon_threadsafe(put)
+
+
+def _fill_positions(nodes: list):
+    # Con un layout a medio mostrar el canvas no es el grafo: valen las posiciones del meta
+    if _LAYOUT_SHOWN:
+        return
+    for n in nodes:
         try:
-            pos = dpg.get_item_pos(nid)
+            pos = dpg.get_item_pos(n["id"])
             n.setdefault("meta", {})["pos"] = list(pos)
         except Exception:
             pass
-    payload = {"type": "graph_snapshot", "payload": snap}
 
-    async def run():
-        try:
-            async with websockets.connect(WS_URL) as ws:
-                await ws.send(json.dumps(payload))
-        except Exception as e:
-            print("WS send error:", e)
 
-    threading.Thread(target=lambda: asyncio.run(run()), daemon=True).start()
+def _snapshot_with_positions() -> dict:
+    # include positions from UI at save time
+    snap = GRAPH.snapshot()
+    _fill_positions(snap["nodes"])
+    return snap
+
+
+def _start_autosave():
+    # La compactación captura el grafo en trozos entre frames, como el envío por WS
+    AUTOSAVE.start(JOURNAL, _autosave_snapshot_steps,
+                   lambda steps: SCHEDULER.post(steps, priority=LOW, key="autosave.compact"))
+
+
+def _autosave_snapshot_steps():
+    # El grafo se lee antes del primer yield: es el estado que cubre el wal_seq de la compactación
+    snap = GRAPH.snapshot()
+    nodes = snap["nodes"]
+    snap["links"] = json.loads(json.dumps(snap["links"]))
+    for i in range(0, len(nodes), _RECONCILE_CHUNK):
+        # Copia profunda: el snapshot comparte meta con los nodos vivos
+        chunk = json.loads(json.dumps(nodes[i:i + _RECONCILE_CHUNK]))
+        _fill_positions(chunk)
+        nodes[i:i + _RECONCILE_CHUNK] = chunk
+        yield
+    return snap
+
+
+def _send_graph_snapshot():
+    """Encola el envío; varias ediciones seguidas producen un solo snapshot."""
+    SCHEDULER.post(_send_graph_snapshot_steps, priority=LOW, key="ws.snapshot")
+
+
+def _send_graph_snapshot_steps():
+    # El grafo se copia de una vez; las posiciones se leen en trozos entre frames
+    snap = GRAPH.snapshot()
+    nodes = snap["nodes"]
+    for i in range(0, len(nodes), _RECONCILE_CHUNK):
+        _fill_positions(nodes[i:i + _RECONCILE_CHUNK])
+        yield
+    _ws_send({"type": "graph_snapshot", "payload": snap})
 
 
 def _build_global_theme():
     try:
-        with dpg.theme() as theme_id:
-            with dpg.theme_component(dpg.mvAll):
-                # Negro elegante + acento verde neón
-                dpg.add_theme_color(dpg.mvThemeCol_WindowBg, BG_BLACK)
-                dpg.add_theme_color(dpg.mvThemeCol_Text, TEXT_LIGHT)
-                dpg.add_theme_color(dpg.mvThemeCol_FrameBg, (28, 28, 28, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_FrameBgHovered, (34, 34, 34, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_FrameBgActive, (36, 36, 36, 255))
-                # Acento
-                dpg.add_theme_color(dpg.mvThemeCol_Button, ACCENT_GREEN)
-                dpg.add_theme_color(dpg.mvThemeCol_ButtonHovered, (80, 255, 80, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_ButtonActive, (40, 200, 40, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_Border, ACCENT_GREEN_DIM)
-                dpg.add_theme_color(dpg.mvThemeCol_Header, (32, 32, 32, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_HeaderHovered, ACCENT_GREEN_DIM)
-                dpg.add_theme_color(dpg.mvThemeCol_HeaderActive, ACCENT_GREEN)
-                # Tabs del editor (suaves, sin sobresaturar)
-                dpg.add_theme_color(dpg.mvThemeCol_Tab, (26, 26, 26, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_TabHovered, (30, 30, 30, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_TabActive, (32, 32, 32, 255))
-                # Spacing & rounding
-                dpg.add_theme_style(dpg.mvStyleVar_WindowRounding, 4.0)
-                dpg.add_theme_style(dpg.mvStyleVar_FrameRounding, 4.0)
-                dpg.add_theme_style(dpg.mvStyleVar_ItemSpacing, 8.0, 8.0)
-                dpg.add_theme_style(dpg.mvStyleVar_WindowPadding, 8.0, 8.0)
-                # Bordes sutiles para sensación nativa (sin tabs de docking)
-                dpg.add_theme_style(dpg.mvStyleVar_WindowBorderSize, 1.0)
-                dpg.add_theme_style(dpg.mvStyleVar_FrameBorderSize, 1.0)
-        dpg.bind_theme(theme_id)
+        THEMES.set_active("dark")
     except Exception as e:
         print("Theme build error:", e)
 
 
 def _send_event(event_type: str, payload: dict):
-    data = {"type": event_type, "payload": payload}
-
-    async def run():
-        try:
-            async with websockets.connect(WS_URL) as ws:
-                await ws.send(json.dumps(data))
-        except Exception as e:
-            print("WS event send error:", e)
-
-    threading.Thread(target=lambda: asyncio.run(run()), daemon=True).start()
+    _ws_send({"type": event_type, "payload": payload})
 
 
 # --- Fullscreen toggle helpers ---
@@ -304,6 +458,72 @@ def _on_m_pressed(sender, app_data):
         _toggle_editor_fullscreen()
 
 
+# Deshacer/rehacer y Supr son del grafo solo con el editor bajo el ratón (ver _editor_hovered)
+def _on_z_pressed(sender, app_data):
+    if _CTRL_DOWN and _editor_hovered():
+        _undo()
+
+
+def _on_y_pressed(sender, app_data):
+    if _CTRL_DOWN and _editor_hovered():
+        _redo()
+
+
+def _on_delete_pressed(sender, app_data):
+    if not _editor_hovered():
+        return
+    if _LAST_SELECTED_NODE_ID and _LAST_SELECTED_NODE_ID in GRAPH.nodes:
+        JOURNAL.record(RemoveNode(_LAST_SELECTED_NODE_ID))
+        _send_graph_snapshot()
+
+
+def _on_p_pressed(sender, app_data):
+    if _CTRL_DOWN:
+        show_search_palette()
+
+
+def _editor_hovered() -> bool:
+    # Con foco en un campo de texto, Ctrl+C/V/Z/Y y Supr son del campo, no del grafo
+    try:
+        return _EDITOR_ID is not None and dpg.is_item_hovered(_EDITOR_ID)
+    except Exception:
+        return False
+
+
+def _on_c_pressed(sender, app_data):
+    if _CTRL_DOWN and _editor_hovered():
+        _copy_selection()
+
+
+def _on_x_pressed(sender, app_data):
+    if _CTRL_DOWN and _editor_hovered():
+        _cut_selection()
+
+
+def _on_v_pressed(sender, app_data):
+    if _CTRL_DOWN and _editor_hovered():
+        _paste_clipboard()
+
+
+def _on_search_pick(hit: SearchHit):
+    if hit.kind == "node":
+        if hit.target in GRAPH.nodes:
+            _on_node_selected(hit.target)
+    else:
+        # Símbolos y texto: se abre en la línea del resultado
+        _open_file_in_editor(hit.target, hit.line)
+
+
+def _undo():
+    if JOURNAL.undo() is not None:
+        _send_graph_snapshot()
+
+
+def _redo():
+    if JOURNAL.redo() is not None:
+        _send_graph_snapshot()
+
+
 def _viewport_size() -> tuple[int, int]:
     try:
         w = dpg.get_viewport_client_width()
@@ -387,44 +607,169 @@ def _handle_server_event(evt: dict):
         node_id = payload.get("id")
         value = payload.get("value")
         if node_id and value is not None:
-            try:
-                # Update node label to reflect value
-                node = GRAPH.nodes.get(node_id)
-                base_label = node.title if node else node_id
-                dpg.configure_item(node_id, label=f"{base_label} ({value})")
-            except Exception as e:
-                print("Label update error:", e)
+            _show_node_value(node_id, value)
+
+
+def _show_node_value(node_id: str, value):
+    try:
+        # Update node label to reflect value
+        node = GRAPH.nodes.get(node_id)
+        base_label = node.title if node else node_id
+        # Solo un resumen: un valor puede ser un array de cientos de MB
+        dpg.configure_item(node_id, label=f"{base_label} ({preview(value)})")
+    except Exception as e:
+        print("Label update error:", e)
+
+
 # --- Node registry and creation ---
 def _register_default_node_types():
-    REGISTRY.register(NodeType("Compute", inputs=["in"], outputs=["out"], color="#66CCFF"))
-    REGISTRY.register(NodeType("Data", inputs=[], outputs=["out"], color="#9CCC65"))
-    REGISTRY.register(NodeType("Op", inputs=["a", "b"], outputs=["result"], color="#FFCA28"))
+    # Tipos declarados por manifiestos: los módulos de implementación se importan al primer uso
+    REGISTRY.load_manifest(BUILTIN_MANIFEST)
+    REGISTRY.discover(PLUGINS_DIR)
+    # Puertos por instancia: se agregan desde el interior al agrupar
+    REGISTRY.register(NodeType(GROUP_TYPE, inputs=[], outputs=[], color=GROUP_COLOR))
+    try:
+        dpg.configure_item("node_type", items=[n for n in REGISTRY.list() if n != GROUP_TYPE])
+    except Exception:
+        pass
 
 
-def _create_node(type_name: str):
-    global _NODE_COUNTER
-    nt = REGISTRY.get(type_name)
-    if not nt or _EDITOR_ID is None:
+def _build_node_item(node: Node):
+    """Crea el item DearPyGui de un nodo ya presente en GRAPH."""
+    if _EDITOR_ID is None or dpg.does_item_exist(node.id):
         return
-
-    _NODE_COUNTER += 1
-    node_id = f"node{_NODE_COUNTER}"
-
-    with dpg.node(label=nt.name, parent=_EDITOR_ID, tag=node_id):
+    node_id = node.id
+    with dpg.node(label=node.title or node.type, parent=_EDITOR_ID, tag=node_id):
         # inputs
-        for inp in nt.inputs:
+        for inp in node.inputs:
             with dpg.node_attribute(parent=node_id, attribute_type=dpg.mvNode_Attr_Input, tag=f"{node_id}:in:{inp}"):
-                dpg.add_text(inp)
+                dpg.add_text(inp, tag=f"{node_id}:in:{inp}:label")
         # outputs
-        for outp in nt.outputs:
+        for outp in node.outputs:
             with dpg.node_attribute(parent=node_id, attribute_type=dpg.mvNode_Attr_Output, tag=f"{node_id}:out:{outp}"):
                 dpg.add_text(outp)
-        # Click handler to select node
+        # Click handler to select node; double click opens groups
         with dpg.item_handler_registry() as hreg:
             dpg.add_item_clicked_handler(callback=_on_node_clicked, user_data=node_id)
+            if is_group(node):
+                dpg.add_item_double_clicked_handler(callback=lambda s, a, u: _open_group_tab(u), user_data=node_id)
         dpg.bind_item_handler_registry(node_id, hreg)
+    pos = node.meta.get("pos")
+    if pos:
+        try:
+            dpg.set_item_pos(node_id, tuple(pos))
+        except Exception:
+            pass
+
+
+def _build_link_item(link: Link):
+    key = link_key(link)
+    item = _LINK_ITEMS.get(key)
+    if item is not None and dpg.does_item_exist(item):
+        return
+    s_attr = f"{link.start_node}:out:{link.start_port}"
+    e_attr = f"{link.end_node}:in:{link.end_port}"
+    # Un extremo aún por construir (reconciliación diferida): el link se crea con él
+    if not (dpg.does_item_exist(s_attr) and dpg.does_item_exist(e_attr)):
+        return
+    _LINK_ITEMS[key] = dpg.add_node_link(s_attr, e_attr, parent=_EDITOR_ID)
+
+
+def _delete_link_item(link: Link):
+    item = _LINK_ITEMS.pop(link_key(link), None)
+    if item is not None and dpg.does_item_exist(item):
+        dpg.delete_item(item)
 
-    GRAPH.add_node(Node(id=node_id, type=nt.name, title=nt.name, inputs=nt.inputs, outputs=nt.outputs, meta={"color": nt.color}))
+
+def _on_journal_op(op: Op):
+    """Reconcilia los items de la UI con una operación aplicada al grafo (idempotente).
+
+    Cada caso contrasta con el estado actual de GRAPH, así un batch grande puede
+    reconciliarse en varios frames aunque entre medias lleguen otras operaciones.
+    """
+    global _LAST_SELECTED_NODE_ID
+    try:
+        if isinstance(op, Batch):
+            if len(op.ops) > _RECONCILE_CHUNK:
+                SCHEDULER.post(_reconcile_steps, op.ops)
+                return
+            for sub in op.ops:
+                _on_journal_op(sub)
+        elif isinstance(op, AddNode):
+            if op.node.id not in GRAPH.nodes:
+                return
+            _build_node_item(op.node)
+            # Incluye links cuyo otro extremo se construyó antes que este nodo
+            for link in GRAPH.links_of(op.node.id):
+                _build_link_item(link)
+        elif isinstance(op, RemoveNode):
+            # Reinsertado después (deshacer/rehacer): el item sigue siendo válido
+            if op.node is not None and GRAPH.nodes.get(op.node_id) is op.node:
+                return
+            for link in op.links:
+                _delete_link_item(link)
+            if dpg.does_item_exist(op.node_id):
+                dpg.delete_item(op.node_id)
+            _close_group_tab(op.node_id)
+            if _LAST_SELECTED_NODE_ID == op.node_id:
+                _LAST_SELECTED_NODE_ID = None
+        elif isinstance(op, MoveNode):
+            if op.new is not None and dpg.does_item_exist(op.node_id):
+                if list(dpg.get_item_pos(op.node_id)) != list(op.new):
+                    dpg.set_item_pos(op.node_id, tuple(op.new))
+            _rebuild_minimap()
+        elif isinstance(op, AddLink):
+            if GRAPH.has_link(op.link):
+                _build_link_item(op.link)
+        elif isinstance(op, RemoveLink):
+            if not GRAPH.has_link(op.link):
+                _delete_link_item(op.link)
+    except Exception as e:
+        print("Journal UI sync error:", e)
+
+
+def _reconcile_steps(ops: list):
+    # Un paso por operación: el presupuesto del frame decide cuántas caben
+    for sub in ops:
+        _on_journal_op(sub)
+        yield
+    _rebuild_minimap()
+
+
+def _next_node_id() -> str:
+    global _NODE_COUNTER
+    _NODE_COUNTER += 1
+    while f"node{_NODE_COUNTER}" in GRAPH.nodes:
+        _NODE_COUNTER += 1
+    return f"node{_NODE_COUNTER}"
+
+
+def _default_node_pos() -> list:
+    """Hueco libre más cercano junto al nodo seleccionado, o a la esquina si no hay ninguno."""
+    selected = GRAPH.nodes.get(_LAST_SELECTED_NODE_ID) if _LAST_SELECTED_NODE_ID else None
+    if selected is not None and selected.meta.get("pos"):
+        x, y = selected.meta["pos"]
+        x, y = x + 40, y + 40
+    else:
+        x, y = 40, 40
+    return list(SPATIAL.free_spot(x, y))
+
+
+def _create_node(type_name: str, pos=None) -> str | None:
+    nt = REGISTRY.get(type_name)
+    if not nt or _EDITOR_ID is None:
+        return None
+
+    try:
+        nt.implementation()
+    except Exception as e:
+        print(f"Node type {nt.name} import error:", e)
+
+    node_id = _next_node_id()
+    # Siempre con posición: el índice espacial y el minimapa solo ven nodos con meta["pos"]
+    meta = {"color": nt.color, "pos": list(pos) if pos is not None else _default_node_pos()}
+    node = Node(id=node_id, type=nt.name, title=nt.name, inputs=list(nt.inputs), outputs=list(nt.outputs), meta=meta)
+    JOURNAL.record(AddNode(node))
     # Send event: node_created
     _send_event("node_created", {
         "id": node_id,
@@ -435,18 +780,23 @@ def _create_node(type_name: str):
     _send_graph_snapshot()
     # Auto-select new node
     _on_node_selected(node_id)
+    return node_id
 
 
 # --- Link management ---
+def _parse_attr(tag: str):
+    """(nodo, puerto) de un tag "<nodo>:in|out:<puerto>"; los ids importados ("fn:pkg.f") llevan ':'."""
+    node_id, _, port = tag.rsplit(":", 2)
+    return node_id, port
+
+
 def _on_link_created(sender, app_data):
     try:
         start_attr, end_attr = app_data
-        # Draw the link visually
-        dpg.add_node_link(start_attr, end_attr, parent=sender)
-        # Update graph model
-        s_node, _, s_port = start_attr.split(":", 2)
-        e_node, _, e_port = end_attr.split(":", 2)
-        GRAPH.add_link(Link(start_node=s_node, start_port=s_port, end_node=e_node, end_port=e_port))
+        # Update graph model; the journal listener draws the link
+        s_node, s_port = _parse_attr(start_attr)
+        e_node, e_port = _parse_attr(end_attr)
+        JOURNAL.record(AddLink(Link(start_node=s_node, start_port=s_port, end_node=e_node, end_port=e_port)))
         # Send event: link_created
         _send_event("link_created", {
             "from": {"node": s_node, "port": s_port},
@@ -459,31 +809,49 @@ def _on_link_created(sender, app_data):
 
 def _on_link_deleted(sender, app_data):
     try:
-        # app_data is the list of link IDs to delete
-        for link_id in app_data:
+        # app_data is the link ID to delete
+        link_ids = app_data if isinstance(app_data, (list, tuple)) else [app_data]
+        for link_id in link_ids:
             conf = dpg.get_item_configuration(link_id)
-            start_attr = conf.get("start_attr")
-            end_attr = conf.get("end_attr")
+            start_attr = dpg.get_item_alias(conf.get("attr_1")) or conf.get("attr_1")
+            end_attr = dpg.get_item_alias(conf.get("attr_2")) or conf.get("attr_2")
             if start_attr and end_attr:
-                s_node, _, s_port = str(start_attr).split(":", 2)
-                e_node, _, e_port = str(end_attr).split(":", 2)
-                # remove matching link from GRAPH
-                GRAPH.links = [
-                    l for l in GRAPH.links
-                    if not (l.start_node == s_node and l.start_port == s_port and l.end_node == e_node and l.end_port == e_port)
-                ]
+                s_node, s_port = _parse_attr(str(start_attr))
+                e_node, e_port = _parse_attr(str(end_attr))
+                JOURNAL.record(RemoveLink(Link(start_node=s_node, start_port=s_port, end_node=e_node, end_port=e_port)))
+            if dpg.does_item_exist(link_id):
+                dpg.delete_item(link_id)
         _send_graph_snapshot()
     except Exception as e:
         print("Link delete error:", e)
 
 
+def _on_mouse_drag(sender, app_data):
+    # Un sondeo por frame como mucho, aunque lleguen drag y release juntos
+    SCHEDULER.post(_poll_node_drags, key="node.drag")
+
+
+def _poll_node_drags():
+    """Registra en el journal los nodos seleccionados cuya posición ya no es la de su meta."""
+    if _EDITOR_ID is None or not dpg.does_item_exist(_EDITOR_ID):
+        return
+    for item in dpg.get_selected_nodes(_EDITOR_ID):
+        node_id = dpg.get_item_alias(item) or item
+        node = GRAPH.nodes.get(node_id)
+        if node is None:
+            continue
+        pos = dpg.get_item_pos(node_id)
+        if list(pos) != list(node.meta.get("pos") or []):
+            _on_node_drag(None, node_id)
+
+
 def _on_node_drag(sender, app_data):
     try:
         node_id = app_data
         pos = dpg.get_item_pos(node_id)
-        # Update graph node meta
+        # Update graph node meta (consecutive samples merge into one undo entry)
         if node_id in GRAPH.nodes:
-            GRAPH.nodes[node_id].meta["pos"] = pos
+            JOURNAL.record(move_node(GRAPH, node_id, pos))
         # Send event: node_moved
         _send_event("node_moved", {"id": node_id, "pos": list(pos)})
     except Exception as e:
@@ -534,8 +902,12 @@ def _toggle_log():
 
 
 def _apply_metal_dark_theme():
-    # Rebind global theme to ensure dark metal is active
-    _build_global_theme()
+    THEMES.set_active("dark")
+
+
+def _show_theme_stats():
+    stats = THEMES.stats()
+    _set_text(_WS_STATUS_ALIAS, f"Temas: {stats['themes']} | items: {stats['items']} | RSS: {stats['rss_kb']} KB")
 
 
 def _reset_layout():
@@ -572,54 +944,402 @@ def _on_new_pressed():
 
 
 def _on_duplicate_pressed():
-    if not _LAST_SELECTED_NODE_ID:
+    # Copia la selección con sus links internos y meta, sin tocar el portapapeles
+    payload = _selection_payload()
+    if payload is not None:
+        _paste_payload(payload, 1)
+
+
+def _selection_payload():
+    ids = _selected_node_ids()
+    if not ids:
+        return None
+    positions = {}
+    for nid in ids:
+        try:
+            positions[nid] = dpg.get_item_pos(nid)
+        except Exception:
+            pass
+    return copy_subgraph(GRAPH, ids, GROUPS.load, positions)
+
+
+def _copy_selection() -> bool:
+    global _CLIPBOARD, _PASTE_COUNT
+    payload = _selection_payload()
+    if payload is None:
+        return False
+    text = encode(payload)
+    _CLIPBOARD = (text, payload)
+    _PASTE_COUNT = 0
+    try:
+        dpg.set_clipboard_text(text)
+    except Exception:
+        pass
+    _set_text(_WS_STATUS_ALIAS, f"Copiados {len(payload['nodes'])} nodos ({len(text) // 1024} KB)")
+    return True
+
+
+def _cut_selection():
+    global _PASTE_COUNT
+    ids = _selected_node_ids()
+    if not _copy_selection():
+        return
+    JOURNAL.record(cut_ops(GRAPH, ids))
+    # Lo cortado se pega en su sitio la primera vez
+    _PASTE_COUNT = -1
+    _send_graph_snapshot()
+
+
+def _paste_clipboard():
+    global _PASTE_COUNT
+    try:
+        text = dpg.get_clipboard_text()
+    except Exception:
+        text = None
+    if _CLIPBOARD is not None and text in (None, "", _CLIPBOARD[0]):
+        payload = _CLIPBOARD[1]
+    else:
+        # Portapapeles de otra instancia (o texto ajeno: decode devuelve None)
+        payload = decode(text)
+        _PASTE_COUNT = 0
+    if payload is None:
+        return
+    _PASTE_COUNT += 1
+    _paste_payload(payload, _PASTE_COUNT)
+
+
+def _paste_payload(payload: dict, shift: int):
+    """Inserta un payload como un solo Batch (un paso de deshacer) y un solo mensaje de sync."""
+    ox, oy = payload.get("origin") or (0, 0)
+    batch, ids, interiors = paste_ops(payload, _next_node_id, (ox + 40 * shift, oy + 40 * shift))
+    if not ids:
         return
+    # Todo el bloque se desplaza junto hasta que ningún nodo pegado tape a uno existente
+    added = [op.node for op in batch.ops if isinstance(op, AddNode) and op.node.meta.get("pos")]
+    dx, dy = SPATIAL.free_offset([tuple(n.meta["pos"]) for n in added])
+    if dx or dy:
+        for node in added:
+            x, y = node.meta["pos"]
+            node.meta["pos"] = [x + dx, y + dy]
+    if interiors:
+        nodes = {op.node.id: op.node for op in batch.ops if isinstance(op, AddNode)}
+        for inner in interiors.values():
+            nodes.update(inner.nodes)
+        for gid, inner in interiors.items():
+            GROUPS.adopt(nodes[gid], inner)
+    JOURNAL.record(batch)
+    _send_graph_snapshot()
+    _rebuild_minimap()
+    _on_node_selected(ids[0])
+
+
+def _selected_node_ids() -> list:
+    ids = []
+    try:
+        for item in dpg.get_selected_nodes(_EDITOR_ID) or []:
+            alias = dpg.get_item_alias(item) or item
+            if alias in GRAPH.nodes:
+                ids.append(alias)
+    except Exception:
+        pass
+    if not ids and _LAST_SELECTED_NODE_ID in GRAPH.nodes:
+        ids.append(_LAST_SELECTED_NODE_ID)
+    return ids
+
+
+def _on_group_pressed():
+    ids = _selected_node_ids()
+    if not ids:
+        return
+    group_id = _next_node_id()
+    try:
+        JOURNAL.record(GROUPS.group_ops(GRAPH, ids, group_id))
+    except Exception as e:
+        print("Group error:", e)
+        return
+    _send_graph_snapshot()
+    _on_node_selected(group_id)
+
+
+def _on_ungroup_pressed():
     node = GRAPH.nodes.get(_LAST_SELECTED_NODE_ID)
-    if not node:
+    if not is_group(node):
+        return
+    batch = GROUPS.ungroup_ops(GRAPH, node.id)
+    if batch is None:
         return
-    _create_node(node.type)
-    # offset new node position near last selected
+    JOURNAL.record(batch)
+    _send_graph_snapshot()
+
+
+def _group_tab_tag(group_id: str) -> str:
+    return f"group_tab:{group_id}"
+
+
+def _open_group_tab(group_id: str):
+    """Materializa el interior de un grupo (cargado bajo demanda) en su propia pestaña."""
+    node = GRAPH.nodes.get(group_id)
+    if not is_group(node):
+        return
+    tab_tag = _group_tab_tag(group_id)
+    if dpg.does_item_exist(tab_tag):
+        dpg.set_value("editor_tabbar", tab_tag)
+        return
+    interior = GROUPS.expand(node)
+    with dpg.tab(label=node.title or group_id, parent="editor_tabbar", tag=tab_tag):
+        # Al colapsar se liberan los items y el interior vuelve a disco
+        dpg.add_button(label="Collapse", callback=lambda s, a, u: _close_group_tab(u), user_data=group_id)
+        with dpg.node_editor() as inner_editor:
+            for inner in interior.nodes.values():
+                inner_tag = f"{group_id}/{inner.id}"
+                with dpg.node(label=inner.title or inner.type, tag=inner_tag):
+                    for inp in inner.inputs:
+                        with dpg.node_attribute(attribute_type=dpg.mvNode_Attr_Input, tag=f"{inner_tag}:in:{inp}"):
+                            dpg.add_text(inp)
+                    for outp in inner.outputs:
+                        with dpg.node_attribute(attribute_type=dpg.mvNode_Attr_Output, tag=f"{inner_tag}:out:{outp}"):
+                            dpg.add_text(outp)
+                pos = inner.meta.get("pos")
+                if pos:
+                    dpg.set_item_pos(inner_tag, tuple(pos))
+            for link in interior.links:
+                try:
+                    dpg.add_node_link(f"{group_id}/{link.start_node}:out:{link.start_port}",
+                                      f"{group_id}/{link.end_node}:in:{link.end_port}", parent=inner_editor)
+                except Exception as e:
+                    print("Group link error:", e)
+    dpg.set_value("editor_tabbar", tab_tag)
+
+
+def _close_group_tab(group_id: str):
+    tab_tag = _group_tab_tag(group_id)
     try:
-        pos = dpg.get_item_pos(_LAST_SELECTED_NODE_ID)
-        dpg.set_item_pos(f"node{_NODE_COUNTER}", (pos[0] + 40, pos[1] + 40))
+        if dpg.does_item_exist(tab_tag):
+            dpg.delete_item(tab_tag)
     except Exception:
         pass
-    _rebuild_minimap()
+    GROUPS.collapse(group_id)
 
 
-def _on_save_pressed():
-    # write project.json to root
-    snap = GRAPH.snapshot()
-    for n in snap["nodes"]:
-        nid = n["id"]
+def _on_run_pressed():
+    # Por frames: mientras un nodo corre en un worker la UI sigue respondiendo
+    SCHEDULER.post(_evaluate_steps, key="evaluate")
+
+
+def _on_stop_pressed():
+    """Detiene la evaluación en curso y mata el worker de un nodo colgado."""
+    SCHEDULER.cancel("evaluate")
+    if _STREAM_RUN is not None:
+        _STREAM_RUN.stop()
+    killed = POOL.kill_running()
+    _set_text(_WS_STATUS_ALIAS, f"Evaluación detenida ({killed} workers reiniciados)")
+
+
+def _on_stream_pressed():
+    """Evalúa el grafo en modo streaming: cada nodo en su hilo, enlaces como colas acotadas."""
+    global _STREAM_RUN
+    if _STREAM_RUN is not None and _STREAM_RUN.running:
+        return
+    _STREAM_RUN = StreamRun(EVALUATOR, on_done=lambda run: SCHEDULER.post(_on_stream_done, run))
+    _STREAM_RUN.start()
+    _set_text(_WS_STATUS_ALIAS, "Stream en curso...")
+    SCHEDULER.post(_stream_stats_steps, _STREAM_RUN, priority=LOW, key="stream.stats")
+
+
+def _stream_stats_steps(run: StreamRun):
+    last = 0.0
+    while run.running:
+        now = time.perf_counter()
+        if now - last >= _STREAM_STATS_PERIOD:
+            _show_link_stats(run)
+            last = now
+        yield
+    _show_link_stats(run)
+
+
+def _show_link_stats(run: StreamRun):
+    """Chunks y caudal de cada enlace, junto al puerto de entrada que alimenta."""
+    for (_, _, end_node, end_port), st in run.link_stats().items():
+        tag = f"{end_node}:in:{end_port}:label"
+        if dpg.does_item_exist(tag):
+            rate = st["bytes_per_s"] / 1e6 if st["bytes"] else st["chunks_per_s"]
+            unit = "MB/s" if st["bytes"] else "chunks/s"
+            dpg.set_value(tag, f"{end_port}  {st['chunks']} chunks, {rate:.1f} {unit}")
+
+
+def _on_stream_done(run: StreamRun):
+    for node_id, outputs in run.results.items():
+        node = GRAPH.nodes.get(node_id)
+        if node and node.outputs and node.outputs[0] in outputs:
+            _show_node_value(node_id, outputs[node.outputs[0]])
+    for node_id, err in run.errors.items():
+        print(f"Stream error ({node_id}):", err)
+    chunks = sum(st["chunks"] for st in run.link_stats().values())
+    _set_text(_WS_STATUS_ALIAS, f"Stream: {chunks} chunks en {run.elapsed:.2f} s")
+
+
+def _on_files_changed(node_ids):
+    """Cambió el contenido de archivos leídos por nodos: solo esos nodos y su cono se re-evalúan."""
+    node_ids = [nid for nid in node_ids if nid in GRAPH.nodes]
+    if not node_ids:
+        return
+    EVALUATOR.mark_dirty(*node_ids)
+    SCHEDULER.post(_evaluate_steps, key="evaluate")
+
+
+def _evaluate_steps():
+    updated = yield from EVALUATOR.evaluate_steps()
+    for node_id, outputs in updated.items():
+        node = GRAPH.nodes.get(node_id)
+        if node and node.outputs:
+            _show_node_value(node_id, outputs.get(node.outputs[0]))
+    for node_id, err in EVALUATOR.errors.items():
+        print(f"Eval error ({node_id}):", err)
+    run = EVALUATOR.last_run
+    _set_text(_WS_STATUS_ALIAS, f"Evaluados {run['computed']} nodos, {run['cached']} desde caché, "
+                                f"{run['fused']} fusionados")
+
+
+def _run_layout(algorithm: str):
+    """Calcula el layout en un hilo y va mostrando posiciones intermedias en el canvas."""
+    global _LAYOUT_JOB
+    _stop_layout()
+    if not GRAPH.nodes:
+        return
+
+    def show_step(positions, iteration):
+        global _LAYOUT_SHOWN
+        # Desde aquí el canvas difiere del grafo hasta que finish() registre las posiciones
+        _LAYOUT_SHOWN = True
+        _set_text(_WS_STATUS_ALIAS, f"Layout: iteración {iteration}")
+        yield from _set_positions_steps(positions.items())
+
+    def finish(positions):
+        global _LAYOUT_SHOWN
+        _LAYOUT_SHOWN = False
+        # Un solo paso de deshacer para todo el layout
+        moves = [move_node(GRAPH, nid, (x, y)) for nid, (x, y) in positions.items() if nid in GRAPH.nodes]
+        JOURNAL.record(Batch(moves))
+        _set_text(_WS_STATUS_ALIAS, "Layout: listo")
+        _rebuild_minimap()
+        _send_graph_snapshot()
+
+    # El hilo del layout solo encola; si el render va atrás, solo se pinta el paso más reciente
+    def on_step(positions, iteration):
+        SCHEDULER.post(show_step, positions, iteration, key="layout")
+
+    def on_done(positions):
+        SCHEDULER.post(finish, positions, key="layout")
+
+    _LAYOUT_JOB = LayoutJob(GRAPH, algorithm, on_step=on_step, on_done=on_done).start()
+
+
+def _stop_layout():
+    """Cancela el layout en curso; el canvas vuelve a las posiciones del grafo (las de antes del layout)."""
+    global _LAYOUT_JOB, _LAYOUT_SHOWN
+    if _LAYOUT_JOB is not None:
+        _LAYOUT_JOB.cancel()
+        _LAYOUT_JOB = None
+    SCHEDULER.cancel("layout")
+    if _LAYOUT_SHOWN:
+        _LAYOUT_SHOWN = False
+        restore = [(nid, node.meta["pos"]) for nid, node in GRAPH.nodes.items() if node.meta.get("pos")]
+        SCHEDULER.post(_set_positions_steps, restore, key="layout.restore")
+
+
+def _set_positions_steps(positions):
+    """Coloca los items de los nodos, cediendo el frame cada _POSITIONS_CHUNK nodos."""
+    for i, (nid, (x, y)) in enumerate(positions):
         try:
-            pos = dpg.get_item_pos(nid)
-            n.setdefault("meta", {})["pos"] = list(pos)
+            dpg.set_item_pos(nid, (x, y))
         except Exception:
             pass
+        if i % _POSITIONS_CHUNK == _POSITIONS_CHUNK - 1:
+            yield
+
+
+def _on_import_python_pressed():
+    """Importa el código Python del workspace en un hilo; el resultado es un solo paso de deshacer."""
+    def work():
+        _set_text(_WS_STATUS_ALIAS, "Importando Python...")
+        try:
+            result = import_tree(os.getcwd(), ImportCache(PROJECT_PATH + ".import-cache.json"),
+                                 progress=lambda done, total: _set_text(_WS_STATUS_ALIAS, f"Importando Python: {done}/{total}"))
+        except Exception as e:
+            _set_text(_WS_STATUS_ALIAS, f"Error de importación: {e}")
+            return
+        SCHEDULER.post(apply, result)
+
+    def apply(result):
+        # Reimportar solo añade lo que aún no está en el grafo
+        ops = [AddNode(node) for nid, node in result.graph.nodes.items() if nid not in GRAPH.nodes]
+        ops += [AddLink(link) for link in result.graph.links if not GRAPH.has_link(link)]
+        if ops:
+            JOURNAL.record(Batch(ops))
+            _send_graph_snapshot()
+        _set_text(_WS_STATUS_ALIAS, f"Importados {len(result.graph.nodes)} nodos ({result.parsed} archivos analizados, {result.cached} en caché)")
+
+    threading.Thread(target=work, daemon=True).start()
+
+
+def _on_save_pressed():
+    # write project.json to root (temp file + rename: never leaves a half-written project);
+    # solo aquí se escribe project.json, el autosave va a project.json.autosave + WAL
     try:
-        with open("project.json", "w", encoding="utf-8") as f:
-            json.dump(snap, f, indent=2)
+        AUTOSAVE.save(_snapshot_with_positions())
         _set_text(_WS_STATUS_ALIAS, "WS: saved project.json")
     except Exception as e:
         print("Save error:", e)
 
 
-def _on_load_pressed():
+def _watch_selected_node():
+    node = GRAPH.nodes.get(_LAST_SELECTED_NODE_ID) if _LAST_SELECTED_NODE_ID else None
+    if node is None:
+        _set_text(_WS_STATUS_ALIAS, "Selecciona un nodo para vigilar sus salidas")
+        return
+    TELEMETRY.watch(*(f"{node.id}.{port}" for port in node.outputs))
+    # El valor actual aparece ya, sin esperar a la próxima evaluación
+    TELEMETRY.publish_outputs(node.id, EVALUATOR.results.get(node.id, {}))
+
+
+def _show_changes_since_save():
+    """Compara el grafo actual con project.json en un hilo; la ventana se rellena en el render."""
+    # Copia profunda aquí: el snapshot comparte meta con los nodos vivos
+    current = json.loads(json.dumps(_snapshot_with_positions()))
+
+    def work():
+        try:
+            diff = diff_graphs(load_graph(PROJECT_PATH), Graph.from_snapshot(current))
+        except Exception as e:
+            _set_text(_WS_STATUS_ALIAS, f"Error al comparar: {e}")
+            return
+        SCHEDULER.post(show_changes, diff)
+
+    threading.Thread(target=work, daemon=True).start()
+
+
+def _recover_autosave():
     try:
-        with open("project.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        graph = recover(PROJECT_PATH)
     except Exception as e:
-        print("Load error:", e)
+        print("Autosave recovery error:", e)
         return
+    if graph is None:
+        return
+    _load_graph_data(graph.snapshot())
+    _set_text(_WS_STATUS_ALIAS, "WS: recovered unsaved changes")
+
 
+def _load_graph_data(data: dict):
+    """Reemplaza GRAPH y el editor con un snapshot, preservando IDs."""
     # Clear current editor and graph
     try:
         dpg.delete_item(_EDITOR_ID, children_only=True)
     except Exception:
         pass
-    GRAPH.nodes.clear()
-    GRAPH.links.clear()
+    GRAPH.clear()
+    _LINK_ITEMS.clear()
+    JOURNAL.clear()
 
     # Reset counter
     global _NODE_COUNTER
@@ -628,34 +1348,62 @@ def _on_load_pressed():
     # Rebuild nodes preserving IDs
     for n in data.get("nodes", []):
         tname = n.get("type", "Compute")
-        _create_node(tname)
-        nid_new = f"node{_NODE_COUNTER}"
-        nid_target = n.get("id", nid_new)
-        if nid_target != nid_new:
-            try:
-                dpg.configure_item(nid_new, tag=nid_target)
-            except Exception:
-                pass
-        # set pos if available
-        pos = n.get("meta", {}).get("pos")
-        if pos:
-            try:
-                dpg.set_item_pos(nid_target, tuple(pos))
-            except Exception:
-                pass
+        nt = REGISTRY.get(tname)
+        node = Node(
+            id=n.get("id") or _next_node_id(),
+            type=tname,
+            title=n.get("title") or tname,
+            inputs=list(n.get("inputs", nt.inputs if nt else [])),
+            outputs=list(n.get("outputs", nt.outputs if nt else [])),
+            meta=dict(n.get("meta", {})),
+        )
+        GRAPH.add_node(node)
+        for nid in [node.id] + list(node.meta.get("group", {}).get("members", [])):
+            suffix = nid[4:] if nid.startswith("node") else ""
+            if suffix.isdigit():
+                _NODE_COUNTER = max(_NODE_COUNTER, int(suffix))
 
     # Rebuild links
     for l in data.get("links", []):
         s = l.get("from", {})
         e = l.get("to", {})
-        s_attr = f"{s.get('node')}:out:{s.get('port')}"
-        e_attr = f"{e.get('node')}:in:{e.get('port')}"
+        link = Link(start_node=s.get('node'), start_port=s.get('port'), end_node=e.get('node'), end_port=e.get('port'))
         try:
-            dpg.add_node_link(s_attr, e_attr, parent=_EDITOR_ID)
-            GRAPH.add_link(Link(start_node=s.get('node'), start_port=s.get('port'), end_node=e.get('node'), end_port=e.get('port')))
+            GRAPH.add_link(link)
         except Exception as ex:
             print("Link load error:", ex)
+    SPATIAL.rebuild(GRAPH)
+    INDEXER.index_graph(GRAPH)
+    FILES.bind_graph(GRAPH)
     _rebuild_minimap()
+    # El grafo queda completo ya; los items del editor se crean en trozos entre frames
+    SCHEDULER.post(_build_editor_steps, key="editor.build")
+
+
+def _build_editor_steps():
+    # Un paso por item: crear items cuesta más cuanto más grande es el editor
+    for node in list(GRAPH.nodes.values()):
+        if GRAPH.nodes.get(node.id) is node:
+            _build_node_item(node)
+        yield
+    for link in GRAPH.links:
+        if GRAPH.has_link(link):
+            try:
+                _build_link_item(link)
+            except Exception as ex:
+                print("Link load error:", ex)
+        yield
+
+
+def _on_load_pressed():
+    try:
+        with open(PROJECT_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print("Load error:", e)
+        return
+    AUTOSAVE.discard()
+    _load_graph_data(data)
 
 # --- Minimap overlay estilo VS Code ---
 def _build_minimap_overlay():
@@ -694,42 +1442,32 @@ def _center_minimap_in_main():
 
 
 def _rebuild_minimap():
+    # Muchas llamadas seguidas redibujan una sola vez
+    SCHEDULER.post(_draw_minimap, priority=LOW, key="minimap")
+
+
+def _draw_minimap():
     try:
         if not _MINIMAP_DRAW_ID:
             return
         dpg.delete_item(_MINIMAP_DRAW_ID, children_only=True)
         # Fondo semi-transparente
         dpg.draw_rectangle((4, 4), (276, 156), color=(0, 0, 0, 80), fill=(0, 0, 0, 60), parent=_MINIMAP_DRAW_ID, thickness=1)
-        # Dibujar nodos como rectángulos escalados
-        nodes = list(GRAPH.nodes.values())
-        # Obtener bounds
-        xs, ys = [], []
-        for n in nodes:
-            nid = n.id
-            try:
-                x, y = dpg.get_item_pos(nid)
-                xs.append(x)
-                ys.append(y)
-            except Exception:
-                pass
-        if xs and ys:
-            minx, maxx = min(xs), max(xs)
-            miny, maxy = min(ys), max(ys)
-            spanx = max(1, maxx - minx)
-            spany = max(1, maxy - miny)
+        # Dibujar nodos como rectángulos escalados; bounds y posiciones salen del índice espacial
+        bounds = SPATIAL.bounds()
+        if bounds:
+            minx, miny = bounds[0], bounds[1]
+            spanx = max(1, bounds[2] - minx)
+            spany = max(1, bounds[3] - miny)
         else:
             minx = miny = 0
             spanx = spany = 1
-        for n in nodes:
-            nid = n.id
-            try:
-                x, y = dpg.get_item_pos(nid)
-                # Normalizar a drawlist
-                nx = 8 + int((x - minx) / spanx * 264)
-                ny = 8 + int((y - miny) / spany * 144)
-                dpg.draw_rectangle((nx, ny), (nx + 10, ny + 6), color=(0, 122, 204, 180), fill=(0, 122, 204, 80), parent=_MINIMAP_DRAW_ID)
-            except Exception:
-                pass
+        for nid in SPATIAL.query_rect(*bounds) if bounds else []:
+            x, y, _, _ = SPATIAL.rect(nid)
+            # Normalizar a drawlist
+            nx = 8 + int((x - minx) / spanx * 264)
+            ny = 8 + int((y - miny) / spany * 144)
+            dpg.draw_rectangle((nx, ny), (nx + 10, ny + 6), color=(0, 122, 204, 180), fill=(0, 122, 204, 80), parent=_MINIMAP_DRAW_ID)
     except Exception as e:
         print("Minimap rebuild error:", e)
 
@@ -977,6 +1715,9 @@ def _panel_close(name: str):
 
 
 def _tab_open(name: str, in_: str = "Editor"):
+    if os.path.isfile(name):
+        _open_file_in_editor(name)
+        return
     try:
         with dpg.tab(label=name, parent="editor_tabbar"):
             dpg.add_text(f"Abierto: {name}")
@@ -991,7 +1732,7 @@ def _tab_close(name: str):
         children = children_map.get(1, []) if isinstance(children_map, dict) else []
         for child in children:
             if dpg.get_item_label(child) == name:
-                dpg.delete_item(child)
+                close_editor_tab(child)
                 break
     except Exception as e:
         print("Tab close error:", e)
@@ -1063,6 +1804,11 @@ def _minimap_toggle(state: str):
 
 def _settings_set(key: str, value):
     _SETTINGS[key] = value
+    if key == "autosave":
+        if value:
+            _start_autosave()
+        else:
+            AUTOSAVE.stop()
 
 
 def _ui_drag(name: str, to: str):
@@ -1092,29 +1838,25 @@ def _ui_show_all_panels():
 
 
 def _style_apply(name: str, style: dict):
-    # Aplica cambios básicos de estilo VSCodeLike
+    # Aplica cambios básicos de estilo VSCodeLike; redefinir el mismo nombre reemplaza el tema
     try:
+        entries = []
         bg = style.get("background")
         accent = style.get("accentColor")
-        with dpg.theme() as theme_id:
-            with dpg.theme_component(dpg.mvAll):
-                if isinstance(bg, str) and bg.startswith('#'):
-                    r = int(bg[1:3], 16)
-                    g = int(bg[3:5], 16)
-                    b = int(bg[5:7], 16)
-                    dpg.add_theme_color(dpg.mvThemeCol_WindowBg, (r, g, b, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_Text, (220, 220, 220, 255))
-                base_btn = (0, 122, 204, 255)
-                if isinstance(accent, str) and accent.startswith('#'):
-                    r = int(accent[1:3], 16)
-                    g = int(accent[3:5], 16)
-                    b = int(accent[5:7], 16)
-                    base_btn = (r, g, b, 255)
-                dpg.add_theme_color(dpg.mvThemeCol_Button, base_btn)
-                dpg.add_theme_color(dpg.mvThemeCol_ButtonHovered, base_btn)
-                dpg.add_theme_color(dpg.mvThemeCol_ButtonActive, base_btn)
-                dpg.add_theme_style(dpg.mvStyleVar_WindowRounding, 8.0)
-                dpg.add_theme_style(dpg.mvStyleVar_FrameRounding, 6.0)
-        dpg.bind_theme(theme_id)
+        if isinstance(bg, str) and bg.startswith('#'):
+            entries.append(("color", dpg.mvThemeCol_WindowBg, _hex_rgba(bg)))
+        entries.append(("color", dpg.mvThemeCol_Text, (220, 220, 220, 255)))
+        base_btn = _hex_rgba(accent) if isinstance(accent, str) and accent.startswith('#') else (0, 122, 204, 255)
+        entries.append(("color", dpg.mvThemeCol_Button, base_btn))
+        entries.append(("color", dpg.mvThemeCol_ButtonHovered, base_btn))
+        entries.append(("color", dpg.mvThemeCol_ButtonActive, base_btn))
+        entries.append(("style", dpg.mvStyleVar_WindowRounding, 8.0))
+        entries.append(("style", dpg.mvStyleVar_FrameRounding, 6.0))
+        THEMES.define(name, [(dpg.mvAll, entries)])
+        THEMES.set_active(name)
     except Exception as e:
         print("Style apply error:", e)
+
+
+def _hex_rgba(color: str) -> tuple:
+    return (int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16), 255)
@@ -0,0 +1,362 @@
+"""ui.widgets.text_view
+
+Vista de texto virtualizada sobre un `PieceTable`.
+
+Solo existen items DearPyGui para las líneas visibles: un pool de filas
+(número de línea + texto) que se recoloca al hacer scroll, y un spacer al
+final del documento que da a la ventana su altura total para que la
+barra de scroll nativa funcione. Abrir un archivo de varios MB cuesta lo
+mismo que uno de diez líneas.
+
+Con un `IncrementalLexer` las filas se colorean por token: cada frame se
+recogen los resultados del hilo del lexer y se redibujan solo las filas
+visibles, y solo si algo cambió.
+
+Se edita línea a línea: un clic abre un `input_text` sobre la línea y
+cada cambio reemplaza solo el tramo de esa línea en el buffer. El input
+es multilínea para que Enter y pegar varias líneas lleguen con sus saltos:
+el valor se escribe tal cual (con la terminación de línea del archivo) y
+la edición sigue en la última línea escrita. Retroceso al principio de la
+línea la une con la anterior y Supr al final une la siguiente; como
+DearPyGui no da la posición del cursor, se detecta porque la tecla no
+cambió el texto. Las flechas mueven la edición; estas teclas solo actúan
+con el foco en el input, y la edición termina cuando el foco sale de él.
+"""
+from typing import Callable, List, Optional, Tuple
+
+from dearpygui import dearpygui as dpg
+
+from ..core.lexer import IncrementalLexer, Token
+from ..core.textbuffer import PieceTable
+from .themes import TEXT_LIGHT
+
+LINE_HEIGHT = 17
+GUTTER_WIDTH = 56
+# Más allá de esto una línea se recorta al dibujarla (no en el buffer)
+MAX_COLUMNS = 400
+# Filas extra por encima y por debajo de lo visible
+OVERSCAN = 4
+GUTTER_COLOR = (120, 120, 120, 255)
+# Colores por tipo de token (paleta oscura estilo VS Code)
+TOKEN_COLORS = {
+    None: TEXT_LIGHT,
+    "keyword": (197, 134, 192, 255),
+    "builtin": (78, 201, 176, 255),
+    "def": (220, 220, 170, 255),
+    "decorator": (220, 220, 170, 255),
+    "string": (206, 145, 120, 255),
+    "comment": (106, 153, 85, 255),
+    "number": (181, 206, 168, 255),
+    "op": (212, 212, 212, 255),
+}
+
+_ACTIVE: Optional["TextView"] = None
+_VIEWS: List["TextView"] = []
+_KEYS_READY = False
+
+
+def _displayable(text: str) -> str:
+    """Texto sin surrogates (bytes no UTF-8 del archivo), que DearPyGui no admite; misma longitud."""
+    if text.isascii():
+        return text
+    return text.encode("utf-8", "replace").decode("utf-8")
+
+
+def _on_key(sender, app_data, user_data):
+    view = _ACTIVE
+    if view is None or view.editing is None or not dpg.does_item_exist(view.window):
+        return
+    # Las teclas son globales: solo cuentan si se está escribiendo en la línea abierta
+    if view.has_focus():
+        user_data(view)
+
+
+def _on_click():
+    # Las child windows no admiten clicked handler: se mira qué vista está bajo el ratón
+    for view in _VIEWS:
+        if dpg.does_item_exist(view.window) and dpg.is_item_hovered(view.window):
+            view._on_click()
+
+
+def _install_keys():
+    """Un solo registro de teclas y clics para todas las vistas; actúa sobre la que se está editando."""
+    global _KEYS_READY
+    if _KEYS_READY:
+        return
+    _KEYS_READY = True
+    with dpg.handler_registry():
+        dpg.add_key_press_handler(dpg.mvKey_Up, callback=_on_key, user_data=lambda v: v.move(-1))
+        dpg.add_key_press_handler(dpg.mvKey_Down, callback=_on_key, user_data=lambda v: v.move(1))
+        dpg.add_key_press_handler(dpg.mvKey_Back, callback=_on_key, user_data=lambda v: v.expect_join(-1))
+        dpg.add_key_press_handler(dpg.mvKey_Delete, callback=_on_key, user_data=lambda v: v.expect_join(1))
+        dpg.add_key_press_handler(dpg.mvKey_Escape, callback=_on_key, user_data=lambda v: v.stop_editing())
+        dpg.add_mouse_click_handler(button=dpg.mvMouseButton_Left, callback=_on_click)
+
+
+class TextView:
+    def __init__(self, parent, buffer: PieceTable, path: Optional[str] = None,
+                 on_change: Optional[Callable[["TextView"], None]] = None,
+                 lexer: Optional[IncrementalLexer] = None):
+        self.buffer = buffer
+        self.lexer = lexer
+        self.path = path
+        self.on_change = on_change
+        self.editing: Optional[int] = None  # línea abierta en el input
+        # Retroceso (-1) o Supr (1) pulsado: (dirección, versión del buffer, frames vistos desde entonces)
+        self._join: Optional[Tuple[int, int, int]] = None
+        # El foco pedido en edit() llega un frame después; hasta verlo no se cierra la edición
+        self._focus_seen = False
+        # Línea a mostrar en cuanto la ventana tenga tamaño (recién creada aún no lo tiene)
+        self._goto: Optional[int] = None
+        self._rows: List[Tuple[int, int, List[int]]] = []  # (gutter, grupo, un texto por token)
+        self._shown: Tuple[int, ...] = ()  # (primera línea, filas, versión, generación del lexer)
+        _install_keys()
+        with dpg.group(horizontal=True, parent=parent):
+            self.save_id = dpg.add_button(label="Guardar", callback=lambda: self.save(), enabled=path is not None)
+            self.status_id = dpg.add_text("")
+        with dpg.child_window(parent=parent, width=-1, height=-1, horizontal_scrollbar=True) as self.window:
+            self.extent_id = dpg.add_spacer(width=1, height=1, pos=(0, LINE_HEIGHT))
+            self.edit_id = dpg.add_input_text(show=False, width=-1, height=LINE_HEIGHT + 4, multiline=True,
+                                              callback=self._on_edit)
+        with dpg.item_handler_registry() as handlers:
+            dpg.add_item_visible_handler(callback=lambda: self.refresh())
+        # Las child windows no admiten visible handler; la barra de estado se ve siempre que la pestaña
+        dpg.bind_item_handler_registry(self.status_id, handlers)
+        self._handlers = handlers
+        _VIEWS.append(self)
+        self._update_status()
+
+    # --- dibujo ---
+    def _visible(self) -> Tuple[int, int]:
+        top = dpg.get_y_scroll(self.window)
+        height = dpg.get_item_rect_size(self.window)[1] or 600
+        first = max(0, int(top // LINE_HEIGHT) - OVERSCAN)
+        return first, int(height // LINE_HEIGHT) + 2 * OVERSCAN + 1
+
+    def refresh(self, force: bool = False):
+        """Recoloca las filas si cambió el scroll, el tamaño o el texto; si no, no hace nada."""
+        if not dpg.does_item_exist(self.window):
+            return
+        if self.editing is not None:
+            if self.has_focus():
+                self._focus_seen = True
+            elif self._focus_seen:
+                # El foco se fue a otro sitio (terminal, paleta, propiedades): se deja de editar
+                self.stop_editing()
+                return
+            if self._join is not None:
+                self._check_join()
+        if self._goto is not None and dpg.get_item_rect_size(self.window)[1]:
+            height = dpg.get_item_rect_size(self.window)[1]
+            dpg.set_y_scroll(self.window, max(0, self._goto * LINE_HEIGHT - height // 3))
+            self._goto = None
+        if self.lexer is not None:
+            self.lexer.apply()
+        first, count = self._visible()
+        state = (first, count, self.buffer.version, self.lexer.generation if self.lexer else 0)
+        if state == self._shown and not force:
+            return
+        self._shown = state
+        total = self.buffer.line_count()
+        dpg.set_item_pos(self.extent_id, (0, total * LINE_HEIGHT))
+        while len(self._rows) < count:
+            self._rows.append((dpg.add_text("", parent=self.window, color=GUTTER_COLOR),
+                               dpg.add_group(parent=self.window, horizontal=True, horizontal_spacing=0), []))
+        lines = self.buffer.lines(first, count)
+        for i, (gutter, group, texts) in enumerate(self._rows):
+            n = first + i
+            if i >= len(lines):
+                dpg.configure_item(gutter, show=False)
+                dpg.configure_item(group, show=False)
+                continue
+            y = n * LINE_HEIGHT
+            dpg.configure_item(gutter, show=True, pos=(4, y))
+            dpg.set_value(gutter, f"{n + 1:>6}")
+            # La fila en edición la tapa el input
+            dpg.configure_item(group, show=n != self.editing, pos=(GUTTER_WIDTH, y))
+            self._draw_line(group, texts, lines[i], self.lexer.tokens(n) if self.lexer else None)
+
+    @staticmethod
+    def _draw_line(group: int, texts: List[int], line: str, tokens: Optional[List[Token]]):
+        line = _displayable(line.rstrip("\r"))
+        clipped = len(line) > MAX_COLUMNS
+        if clipped:
+            line = line[:MAX_COLUMNS]
+        # Sin tokens todavía (recién editada o aún no lexada): texto plano
+        if tokens:
+            spans = [(a, min(b, len(line)), kind) for a, b, kind in tokens if a < len(line)]
+        else:
+            spans = [(0, len(line), None)]
+        if clipped:
+            spans.append((len(line), len(line), "ellipsis"))
+        while len(texts) < len(spans):
+            texts.append(dpg.add_text("", parent=group))
+        for j, item in enumerate(texts):
+            if j >= len(spans):
+                dpg.configure_item(item, show=False)
+                continue
+            a, b, kind = spans[j]
+            value = " ..." if kind == "ellipsis" else line[a:b]
+            dpg.configure_item(item, show=True, color=TOKEN_COLORS.get(kind, GUTTER_COLOR))
+            dpg.set_value(item, value)
+
+    def _update_status(self):
+        state = " · modificado" if self.buffer.modified else ""
+        dpg.set_value(self.status_id, f"{self.buffer.line_count()} líneas{state}")
+
+    def _changed(self):
+        self._update_status()
+        if self.on_change is not None:
+            self.on_change(self)
+
+    # --- edición ---
+    def _line_span(self, line: int) -> Tuple[int, int]:
+        """Tramo [inicio, fin) de la línea sin su salto (ni el \\r de un CRLF)."""
+        start = self.buffer.line_start(line)
+        end = self.buffer.line_start(line + 1)
+        raw = self.buffer.text(max(start, end - 2), end)
+        if raw.endswith("\n"):
+            end -= 1
+            raw = raw[:-1]
+        if raw.endswith("\r"):
+            end -= 1
+        return start, end
+
+    def _line_ending(self, line: int) -> str:
+        """Terminación de `line` (\n o \r\n); la de la anterior si es la última, que no tiene."""
+        _, end = self._line_span(line)
+        ending = self.buffer.text(end, self.buffer.line_start(line + 1))
+        if not ending and line > 0:
+            _, end = self._line_span(line - 1)
+            ending = self.buffer.text(end, self.buffer.line_start(line))
+        return ending or "\n"
+
+    def _on_click(self):
+        mx, my = dpg.get_mouse_pos(local=False)
+        wx, wy = dpg.get_item_rect_min(self.window)
+        line = int((my - wy + dpg.get_y_scroll(self.window)) // LINE_HEIGHT)
+        line = min(line, self.buffer.line_count() - 1)
+        if mx - wx >= GUTTER_WIDTH - 8 and line != self.editing:
+            self.edit(line)
+
+    def has_focus(self) -> bool:
+        return dpg.is_item_active(self.edit_id) or dpg.is_item_focused(self.edit_id)
+
+    def edit(self, line: int):
+        global _ACTIVE
+        line = max(0, min(line, self.buffer.line_count() - 1))
+        start, end = self._line_span(line)
+        value = self.buffer.text(start, end)
+        if _displayable(value) != value:
+            # Editarla reescribiría esos bytes: la línea queda de solo lectura
+            dpg.set_value(self.status_id, f"Línea {line + 1}: bytes no UTF-8, solo lectura")
+            return
+        self.editing = line
+        self._focus_seen = False
+        self._join = None
+        _ACTIVE = self
+        dpg.set_value(self.edit_id, value)
+        dpg.configure_item(self.edit_id, show=True, pos=(GUTTER_WIDTH - 4, line * LINE_HEIGHT - 2))
+        self._scroll_to(line)
+        self.refresh(force=True)
+        dpg.focus_item(self.edit_id)
+
+    def stop_editing(self):
+        global _ACTIVE
+        self.editing = None
+        self._join = None
+        if _ACTIVE is self:
+            _ACTIVE = None
+        dpg.configure_item(self.edit_id, show=False)
+        self.refresh(force=True)
+
+    def goto(self, line: int):
+        """Lleva la vista a `line` (0 es la primera), con la línea a un tercio de la altura."""
+        self._goto = max(0, min(line, self.buffer.line_count() - 1))
+        self.refresh(force=True)
+
+    def _scroll_to(self, line: int):
+        top = dpg.get_y_scroll(self.window)
+        height = dpg.get_item_rect_size(self.window)[1] or 600
+        y = line * LINE_HEIGHT
+        if y < top:
+            dpg.set_y_scroll(self.window, y)
+        elif y + 2 * LINE_HEIGHT > top + height:
+            dpg.set_y_scroll(self.window, y + 2 * LINE_HEIGHT - height)
+
+    def _on_edit(self, sender, value):
+        if self.editing is None:
+            return
+        start, end = self._line_span(self.editing)
+        if "\n" not in value:
+            # Solo el tramo de la línea: el coste no depende del tamaño del archivo
+            self.buffer.replace(start, end - start, value)
+            self._changed()
+            return
+        # Enter o pegar varias líneas: los saltos entran al buffer y la edición pasa a la última línea
+        value = value.replace("\r\n", "\n")
+        self.buffer.replace(start, end - start, value.replace("\n", self._line_ending(self.editing)))
+        line = self.editing + value.count("\n")
+        self._changed()
+        self.edit(line)
+
+    def expect_join(self, direction: int):
+        """Retroceso (-1) o Supr (1): si la tecla no cambia el texto, el cursor estaba en el borde de la línea."""
+        self._join = (direction, self.buffer.version, 0)
+
+    def _check_join(self):
+        direction, version, frames = self._join
+        if self.buffer.version != version:
+            # La tecla borró un carácter dentro de la línea
+            self._join = None
+        elif frames < 2:
+            # El cambio del input puede llegar en el frame de la tecla o en el siguiente
+            self._join = (direction, version, frames + 1)
+        else:
+            self._join = None
+            self.join_line(direction)
+
+    def join_line(self, direction: int):
+        """Une la línea editada con la anterior (-1) o la siguiente (1), borrando el salto entre ambas."""
+        line = self.editing
+        if direction < 0 and line == 0:
+            start, end = self._line_span(0)
+            # Una primera línea vacía se borra; con texto no hay con qué unirla
+            if start == end and self.buffer.line_count() > 1:
+                self.buffer.delete(0, self.buffer.line_start(1))
+                self._changed()
+                self.edit(0)
+            return
+        upper = line - 1 if direction < 0 else line
+        if upper + 1 >= self.buffer.line_count():
+            return
+        _, end = self._line_span(upper)
+        self.buffer.delete(end, self.buffer.line_start(upper + 1) - end)
+        self._changed()
+        self.edit(upper)
+
+    def move(self, delta: int):
+        self.edit(self.editing + delta)
+
+    # --- disco ---
+    def save(self) -> bool:
+        if self.path is None:
+            return False
+        try:
+            self.buffer.save(self.path)
+        except OSError as e:
+            dpg.set_value(self.status_id, f"Error guardando: {e}")
+            return False
+        self._update_status()
+        return True
+
+    def close(self):
+        global _ACTIVE
+        if _ACTIVE is self:
+            _ACTIVE = None
+        if self in _VIEWS:
+            _VIEWS.remove(self)
+        if self.lexer is not None:
+            self.lexer.close()
+        if dpg.does_item_exist(self._handlers):
+            dpg.delete_item(self._handlers)
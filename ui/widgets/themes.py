@@ -0,0 +1,183 @@
+"""ui.widgets.themes
+
+Registro de temas DearPyGui: cada tema con nombre se construye una sola vez
+y se reutiliza su handle, así reconstruir paneles o cambiar de tema no
+acumula items.
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dearpygui import dearpygui as dpg
+
+# Paleta: negro elegante + acento verde neón
+ACCENT_GREEN = (57, 255, 20, 255)       # #39FF14
+ACCENT_GREEN_DIM = (57, 255, 20, 180)   # con alpha para bordes/hover
+ACCENT_GREEN_HOVER = (80, 255, 80, 255)
+ACCENT_GREEN_ACTIVE = (40, 200, 40, 255)
+BG_BLACK = (18, 18, 18, 255)            # fondo principal casi negro
+BG_PANEL = (24, 24, 24, 255)            # paneles ligeramente más claros
+BG_OUTLINER = (20, 20, 20, 255)
+TEXT_LIGHT = (230, 230, 230, 255)
+TEXT_DARK = (0, 0, 0, 255)
+
+# Un tema: [(componente, [("color", mvThemeCol_*, rgba) | ("style", mvStyleVar_*, x[, y])])]
+Entry = Tuple
+ThemeSpec = List[Tuple[int, Sequence[Entry]]]
+
+
+def _green_buttons() -> List[Entry]:
+    return [
+        ("color", dpg.mvThemeCol_Button, ACCENT_GREEN),
+        ("color", dpg.mvThemeCol_ButtonHovered, ACCENT_GREEN_HOVER),
+        ("color", dpg.mvThemeCol_ButtonActive, ACCENT_GREEN_ACTIVE),
+    ]
+
+
+def _builtin_specs() -> Dict[str, ThemeSpec]:
+    return {
+        # Global
+        "dark": [(dpg.mvAll, [
+            ("color", dpg.mvThemeCol_WindowBg, BG_BLACK),
+            ("color", dpg.mvThemeCol_Text, TEXT_LIGHT),
+            ("color", dpg.mvThemeCol_FrameBg, (28, 28, 28, 255)),
+            ("color", dpg.mvThemeCol_FrameBgHovered, (34, 34, 34, 255)),
+            ("color", dpg.mvThemeCol_FrameBgActive, (36, 36, 36, 255)),
+            *_green_buttons(),
+            ("color", dpg.mvThemeCol_Border, ACCENT_GREEN_DIM),
+            ("color", dpg.mvThemeCol_Header, (32, 32, 32, 255)),
+            ("color", dpg.mvThemeCol_HeaderHovered, ACCENT_GREEN_DIM),
+            ("color", dpg.mvThemeCol_HeaderActive, ACCENT_GREEN),
+            # Tabs del editor (suaves, sin sobresaturar)
+            ("color", dpg.mvThemeCol_Tab, (26, 26, 26, 255)),
+            ("color", dpg.mvThemeCol_TabHovered, (30, 30, 30, 255)),
+            ("color", dpg.mvThemeCol_TabActive, (32, 32, 32, 255)),
+            ("style", dpg.mvStyleVar_WindowRounding, 4.0),
+            ("style", dpg.mvStyleVar_FrameRounding, 4.0),
+            ("style", dpg.mvStyleVar_ItemSpacing, 8.0, 8.0),
+            ("style", dpg.mvStyleVar_WindowPadding, 8.0, 8.0),
+            # Bordes sutiles para sensación nativa
+            ("style", dpg.mvStyleVar_WindowBorderSize, 1.0),
+            ("style", dpg.mvStyleVar_FrameBorderSize, 1.0),
+        ])],
+        # Paneles
+        "viewport": [(dpg.mvAll, [
+            ("color", dpg.mvThemeCol_WindowBg, BG_PANEL),
+            ("color", dpg.mvThemeCol_Border, ACCENT_GREEN_DIM),
+            ("style", dpg.mvStyleVar_WindowRounding, 4.0),
+            ("style", dpg.mvStyleVar_ItemSpacing, 8.0, 8.0),
+        ])],
+        "toolbar": [(dpg.mvAll, [
+            ("color", dpg.mvThemeCol_WindowBg, BG_BLACK),
+            ("color", dpg.mvThemeCol_Text, TEXT_LIGHT),
+            ("color", dpg.mvThemeCol_Border, (57, 255, 20, 160)),
+            *_green_buttons(),
+            ("style", dpg.mvStyleVar_WindowRounding, 4.0),
+            ("style", dpg.mvStyleVar_ItemSpacing, 6.0, 6.0),
+        ])],
+        "log": [(dpg.mvAll, [
+            ("color", dpg.mvThemeCol_WindowBg, BG_BLACK),
+            ("color", dpg.mvThemeCol_Text, TEXT_LIGHT),
+            ("color", dpg.mvThemeCol_Border, (57, 255, 20, 160)),
+            *_green_buttons(),
+            ("style", dpg.mvStyleVar_WindowRounding, 4.0),
+            ("style", dpg.mvStyleVar_ItemSpacing, 8.0, 8.0),
+        ])],
+        "outliner": [(dpg.mvAll, [
+            ("color", dpg.mvThemeCol_WindowBg, BG_OUTLINER),
+            ("color", dpg.mvThemeCol_Text, TEXT_LIGHT),
+            ("color", dpg.mvThemeCol_Border, ACCENT_GREEN_DIM),
+            ("color", dpg.mvThemeCol_HeaderHovered, ACCENT_GREEN_DIM),
+            ("style", dpg.mvStyleVar_WindowRounding, 4.0),
+            ("style", dpg.mvStyleVar_ItemSpacing, 8.0, 8.0),
+        ])],
+        "outliner.sidebar": [(dpg.mvAll, [
+            ("color", dpg.mvThemeCol_WindowBg, BG_OUTLINER),
+            ("color", dpg.mvThemeCol_Text, TEXT_LIGHT),
+            ("color", dpg.mvThemeCol_Border, (57, 255, 20, 160)),
+            ("style", dpg.mvStyleVar_WindowRounding, 4.0),
+            ("style", dpg.mvStyleVar_ItemSpacing, 8.0, 8.0),
+        ])],
+        # Items sueltos: texto negro sobre verde
+        "button.accent": [(dpg.mvAll, [
+            ("color", dpg.mvThemeCol_Text, TEXT_DARK),
+            *_green_buttons(),
+            ("style", dpg.mvStyleVar_FrameRounding, 4.0),
+        ])],
+        "combo.accent": [(dpg.mvAll, [
+            ("color", dpg.mvThemeCol_Text, TEXT_DARK),
+            ("color", dpg.mvThemeCol_FrameBg, ACCENT_GREEN),
+            ("color", dpg.mvThemeCol_FrameBgHovered, ACCENT_GREEN_HOVER),
+            ("color", dpg.mvThemeCol_FrameBgActive, ACCENT_GREEN_ACTIVE),
+            ("color", dpg.mvThemeCol_Border, ACCENT_GREEN_DIM),
+            ("style", dpg.mvStyleVar_FrameRounding, 4.0),
+        ])],
+    }
+
+
+class ThemeRegistry:
+    def __init__(self):
+        self._specs: Dict[str, ThemeSpec] = _builtin_specs()
+        self._handles: Dict[str, int] = {}
+        self.active: Optional[str] = None
+
+    def define(self, name: str, spec: ThemeSpec):
+        """Registra (o redefine) un tema; el item anterior se borra, no se acumula."""
+        if self._specs.get(name) == spec:
+            return
+        self._specs[name] = spec
+        old = self._handles.pop(name, None)
+        if self.active == name:
+            self.set_active(name)
+        if old is not None and dpg.does_item_exist(old):
+            dpg.delete_item(old)
+
+    def get(self, name: str) -> int:
+        handle = self._handles.get(name)
+        # Un contexto nuevo invalida los handles anteriores
+        if handle is not None and dpg.does_item_exist(handle):
+            return handle
+        with dpg.theme() as handle:
+            for component, entries in self._specs[name]:
+                with dpg.theme_component(component):
+                    for kind, key, *values in entries:
+                        if kind == "color":
+                            dpg.add_theme_color(key, values[0])
+                        else:
+                            dpg.add_theme_style(key, *values)
+        self._handles[name] = handle
+        return handle
+
+    def bind(self, item, name: str):
+        try:
+            dpg.bind_item_theme(item, self.get(name))
+        except Exception:
+            pass
+
+    def set_active(self, name: str):
+        """Cambia el tema global en una llamada; el anterior queda en caché para volver."""
+        dpg.bind_theme(self.get(name))
+        self.active = name
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        return {
+            "themes": sum(1 for h in self._handles.values() if dpg.does_item_exist(h)),
+            "items": len(dpg.get_all_items()),
+            "rss_kb": _rss_kb(),
+        }
+
+
+def _rss_kb() -> Optional[int]:
+    try:
+        with open(f"/proc/{os.getpid()}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+THEMES = ThemeRegistry()
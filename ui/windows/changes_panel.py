@@ -0,0 +1,67 @@
+"""ui.windows.changes_panel
+
+Ventana "Cambios desde el guardado": lista lo añadido, borrado, modificado,
+movido y reenlazado respecto a project.json.
+"""
+from typing import Callable
+
+from dearpygui import dearpygui as dpg
+
+from ..core.diff import GraphDiff
+
+
+CHANGES_WINDOW_TAG = "changes_window"
+CHANGES_SUMMARY_TAG = "changes_summary"
+CHANGES_LIST_TAG = "changes_list"
+# Por sección; con miles de cambios basta el recuento
+MAX_LISTED = 200
+
+_SECTIONS = [
+    ("added", "Añadidos"),
+    ("removed", "Borrados"),
+    ("changed", "Modificados"),
+    ("moved", "Movidos"),
+    ("relinked", "Reenlazados"),
+]
+
+
+def build_changes_window(on_pick: Callable[[str], None]) -> int:
+    """Construye la ventana (oculta); `on_pick(node_id)` al hacer clic en un nodo."""
+    with dpg.window(label="Cambios desde el guardado", tag=CHANGES_WINDOW_TAG, width=420, height=420,
+                    pos=(480, 100), show=False, no_collapse=True, user_data=on_pick) as win_id:
+        dpg.add_text("", tag=CHANGES_SUMMARY_TAG)
+        dpg.add_separator()
+        with dpg.child_window(tag=CHANGES_LIST_TAG, border=False):
+            pass
+    return win_id
+
+
+def show_changes(diff: GraphDiff):
+    if not dpg.does_item_exist(CHANGES_WINDOW_TAG):
+        return
+    on_pick = dpg.get_item_user_data(CHANGES_WINDOW_TAG)
+    dpg.delete_item(CHANGES_LIST_TAG, children_only=True)
+    if diff.is_empty():
+        dpg.set_value(CHANGES_SUMMARY_TAG, "Sin cambios desde el último guardado")
+    else:
+        counts = diff.summary()
+        parts = [f"{label}: {counts[key]}" for key, label in _SECTIONS if counts[key]]
+        parts.append(f"enlaces +{counts['links_added']} -{counts['links_removed']}")
+        dpg.set_value(CHANGES_SUMMARY_TAG, " | ".join(parts))
+    for key, label in _SECTIONS:
+        ids = getattr(diff, key)
+        if not ids:
+            continue
+        with dpg.tree_node(label=f"{label} ({len(ids)})", parent=CHANGES_LIST_TAG, default_open=len(ids) <= 20):
+            for nid in ids[:MAX_LISTED]:
+                if key == "removed":
+                    dpg.add_text(nid)
+                else:
+                    dpg.add_selectable(label=nid, callback=lambda s, a, u=nid: on_pick(u))
+            if len(ids) > MAX_LISTED:
+                dpg.add_text(f"... y {len(ids) - MAX_LISTED} más")
+    if diff.renamed:
+        with dpg.tree_node(label=f"Renombrados ({len(diff.renamed)})", parent=CHANGES_LIST_TAG):
+            for old, new in list(diff.renamed.items())[:MAX_LISTED]:
+                dpg.add_selectable(label=f"{old} -> {new}", callback=lambda s, a, u=new: on_pick(u))
+    dpg.configure_item(CHANGES_WINDOW_TAG, show=True)
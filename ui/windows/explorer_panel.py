@@ -4,17 +4,30 @@ Explorador de archivos estilo VS Code, conectado al filesystem.
 """
 import os
 import datetime
+from typing import Dict
+
 from dearpygui import dearpygui as dpg
 
+from ..widgets.themes import THEMES
+from ..widgets.text_view import TextView
+from ..core.scheduler import SCHEDULER, LOW
+from ..core.lexer import IncrementalLexer, lexer_for
+from ..core.textbuffer import PieceTable
+
 
 EXPLORER_TREE_TAG = "explorer_tree_root"
+# Niveles de carpetas que muestra el árbol bajo la raíz
+EXPLORER_DEPTH = 2
+_EXPLORER_ROOT = ""
+# Pestaña del editor -> vista del archivo abierto en ella
+EDITOR_VIEWS: Dict[int, TextView] = {}
 
 
-def _open_file_in_editor(path: str):
-    """Abre el archivo en una nueva pestaña del editor y actualiza Propiedades."""
+def _open_file_in_editor(path: str, line: int = 0):
+    """Abre el archivo en una nueva pestaña del editor (en la línea `line`, 1 la primera) y actualiza Propiedades."""
     try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
+        # Piece table: editar no copia el archivo entero y solo se dibujan las líneas visibles
+        buffer = PieceTable.from_file(path)
     except Exception as e:
         # Muestra el error en la terminal si existe
         try:
@@ -25,8 +38,12 @@ def _open_file_in_editor(path: str):
 
     # Crear pestaña con contenido
     try:
-        with dpg.tab(label=os.path.basename(path), parent="editor_tabbar"):
-            dpg.add_input_text(multiline=True, width=-1, height=-1, default_value=content)
+        with dpg.tab(label=os.path.basename(path), parent="editor_tabbar") as tab:
+            tokenize = lexer_for(path)
+            lexer = IncrementalLexer(buffer, tokenize) if tokenize else None
+            view = EDITOR_VIEWS[tab] = TextView(tab, buffer, path, lexer=lexer)
+            if line > 1:
+                view.goto(line - 1)
     except Exception:
         # Si no existe editor_tabbar, simplemente no hacemos nada
         pass
@@ -51,32 +68,64 @@ def _open_file_in_editor(path: str):
         pass
 
 
-def _add_dir_node(parent, dir_path: str, depth: int = 0, max_depth: int = 2):
-    """Añade nodos de carpeta/archivo al árbol de Explorer."""
-    if depth > max_depth:
-        return
+def close_editor_tab(tab: int):
+    view = EDITOR_VIEWS.pop(tab, None)
+    if view is not None:
+        view.close()
+    dpg.delete_item(tab)
+
+
+def _add_dir_nodes(parent, dir_path: str, max_depth: int = 2):
+    """Añade nodos de carpeta/archivo al árbol de Explorer, cediendo tras cada carpeta."""
     label = os.path.basename(dir_path) or dir_path
-    with dpg.tree_node(parent=parent, label=label, default_open=(depth == 0)):
+    # Las carpetas se crean vacías en su sitio y se llenan en pasos posteriores
+    stack = [(dpg.add_tree_node(parent=parent, label=label, default_open=True), dir_path, 0)]
+    while stack:
+        node, dir_path, depth = stack.pop()
+        if not dpg.does_item_exist(node):
+            continue
         try:
             entries = sorted(os.listdir(dir_path))
         except Exception:
             entries = []
+        pending = []
         for name in entries:
             p = os.path.join(dir_path, name)
             if os.path.isdir(p):
-                _add_dir_node(dpg.last_item(), p, depth + 1, max_depth)
+                if depth < max_depth:
+                    pending.append((dpg.add_tree_node(parent=node, label=name, default_open=False), p, depth + 1))
             else:
-                dpg.add_selectable(label=name, callback=lambda s, a, u=p: _open_file_in_editor(u))
+                dpg.add_selectable(parent=node, label=name, callback=lambda s, a, u=p: _open_file_in_editor(u))
+        stack.extend(reversed(pending))
+        yield
 
 
-def _populate_explorer(root_path: str):
-    """Llena el árbol del Explorer con el contenido de la carpeta raíz."""
+def _populate_steps(root_path: str):
     if not dpg.does_item_exist(EXPLORER_TREE_TAG):
         return
-    children = dpg.get_item_children(EXPLORER_TREE_TAG, slot=0) or []
+    children = dpg.get_item_children(EXPLORER_TREE_TAG, slot=1) or []
     for cid in children:
         dpg.delete_item(cid)
-    _add_dir_node(EXPLORER_TREE_TAG, root_path, depth=0, max_depth=2)
+    yield from _add_dir_nodes(EXPLORER_TREE_TAG, root_path, max_depth=EXPLORER_DEPTH)
+
+
+def _populate_explorer(root_path: str):
+    """Llena el árbol del Explorer con el contenido de la carpeta raíz, repartido entre frames."""
+    global _EXPLORER_ROOT
+    _EXPLORER_ROOT = os.path.abspath(root_path)
+    SCHEDULER.post(_populate_steps, root_path, priority=LOW, key="explorer")
+
+
+def on_workspace_changes(changes):
+    """Listener del FileWatcher (hilo del watcher): rehace el árbol si aparece o desaparece algo visible en él."""
+    if not _EXPLORER_ROOT:
+        return
+    root = _EXPLORER_ROOT.rstrip(os.sep) + os.sep
+    for kind, path in changes:
+        # Modificar un archivo no cambia el árbol; lo que cae más hondo que EXPLORER_DEPTH no se muestra
+        if kind != "modified" and path.startswith(root) and path[len(root):].count(os.sep) <= EXPLORER_DEPTH:
+            _populate_explorer(_EXPLORER_ROOT)
+            return
 
 
 def build_explorer_panel() -> int:
@@ -87,18 +136,7 @@ def build_explorer_panel() -> int:
             pass
 
     # Theme: negro elegante con acento verde
-    try:
-        with dpg.theme() as _outliner_theme:
-            with dpg.theme_component(dpg.mvAll):
-                dpg.add_theme_color(dpg.mvThemeCol_WindowBg, (20, 20, 20, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_Text, (230, 230, 230, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_Border, (57, 255, 20, 180))
-                dpg.add_theme_color(dpg.mvThemeCol_HeaderHovered, (57, 255, 20, 180))
-                dpg.add_theme_style(dpg.mvStyleVar_WindowRounding, 4.0)
-                dpg.add_theme_style(dpg.mvStyleVar_ItemSpacing, 8.0, 8.0)
-        dpg.bind_item_theme(win_id, _outliner_theme)
-    except Exception:
-        pass
+    THEMES.bind(win_id, "outliner")
 
     # Poblar con la carpeta actual del proyecto
     try:
@@ -113,22 +151,14 @@ def build_explorer_sidebar(parent_id: int) -> int:
     Devuelve el id del contenedor del árbol para futuras operaciones.
     """
     dpg.add_text("Explorer", parent=parent_id)
+    # El callback lo conecta main_ui (necesita el grafo y el journal)
+    dpg.add_button(label="Importar Python", tag="btn_import_python", parent=parent_id)
     dpg.add_separator(parent=parent_id)
     with dpg.child_window(tag=EXPLORER_TREE_TAG, border=False) as tree_id:
         pass
 
     # Aplicar el mismo tema al parent para coherencia visual
-    try:
-        with dpg.theme() as _outliner_theme:
-            with dpg.theme_component(dpg.mvAll):
-                dpg.add_theme_color(dpg.mvThemeCol_WindowBg, (20, 20, 20, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_Text, (230, 230, 230, 255))
-                dpg.add_theme_color(dpg.mvThemeCol_Border, (57, 255, 20, 160))
-                dpg.add_theme_style(dpg.mvStyleVar_WindowRounding, 4.0)
-                dpg.add_theme_style(dpg.mvStyleVar_ItemSpacing, 8.0, 8.0)
-        dpg.bind_item_theme(parent_id, _outliner_theme)
-    except Exception:
-        pass
+    THEMES.bind(parent_id, "outliner.sidebar")
 
     try:
         _populate_explorer(os.getcwd())
@@ -0,0 +1,63 @@
+"""ui.windows.search_palette
+
+Paleta de búsqueda (Ctrl+P) sobre nodos, archivos y símbolos del workspace.
+"""
+from typing import Callable
+
+from dearpygui import dearpygui as dpg
+
+from ..core.search import SearchHit, SearchIndex
+
+
+SEARCH_PALETTE_TAG = "search_palette"
+SEARCH_INPUT_TAG = "search_palette_input"
+SEARCH_RESULTS_TAG = "search_palette_results"
+MAX_RESULTS = 30
+
+_KIND_PREFIX = {"node": "[nodo]", "file": "[archivo]", "symbol": "[símbolo]", "text": "[texto]"}
+
+
+def _render_results(index: SearchIndex, query: str, on_pick: Callable[[SearchHit], None]):
+    if not dpg.does_item_exist(SEARCH_RESULTS_TAG):
+        return
+    dpg.delete_item(SEARCH_RESULTS_TAG, children_only=True)
+    for hit in index.search(query, limit=MAX_RESULTS):
+        dpg.add_selectable(
+            label=f"{_KIND_PREFIX.get(hit.kind, '')} {hit.label}",
+            parent=SEARCH_RESULTS_TAG,
+            callback=lambda s, a, u=hit: _pick(u, on_pick),
+        )
+
+
+def _pick(hit: SearchHit, on_pick: Callable[[SearchHit], None]):
+    hide_search_palette()
+    on_pick(hit)
+
+
+def build_search_palette(index: SearchIndex, on_pick: Callable[[SearchHit], None]) -> int:
+    """Construye la paleta (oculta). Cada pulsación consulta el índice; no recorre el grafo."""
+    with dpg.window(label="Buscar", tag=SEARCH_PALETTE_TAG, width=560, height=360, pos=(420, 80),
+                    show=False, no_collapse=True, no_resize=True) as win_id:
+        dpg.add_input_text(tag=SEARCH_INPUT_TAG, hint="Nodos, archivos, símbolos...", width=-1,
+                           callback=lambda s, a: _render_results(index, a, on_pick))
+        dpg.add_separator()
+        with dpg.child_window(tag=SEARCH_RESULTS_TAG, border=False):
+            pass
+    return win_id
+
+
+def show_search_palette():
+    try:
+        dpg.set_value(SEARCH_INPUT_TAG, "")
+        dpg.delete_item(SEARCH_RESULTS_TAG, children_only=True)
+        dpg.configure_item(SEARCH_PALETTE_TAG, show=True)
+        dpg.focus_item(SEARCH_INPUT_TAG)
+    except Exception:
+        pass
+
+
+def hide_search_palette():
+    try:
+        dpg.configure_item(SEARCH_PALETTE_TAG, show=False)
+    except Exception:
+        pass
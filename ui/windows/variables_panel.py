@@ -0,0 +1,119 @@
+"""ui.windows.variables_panel
+
+Ventana "Variables en tiempo real": último valor, mínimo, máximo y una
+serie min/max de cada variable vigilada (salidas de nodos, "<nodo>.<puerto>").
+
+No se empuja nada desde la evaluación: mientras la ventana se ve, se lee
+la telemetría a `REFRESH_HZ` y solo se tocan las filas listadas cuya
+variable cambió desde la lectura anterior. Se listan como mucho
+`MAX_ROWS` variables (el filtro elige cuáles), así que vigilar miles
+cuesta lo mismo que vigilar doscientas.
+"""
+import time
+from typing import Callable, List, Optional, Tuple
+
+from dearpygui import dearpygui as dpg
+
+from ..core.shm import preview
+from ..core.telemetry import Telemetry, Variable
+
+
+VARIABLES_WINDOW_TAG = "variables_window"
+VARIABLES_SUMMARY_TAG = "variables_summary"
+VARIABLES_FILTER_TAG = "variables_filter"
+VARIABLES_TABLE_TAG = "variables_table"
+REFRESH_HZ = 10
+MAX_ROWS = 200
+
+
+class _Panel:
+    def __init__(self, telemetry: Telemetry):
+        self.telemetry = telemetry
+        self.rows: List[Tuple[int, int, int, int, int, int]] = []  # (fila, nombre, valor, mín, máx, serie)
+        self.listed: List[str] = []
+        self.total = 0
+        self.last = 0.0
+        self.seen: Tuple[int, str] = (-1, "")  # (watch_version, filtro) del listado actual
+
+    def refresh(self):
+        now = time.monotonic()
+        if now - self.last < 1.0 / REFRESH_HZ:
+            return
+        self.last = now
+        tele = self.telemetry
+        changed = tele.take_changed()
+        key = (tele.watch_version, dpg.get_value(VARIABLES_FILTER_TAG) or "")
+        if key != self.seen:
+            self.seen = key
+            names = [n for n in tele.names() if key[1] in n]
+            self.total = len(names)
+            self.listed = names[:MAX_ROWS]
+            self._layout()
+            changed = set(self.listed)
+        for i, name in enumerate(self.listed):
+            if name in changed:
+                var = tele.read(name)
+                if var is not None:
+                    self._fill(self.rows[i], var)
+        more = f" (mostrando {len(self.listed)})" if self.total > len(self.listed) else ""
+        dpg.set_value(VARIABLES_SUMMARY_TAG, f"{self.total} variables{more} | {tele.stats['published']} valores "
+                                             f"publicados, {tele.stats['overwritten']} descartados sin leer")
+
+    def _layout(self):
+        while len(self.rows) < len(self.listed):
+            with dpg.table_row(parent=VARIABLES_TABLE_TAG) as row:
+                cells = [dpg.add_text("") for _ in range(4)]
+                plot = dpg.add_simple_plot(height=22, width=-1)
+            self.rows.append((row, *cells, plot))
+        for i, (row, name_id, *_rest) in enumerate(self.rows):
+            dpg.configure_item(row, show=i < len(self.listed))
+            if i < len(self.listed):
+                dpg.set_value(name_id, self.listed[i])
+
+    @staticmethod
+    def _fill(row, var: Variable):
+        _, _, value_id, min_id, max_id, plot_id = row
+        dpg.set_value(value_id, preview(var.value, 40))
+        if var.series:
+            dpg.set_value(min_id, f"{min(b[1] for b in var.series):.6g}")
+            dpg.set_value(max_id, f"{max(b[2] for b in var.series):.6g}")
+            # Envolvente: mínimo y máximo de cada bucket alternados
+            dpg.set_value(plot_id, [v for b in var.series for v in (b[1], b[2])])
+        else:
+            dpg.set_value(min_id, "")
+            dpg.set_value(max_id, "")
+            dpg.set_value(plot_id, [])
+
+
+_PANEL: Optional[_Panel] = None
+
+
+def build_variables_window(telemetry: Telemetry, on_watch_selected: Callable[[], None]) -> int:
+    """Construye la ventana (oculta); `on_watch_selected()` vigila las salidas del nodo seleccionado."""
+    global _PANEL
+    _PANEL = _Panel(telemetry)
+    with dpg.window(label="Variables en tiempo real", tag=VARIABLES_WINDOW_TAG, width=620, height=420,
+                    pos=(520, 120), show=False, no_collapse=True) as win_id:
+        with dpg.group(horizontal=True):
+            dpg.add_checkbox(label="Todos los nodos", default_value=telemetry.watch_all,
+                             callback=lambda s, a: setattr(telemetry, "watch_all", bool(a)))
+            dpg.add_button(label="Vigilar selección", callback=lambda: on_watch_selected())
+            dpg.add_input_text(tag=VARIABLES_FILTER_TAG, hint="Filtrar...", width=-1)
+        dpg.add_text("", tag=VARIABLES_SUMMARY_TAG)
+        with dpg.table(tag=VARIABLES_TABLE_TAG, header_row=True, resizable=True, scrollY=True,
+                       borders_innerH=True, policy=dpg.mvTable_SizingStretchProp):
+            dpg.add_table_column(label="Variable")
+            dpg.add_table_column(label="Valor")
+            dpg.add_table_column(label="Mín")
+            dpg.add_table_column(label="Máx")
+            dpg.add_table_column(label="Serie", init_width_or_weight=1.5)
+    # Solo se refresca mientras se ve la ventana
+    with dpg.item_handler_registry() as handlers:
+        dpg.add_item_visible_handler(callback=lambda: _PANEL.refresh())
+    dpg.bind_item_handler_registry(VARIABLES_SUMMARY_TAG, handlers)
+    return win_id
+
+
+def show_variables():
+    if dpg.does_item_exist(VARIABLES_WINDOW_TAG):
+        dpg.configure_item(VARIABLES_WINDOW_TAG, show=True)